@@ -1,16 +1,48 @@
 import os
 import logging
 import json
-from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, make_response, jsonify
+import re
+import time
+import random
+from datetime import datetime, timedelta
+import click
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, stream_with_context
+from flask import g
+from flask import Response as FlaskResponse, send_file
 from werkzeug.middleware.proxy_fix import ProxyFix
 import io
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
+import csv
+import hmac
+import secrets
+from functools import wraps
 
-from models import init_db, log_query, log_response, get_recent_queries, get_successful_responses, db
-from scraper import get_scraper
+from models import init_db, log_query, log_response, db, Query, Response
+from models import get_search_job, migrate_inline_html, get_query_log_page, iter_query_logs, QUERY_LOG_COLUMNS
+from models import get_dashboard_stats, rebuild_stats, get_case_history, get_case, get_case_changes, rebuild_cases
+from models import add_to_watchlist, get_watched_case, get_watchlist, remove_from_watchlist
+from models import CASE_COLUMNS, WEBHOOK_FIELDS, create_webhook_subscription, deactivate_webhook_subscription
+from models import get_webhook_subscriptions
+from models import get_trace_spans, prune_trace_spans, store_trace_spans
+from models import FULLTEXT_FIELDS, build_fulltext_query, fulltext_available, rebuild_fulltext, search_text
+from blobstore import migrate_sqlite_html
+from jobs import SearchJobRunner
+from scraper import COURT_BASE_URL, get_scraper
+from scraper_pool import get_scraper_pool
+from synthetic_cases import build_dataset
+from case_record import case_record
+from upstream import UPSTREAM_UNAVAILABLE_ERROR, get_upstream_guard
+from cache import get_case_cache, normalize_case_key
+from singleflight import get_single_flight
+from ratelimit import RateLimiter
+from bulk import BulkInputError, bulk_search, parse_bulk_input
+from documents import DOCUMENT_HASH, DocumentError, get_document_mirror
+from pdf_render import DossierBuilder, PDFCache, build_dossier, stream_dossier_zip
+from watchlist import RefreshScheduler
+from webhooks import WebhookDispatcher, is_deliverable_url
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from metrics import HTTP_REQUEST_SECONDS, SEARCH_SECONDS, metrics_available, render_metrics, stage_timer
+import tracing
+from tracing import span, set_trace_attribute
 from mock_data import CASE_TYPES
 from mock_data import MOCK_CASES
 
@@ -24,11 +56,310 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 init_db(app)
 
 USE_MOCK_SCRAPER = os.environ.get("USE_MOCK_SCRAPER", "true").lower() == "true"
+ASYNC_SEARCH = os.environ.get("ASYNC_SEARCH", "false").lower() == "true"
+JOB_EVENTS_TIMEOUT = int(os.environ.get("JOB_EVENTS_TIMEOUT", "60"))
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", "5000"))
+BULK_MAX_CONCURRENCY = int(os.environ.get("BULK_MAX_CONCURRENCY", "8"))
+BULK_RETRIES = int(os.environ.get("BULK_RETRIES", "2"))
+WATCHLIST_SCHEDULER = os.environ.get("WATCHLIST_SCHEDULER", "false").lower() == "true"
+WATCHLIST_USER_AGENT = 'watchlist-scheduler'
+WEBHOOK_DISPATCHER = os.environ.get("WEBHOOK_DISPATCHER", "false").lower() == "true"
+WEBHOOK_ALLOWED_HOSTS = [h.strip() for h in os.environ.get("WEBHOOK_ALLOWED_HOSTS", "").split(',') if h.strip()]
+# Bearer token for endpoints that register callbacks or spend the scrape budget; unset disables them
+API_TOKEN = os.environ.get("API_TOKEN", "")
+# Mock cases link to PDFs that do not exist, so only real scrapes prefetch by default
+DOCUMENT_PREFETCH = os.environ.get("DOCUMENT_PREFETCH", "false" if USE_MOCK_SCRAPER else "true").lower() == "true"
+# Each sampled request stores its spans (on the export thread); raise to 1.0 to debug a specific search
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0.01"))
+UNTRACED_ENDPOINTS = {'static', 'metrics'}
+
+case_cache = get_case_cache()
+pdf_cache = PDFCache(os.environ.get("PDF_CACHE_DIR", os.path.join(app.instance_path, "pdf_cache")))
+dossier_builder = DossierBuilder(pdf_cache, workers=int(os.environ.get("PDF_WORKERS", "0")) or None)
+PDF_BUILD_TIMEOUT = int(os.environ.get("PDF_BUILD_TIMEOUT", "120"))
+document_mirror = get_document_mirror(os.path.join(app.instance_path, "documents"))
+single_flight = get_single_flight(shared_cache=case_cache.backend == 'sqlite')
+def store_query_trace(spans):
+    """Trace exporter keeping the spans of traces that logged a query, for /debug/trace"""
+    if 'query_id' not in spans[-1].trace.root.attributes:
+        return
+    with app.app_context():
+        store_trace_spans(spans)
+
+tracing.add_exporter(store_query_trace)
+tracing.configure_from_env()
+
+upstream_guard = get_upstream_guard(os.environ.get("COURT_BASE_URL", COURT_BASE_URL))
+# Mock scrapers cost nothing to build, so only real scraper sessions are pooled
+scraper_pool = get_scraper_pool(lambda: get_scraper(use_mock=USE_MOCK_SCRAPER),
+                                size=0 if USE_MOCK_SCRAPER else None, upstream=upstream_guard)
+bulk_rate_limiter = RateLimiter(rate=float(os.environ.get("BULK_RATE_LIMIT", "1.0")),
+                                burst=int(os.environ.get("BULK_RATE_BURST", "1")))
+
+def canonical_case_data(case_type, case_number, filing_year):
+    """
+    Parsed data from the canonical cases row if it is still fresh
+
+    A row is fresh within the cache TTL of its last scrape, and a watched
+    case stays fresh until the scheduler's next refresh of it is due.
+    Backs the per-process cache with the database, so a case scraped by any
+    worker (or pre-warmed by the scheduler) is served without scraping again.
+    """
+    if case_cache.backend == 'none':
+        return None
+    with app.app_context():
+        case = get_case(case_type, case_number, filing_year)
+        if case is None:
+            return None
+        now = datetime.utcnow()
+        if case.last_scraped >= now - timedelta(seconds=case_cache.ttl):
+            return case.data
+        watched = get_watched_case(case.case_key)
+        if watched is not None and watched.last_refreshed_at and watched.next_refresh_at > now:
+            return case.data
+        return None
+
+def last_known_case_data(case_type, case_number, filing_year):
+    """Parsed data from the canonical cases row regardless of its age (None if never scraped)"""
+    with app.app_context():
+        case = get_case(case_type, case_number, filing_year)
+        return case.data if case is not None else None
+
+def case_document_urls(case_data):
+    """Every PDF linked from a case, pdf_links first"""
+    urls = [link['url'] for link in case_data.get('pdf_links') or [] if link.get('url')]
+    if case_data.get('pdf_link'):
+        urls.append(case_data['pdf_link'])
+    return list(dict.fromkeys(urls))
+
+def lookup_case(case_type, case_number, filing_year, rate_limiter=None):
+    """
+    Resolve a case through the result cache and the canonical cases table,
+    scraping only on a miss
+
+    When rate_limiter is given it is acquired before each upstream scrape
+    (cache hits are not throttled). While the court website's circuit
+    breaker is open the last known data of the case is served, however old.
+
+    Returns:
+        Tuple[bool, Dict, str, bool]: (success, case_data, error_message, cache_hit)
+    """
+    case_key = normalize_case_key(case_type, case_number, filing_year)
+    with span('cache.get', case_key=case_key):
+        cached = case_cache.get(case_key)
+    if cached is not None:
+        logger.info(f"Cache hit for case {case_key}")
+        success, case_data, error_message = cached
+        return success, case_data, error_message, True
+
+    with span('cache.canonical'):
+        case_data = canonical_case_data(case_type, case_number, filing_year)
+    if case_data is not None:
+        logger.info(f"Serving case {case_key} from the canonical cases table")
+        case_cache.set(case_key, True, case_data, "")
+        return True, case_data, "", True
+
+    def scrape():
+        # Another worker may have filled the shared cache while we waited for its lock
+        cached = case_cache.get(case_key, record_stats=False)
+        if cached is not None:
+            return cached + (True,)
+
+        if rate_limiter is not None:
+            with span('rate_limiter.acquire'):
+                rate_limiter.acquire()
+        with span('scrape', case_key=case_key) as scrape_span, scraper_pool.checkout() as scraper:
+            success, case_data, error_message = scraper.search_case(case_type, case_number, filing_year)
+            if scrape_span is not None:
+                scrape_span.set_attribute('success', success)
+        if error_message == UPSTREAM_UNAVAILABLE_ERROR:
+            stale = last_known_case_data(case_type, case_number, filing_year)
+            if stale is not None:
+                logger.warning(f"Court website unavailable, serving last known data for case {case_key}")
+                return True, stale, "", True
+        case_cache.store_result(case_key, success, case_data, error_message)
+        if success and DOCUMENT_PREFETCH:
+            document_mirror.prefetch(case_document_urls(case_data))
+        return success, case_data, error_message, False
+
+    with span('single_flight', case_key=case_key) as flight_span:
+        result, shared = single_flight.do(case_key, scrape)
+        if flight_span is not None:
+            flight_span.set_attribute('shared', shared)
+    if shared:
+        logger.info(f"Joined in-flight lookup for case {case_key}")
+    return result
 
 @app.route('/')
 def index():
     """Main page with case search form"""
-    return render_template('index.html', case_types=CASE_TYPES)
+    return render_template('index.html', case_types=CASE_TYPES, upstream=upstream_guard.stats())
+
+def record_search_result(query_id, success, case_data, error_message, latency_ms=None, cache_hit=False):
+    """Store the outcome of a lookup as a Response row"""
+    if latency_ms is not None:
+        SEARCH_SECONDS.labels('success' if success else 'failure', 'hit' if cache_hit else 'miss').observe(
+            latency_ms / 1000)
+    # Serialized once here; log_response and update_case reuse the record and its JSON
+    record = case_record(case_data)
+    with stage_timer('db_logging'):
+        return log_response(
+            query_id=query_id,
+            latency_ms=latency_ms,
+            cache_hit=cache_hit,
+            raw_html=case_data.get('raw_html', ''),
+            response_status=200 if success else 404,
+            parsed_json=record.to_json() if record else None,
+            case_record=record,
+            **{column: record.get(column, '') if record else '' for column in CASE_COLUMNS},
+            scrape_success=success,
+            error_message=error_message if not success else None
+        )
+
+def run_search_job(job):
+    """Job handler executed by the background search workers"""
+    start_time = time.monotonic()
+    query = db.session.get(Query, job.query_id) if job.query_id else None
+    # Continue the trace of the request that queued the job, so both show up in one waterfall
+    trace_id = query.trace_id if query is not None else None
+    sample_rate = 1.0 if trace_id else TRACE_SAMPLE_RATE
+    with tracing.trace('search_job', trace_id=trace_id, sample_rate=sample_rate, job_id=job.id):
+        if job.query_id:
+            set_trace_attribute('query_id', job.query_id)
+        success, case_data, error_message, cache_hit = lookup_case(job.case_type, job.case_number, job.filing_year)
+        response_log = record_search_result(job.query_id, success, case_data, error_message,
+                                            latency_ms=int((time.monotonic() - start_time) * 1000),
+                                            cache_hit=cache_hit)
+    return success, case_data, error_message, response_log.id
+
+job_runner = SearchJobRunner(app, run_search_job, workers=int(os.environ.get("SEARCH_JOB_WORKERS", "4")))
+
+def refresh_watched_case(case_type, case_number, filing_year):
+    """Scrape a watched case for the scheduler, bypassing the caches, and store the result"""
+    start_time = time.monotonic()
+    with tracing.trace('watchlist_refresh', sample_rate=TRACE_SAMPLE_RATE):
+        with span('scrape'), scraper_pool.checkout() as scraper:
+            success, case_data, error_message = scraper.search_case(case_type, case_number, filing_year)
+        case_cache.store_result(normalize_case_key(case_type, case_number, filing_year),
+                                success, case_data, error_message)
+        with app.app_context():
+            query = log_query(case_type=case_type, case_number=case_number, filing_year=filing_year,
+                              user_agent=WATCHLIST_USER_AGENT)
+            set_trace_attribute('query_id', query.id)
+            record_search_result(query.id, success, case_data, error_message,
+                                 latency_ms=int((time.monotonic() - start_time) * 1000))
+    return success, case_data, error_message
+
+refresh_scheduler = RefreshScheduler(
+    app, refresh_watched_case,
+    daily_budget=int(os.environ.get("WATCHLIST_DAILY_BUDGET", "2000")),
+    lock_path=os.environ.get("WATCHLIST_LOCK_FILE", os.path.join(app.instance_path, "watchlist.lock"))
+)
+
+webhook_dispatcher = WebhookDispatcher(
+    app,
+    batch_size=int(os.environ.get("WEBHOOK_BATCH_SIZE", "100")),
+    interval=float(os.environ.get("WEBHOOK_DISPATCH_INTERVAL", "5")),
+    max_attempts=int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", "10")),
+    lock_path=os.environ.get("WEBHOOK_LOCK_FILE", os.path.join(app.instance_path, "webhooks.lock")),
+    allowed_hosts=WEBHOOK_ALLOWED_HOSTS
+)
+
+@app.before_request
+def start_background_workers():
+    g.request_started = time.perf_counter()
+    scraper_pool.ensure_started()
+    # Also picks up jobs persisted before a restart, without waiting for a new submission
+    job_runner.ensure_started()
+    if request.endpoint not in UNTRACED_ENDPOINTS and random.random() < TRACE_SAMPLE_RATE:
+        g.trace_span = tracing.start_span(f"{request.method} {request.url_rule or request.path}",
+                                          path=request.path)
+    if WATCHLIST_SCHEDULER:
+        refresh_scheduler.ensure_started()
+    if WEBHOOK_DISPATCHER:
+        webhook_dispatcher.ensure_started()
+
+@app.after_request
+def observe_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.labels(request.endpoint or 'unmatched', request.method,
+                                    str(response.status_code)).observe(time.perf_counter() - started)
+    if 'trace_span' in g:
+        g.trace_span[0].set_attribute('status', response.status_code)
+        response.headers['X-Trace-Id'] = g.trace_span[0].trace_id
+    return response
+
+@app.teardown_request
+def end_request_trace(error=None):
+    trace_span = g.pop('trace_span', None)
+    if trace_span is not None:
+        tracing.end_span(*trace_span, error=error)
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics, aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    if not metrics_available():
+        return FlaskResponse('prometheus_client is not installed\n', status=501, mimetype='text/plain')
+    return FlaskResponse(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+def trace_waterfall(spans):
+    """Lay spans out for the waterfall view: depth-first order with offsets as percentages of the trace"""
+    if not spans:
+        return [], 0.0
+    trace_start = min(s.start_us for s in spans)
+    total_ms = max((s.start_us - trace_start) / 1000 + s.duration_ms for s in spans) or 1.0
+    span_ids = {s.span_id for s in spans}
+    children = {}
+    for s in spans:
+        parent = s.parent_id if s.parent_id in span_ids else None
+        children.setdefault(parent, []).append(s)
+
+    rows = []
+    def visit(parent, depth):
+        for s in children.get(parent, []):
+            offset_ms = (s.start_us - trace_start) / 1000
+            rows.append({**s.to_dict(), 'depth': depth, 'offset_ms': round(offset_ms, 3),
+                         'left_pct': round(100 * offset_ms / total_ms, 2),
+                         'width_pct': round(max(100 * s.duration_ms / total_ms, 0.2), 2)})
+            visit(s.span_id, depth + 1)
+    visit(None, 0)
+    return rows, total_ms
+
+@app.route('/debug/trace/<int:query_id>')
+def debug_trace(query_id):
+    """Waterfall of the traced spans of a past search"""
+    query = db.session.get(Query, query_id)
+    if query is None:
+        return jsonify({'error': 'Query not found'}), 404
+    spans, total_ms = trace_waterfall(get_trace_spans(query.trace_id) if query.trace_id else [])
+    if wants_json() or request.accept_mimetypes.best == 'application/json':
+        return jsonify({'query_id': query.id, 'trace_id': query.trace_id,
+                        'duration_ms': round(total_ms, 3), 'spans': spans})
+    return render_template('trace.html', query=query, spans=spans, total_ms=total_ms)
+
+def require_api_token(view):
+    """Only serve view to requests with Authorization: Bearer <API_TOKEN>"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not API_TOKEN:
+            return jsonify({'success': False, 'error': 'This endpoint is disabled until API_TOKEN is set'}), 403
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {API_TOKEN}".encode()):
+            return jsonify({'success': False, 'error': 'A valid API token is required'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def wants_json():
+    return request.headers.get('Content-Type') == 'application/json' or request.is_json
+
+def wants_async():
+    """Async mode is on globally via ASYNC_SEARCH or per request via async=1 / Prefer: respond-async"""
+    if request.form.get('async', '').lower() in ('1', 'true'):
+        return True
+    if 'respond-async' in request.headers.get('Prefer', ''):
+        return True
+    return ASYNC_SEARCH
 
 @app.route('/search-case', methods=['POST'])
 def search_case():
@@ -44,59 +375,62 @@ def search_case():
                 'error': 'All fields (case type, case number, filing year) are required'
             }), 400
 
-        query = log_query(
-            case_type=case_type,
-            case_number=case_number,
-            filing_year=filing_year,
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent', ''),
-            session_id=request.cookies.get('session')
-        )
+        with stage_timer('db_logging'):
+            query = log_query(
+                case_type=case_type,
+                case_number=case_number,
+                filing_year=filing_year,
+                ip_address=request.remote_addr,
+                user_agent=request.headers.get('User-Agent', ''),
+                session_id=request.cookies.get('session')
+            )
+        set_trace_attribute('query_id', query.id)
         
+        if wants_async():
+            job = job_runner.submit(case_type, case_number, filing_year, query_id=query.id)
+            logger.info(f"Queued case search: {case_type} {case_number}/{filing_year} (Job ID: {job.id})")
+            if wants_json():
+                return jsonify({
+                    'success': True,
+                    'job_id': job.id,
+                    'status': job.status,
+                    'query_id': query.id,
+                    'status_url': url_for('get_job', job_id=job.id),
+                    'events_url': url_for('job_events', job_id=job.id)
+                }), 202
+            return redirect(url_for('view_job', job_id=job.id))
+
         logger.info(f"Searching case: {case_type} {case_number}/{filing_year} (Query ID: {query.id})")
 
-        scraper = get_scraper(use_mock=USE_MOCK_SCRAPER)
-        success, case_data, error_message = scraper.search_case(case_type, case_number, filing_year)
+        start_time = time.monotonic()
+        success, case_data, error_message, cache_hit = lookup_case(case_type, case_number, filing_year)
         
-        response_log = log_response(
-            query_id=query.id,
-            raw_html=case_data.get('raw_html', ''),
-            response_status=200 if success else 404,
-            parsed_json=json.dumps(case_data) if case_data else None,
-            case_title=case_data.get('case_title', ''),
-            petitioner=case_data.get('petitioner', ''),
-            respondent=case_data.get('respondent', ''),
-            filing_date=case_data.get('filing_date', ''),
-            next_hearing_date=case_data.get('next_hearing_date', ''),
-            latest_order=case_data.get('latest_order', ''),
-            judge_name=case_data.get('judge_name', ''),
-            court_number=case_data.get('court_number', ''),
-            case_status=case_data.get('case_status', ''),
-            pdf_link=case_data.get('pdf_link', ''),
-            scrape_success=success,
-            error_message=error_message if not success else None
-        )
+        response_log = record_search_result(query.id, success, case_data, error_message,
+                                            latency_ms=int((time.monotonic() - start_time) * 1000),
+                                            cache_hit=cache_hit)
         
         if success:
-            if request.headers.get('Content-Type') == 'application/json' or request.is_json:
+            if wants_json():
                 return jsonify({
                     'success': True,
                     'case_data': case_data,
                     'query_id': query.id,
-                    'response_id': response_log.id
+                    'response_id': response_log.id,
+                    'cached': cache_hit
                 })
 
-            return render_template('case_details.html',
-                                 case=case_data,
-                                 case_key=f"{case_type}.{case_number}.{filing_year}",
-                                 search_params={
-                                     'case_type': case_type,
-                                     'case_number': case_number,
-                                     'filing_year': filing_year
-                                 },
-                                 query_id=query.id)
+            with stage_timer('template_render'):
+                return render_template('case_details.html',
+                                     case=case_data,
+                                     case_key=f"{case_type}.{case_number}.{filing_year}",
+                                     search_params={
+                                         'case_type': case_type,
+                                         'case_number': case_number,
+                                         'filing_year': filing_year
+                                     },
+                                     query_id=query.id)
         else:
-            if request.headers.get('Content-Type') == 'application/json' or request.is_json:
+            if wants_json():
                 return jsonify({
                     'success': False,
                     'error': error_message,
@@ -110,7 +444,7 @@ def search_case():
     except Exception as e:
         logger.error(f"Error in case search: {str(e)}")
         
-        if request.headers.get('Content-Type') == 'application/json' or request.is_json:
+        if wants_json():
             return jsonify({
                 'success': False,
                 'error': 'An internal server error occurred while searching for the case'
@@ -119,92 +453,278 @@ def search_case():
         flash('An error occurred while searching for the case. Please try again.', 'error')
         return redirect(url_for('index'))
 
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Poll the status and result of an async search job"""
+    job = get_search_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    Server-Sent Events stream that pushes job status changes until it finishes
+
+    The stream holds a worker thread, so it is capped at JOB_EVENTS_TIMEOUT
+    seconds; the final timeout event tells the client to poll GET /jobs/<id>.
+    """
+    if get_search_job(job_id) is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    poll_url = url_for('get_job', job_id=job_id)
+
+    def generate():
+        last_status = None
+        deadline = time.monotonic() + JOB_EVENTS_TIMEOUT
+        while time.monotonic() < deadline:
+            db.session.expire_all()
+            job = get_search_job(job_id)
+            if job.status != last_status:
+                last_status = job.status
+                event = 'result' if job.status in ('done', 'failed') else 'status'
+                yield f"event: {event}\ndata: {json.dumps(job.to_dict())}\n\n"
+                if event == 'result':
+                    return
+            else:
+                yield ": keepalive\n\n"
+            time.sleep(1)
+        yield f"event: timeout\ndata: {json.dumps({'poll': poll_url})}\n\n"
+
+    response = FlaskResponse(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/jobs/<job_id>/view')
+def view_job(job_id):
+    """Browser view of an async search: waits for the job, then shows the case"""
+    job = get_search_job(job_id)
+    if job is None:
+        flash('Search job not found.', 'error')
+        return redirect(url_for('index'))
+
+    if job.status == 'failed':
+        flash(job.error_message or 'An error occurred while searching for the case. Please try again.', 'warning')
+        return redirect(url_for('index'))
+
+    if job.status == 'done':
+        return render_template('case_details.html',
+                             case=json.loads(job.result_json or '{}'),
+                             case_key=f"{job.case_type}.{job.case_number}.{job.filing_year}",
+                             search_params={
+                                 'case_type': job.case_type,
+                                 'case_number': job.case_number,
+                                 'filing_year': job.filing_year
+                             },
+                             query_id=job.query_id)
+
+    return render_template('job_status.html', job=job)
+
 @app.route('/search', methods=['POST'])
 def search_case_redirect():
     """Redirect old search endpoint to new API endpoint"""
     return search_case()
 
+@app.route('/api/bulk-search', methods=['POST'])
+def api_bulk_search():
+    """Look up many cases at once; results stream back as NDJSON as they complete"""
+    try:
+        cases = parse_bulk_input(request.get_data(as_text=True), request.content_type or '')
+    except BulkInputError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    if not cases:
+        return jsonify({'success': False, 'error': 'No cases supplied'}), 400
+    if len(cases) > BULK_MAX_ITEMS:
+        return jsonify({'success': False, 'error': f'At most {BULK_MAX_ITEMS} cases per request'}), 400
+
+    concurrency = min(request.args.get('concurrency', 4, type=int), BULK_MAX_CONCURRENCY)
+    logger.info(f"Bulk search of {len(cases)} cases (concurrency {concurrency})")
+
+    def search(case_type, case_number, filing_year):
+        return lookup_case(case_type, case_number, filing_year, rate_limiter=bulk_rate_limiter)
+
+    def generate():
+        for result in bulk_search(cases, search, concurrency=concurrency, retries=BULK_RETRIES):
+            yield json.dumps(result) + '\n'
+
+    return FlaskResponse(generate(), mimetype='application/x-ndjson')
+
+@app.cli.command('bulk-search')
+@click.argument('input_file', type=click.File('r'))
+@click.option('--output', '-o', type=click.File('w'), default='-', help='NDJSON output file (default: stdout)')
+@click.option('--concurrency', '-c', default=4, show_default=True, help='Lookups in flight at once')
+@click.option('--rate', default=1.0, show_default=True, help='Upstream scrapes per second (0 = unlimited)')
+@click.option('--retries', default=BULK_RETRIES, show_default=True, help='Retries per case on transient errors')
+def bulk_search_command(input_file, output, concurrency, rate, retries):
+    """Look up every case in a CSV or JSON file and write NDJSON results."""
+    try:
+        cases = parse_bulk_input(input_file.read(), 'json' if input_file.name.endswith('.json') else '')
+    except BulkInputError as e:
+        raise click.ClickException(str(e))
+
+    rate_limiter = RateLimiter(rate=rate)
+    found = 0
+
+    def search(case_type, case_number, filing_year):
+        return lookup_case(case_type, case_number, filing_year, rate_limiter=rate_limiter)
+
+    for result in bulk_search(cases, search, concurrency=concurrency, retries=retries):
+        found += result['success']
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+
+    click.echo(f"Looked up {len(cases)} cases, {found} found", err=True)
+
+@app.cli.command('migrate-html')
+@click.option('--scraper-db', default='court_scraper.db', show_default=True, help='Scraper log database to migrate')
+@click.option('--vacuum/--no-vacuum', default=True, show_default=True, help='Reclaim space in the scraper database')
+def migrate_html_command(scraper_db, vacuum):
+    """Move inline raw_html from existing databases into the html_blobs store."""
+    moved = migrate_inline_html()
+    click.echo(f"responses: moved {moved} rows to html_blobs")
+
+    if os.path.exists(scraper_db):
+        result = migrate_sqlite_html(scraper_db, vacuum=vacuum)
+        click.echo(f"{scraper_db}: moved {result['rows']} rows ({result['inline_bytes']} bytes inline) "
+                   f"into {result['blobs']} blobs ({result['blob_bytes']} bytes)")
+
+def load_dossier(case_type, case_number, filing_year):
+    """Dossier from every recorded version of the case, falling back to the demo data"""
+    case_key = f"{case_type}.{case_number}.{filing_year}"
+    history = get_case_history(case_type, case_number, filing_year)
+    if not history and case_key in MOCK_CASES:
+        history = [(None, MOCK_CASES[case_key])]
+    return build_dossier(case_key, history) if history else None
+
+@app.route('/api/cases/<case_key>')
+def api_case(case_key):
+    """Current state of a case from its canonical row, with its most recent field changes"""
+    parts = case_key.rsplit('.', 2)
+    case = get_case(*parts) if len(parts) == 3 else None
+    if case is None:
+        return jsonify({'error': 'Case has not been scraped'}), 404
+    limit = min(max(request.args.get('changes', 20, type=int), 0), 500)
+    return jsonify({
+        **case.to_dict(),
+        'changes': [change.to_dict() for change in get_case_changes(case.case_key, limit=limit)] if limit else []
+    })
+
+@app.route('/api/watchlist', methods=['GET'])
+def api_watchlist():
+    """Watched cases, next refresh due first"""
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    return jsonify({
+        'cases': [watched.to_dict() for watched in get_watchlist(limit=limit, offset=offset)],
+        'scheduler': refresh_scheduler.stats()
+    })
+
+@app.route('/api/watchlist', methods=['POST'])
+@require_api_token
+def api_watch_cases():
+    """Add cases to the watchlist (same JSON or CSV body as /api/bulk-search)"""
+    try:
+        cases = parse_bulk_input(request.get_data(as_text=True), request.content_type or '')
+    except BulkInputError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not cases:
+        return jsonify({'success': False, 'error': 'No cases supplied'}), 400
+    added = add_to_watchlist(cases)
+    return jsonify({'success': True, 'added': added, 'already_watched': len(cases) - added}), 201
+
+@app.route('/api/watchlist/<case_key>', methods=['DELETE'])
+@require_api_token
+def api_unwatch_case(case_key):
+    parts = case_key.rsplit('.', 2)
+    if len(parts) != 3 or not remove_from_watchlist(normalize_case_key(*parts)):
+        return jsonify({'success': False, 'error': 'Case is not on the watchlist'}), 404
+    return jsonify({'success': True})
+
+@app.cli.command('refresh-watchlist')
+@click.option('--loop', is_flag=True, help='Keep refreshing in the foreground instead of exiting when nothing is due')
+@click.option('--limit', type=int, default=None, help='Refresh at most this many due cases')
+def refresh_watchlist_command(loop, limit):
+    """Re-scrape watched cases that are due, paced by WATCHLIST_DAILY_BUDGET."""
+    if loop:
+        refresh_scheduler.run_forever()
+        return
+    refresh_scheduler.run_pending(limit=limit)
+    click.echo(f"Refreshed {refresh_scheduler.refreshed} cases, {refresh_scheduler.failed} failed")
+
+@app.route('/api/webhooks', methods=['GET'])
+@require_api_token
+def api_webhooks():
+    return jsonify({
+        'subscriptions': [subscription.to_dict() for subscription in get_webhook_subscriptions()],
+        'dispatcher': webhook_dispatcher.stats()
+    })
+
+@app.route('/api/webhooks', methods=['POST'])
+@require_api_token
+def api_subscribe_webhook():
+    """
+    Subscribe a URL to changes of one case (case_key) or of every case
+
+    A subscribed case is added to the watchlist so the scheduler keeps
+    scraping it. The signing secret is only returned here.
+    """
+    payload = request.get_json(silent=True) or {}
+    url = str(payload.get('url', '')).strip()
+    if not is_deliverable_url(url, WEBHOOK_ALLOWED_HOSTS):
+        error = (f"url must be an http(s) URL on {', '.join(WEBHOOK_ALLOWED_HOSTS)}" if WEBHOOK_ALLOWED_HOSTS
+                 else 'url must be an http(s) URL whose host resolves to public addresses only')
+        return jsonify({'success': False, 'error': error}), 400
+
+    fields = payload.get('fields') or list(WEBHOOK_FIELDS)
+    if not isinstance(fields, list) or any(field not in CASE_COLUMNS for field in fields):
+        return jsonify({'success': False, 'error': f"fields must be a list of: {', '.join(CASE_COLUMNS)}"}), 400
+
+    case_key = None
+    if payload.get('case_key'):
+        parts = str(payload['case_key']).rsplit('.', 2)
+        if len(parts) != 3:
+            return jsonify({'success': False, 'error': 'case_key must look like W.P.(C).15234.2024'}), 400
+        case_key = normalize_case_key(*parts)
+        add_to_watchlist([{'case_type': parts[0], 'case_number': parts[1], 'filing_year': parts[2]}])
+
+    secret = str(payload.get('secret') or secrets.token_hex(32))
+    subscription = create_webhook_subscription(url, secret, case_key=case_key, fields=fields)
+    return jsonify({'success': True, **subscription.to_dict(), 'secret': secret}), 201
+
+@app.route('/api/webhooks/<int:subscription_id>', methods=['DELETE'])
+@require_api_token
+def api_unsubscribe_webhook(subscription_id):
+    if not deactivate_webhook_subscription(subscription_id):
+        return jsonify({'success': False, 'error': 'No active subscription with that id'}), 404
+    return jsonify({'success': True})
+
+@app.cli.command('dispatch-webhooks')
+@click.option('--loop', is_flag=True, help='Keep delivering in the foreground every WEBHOOK_DISPATCH_INTERVAL')
+def dispatch_webhooks_command(loop):
+    """Deliver pending case change notifications to webhook subscribers."""
+    if loop:
+        webhook_dispatcher.run_forever()
+        return
+    delivered = webhook_dispatcher.run_pending()
+    click.echo(f"Delivered {delivered} notifications")
+
 @app.route('/download_pdf/<case_key>')
 def download_pdf(case_key):
-    """Generate and download a mock PDF for the case"""
+    """Download the case dossier PDF, rendering it only when the case data has changed"""
     try:
-        case_data = MOCK_CASES.get(case_key)
-        if not case_data:
+        parts = case_key.rsplit('.', 2)
+        dossier = load_dossier(*parts) if len(parts) == 3 else None
+        if not dossier:
             flash('Case not found for PDF generation.', 'error')
             return redirect(url_for('index'))
 
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(50, height - 50, "DELHI HIGH COURT")
-        p.drawString(50, height - 70, "CASE ORDER/JUDGMENT")
-
-        p.setFont("Helvetica", 12)
-        y_position = height - 120
-        
-        p.drawString(50, y_position, f"Case Number: {case_data['case_number']}")
-        y_position -= 20
-        p.drawString(50, y_position, f"Case Type: {case_data['case_type']}")
-        y_position -= 20
-        p.drawString(50, y_position, f"Filing Date: {case_data['filing_date']}")
-        y_position -= 20
-        p.drawString(50, y_position, f"Next Hearing: {case_data['next_hearing_date']}")
-        y_position -= 40
-
-        p.setFont("Helvetica-Bold", 12)
-        p.drawString(50, y_position, "PARTIES:")
-        y_position -= 20
-        
-        p.setFont("Helvetica", 10)
-        p.drawString(50, y_position, f"Petitioner: {case_data['petitioner']}")
-        y_position -= 15
-        p.drawString(50, y_position, f"Respondent: {case_data['respondent']}")
-        y_position -= 30
-
-        p.setFont("Helvetica-Bold", 12)
-        p.drawString(50, y_position, "LATEST ORDER:")
-        y_position -= 20
-        
-        p.setFont("Helvetica", 10)
-        order_text = case_data['latest_order']
-        
-        max_width = width - 100
-        words = order_text.split()
-        lines = []
-        current_line = []
-        
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            if p.stringWidth(test_line, "Helvetica", 10) < max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        for line in lines:
-            p.drawString(50, y_position, line)
-            y_position -= 15
-            if y_position < 50:
-                break
-
-        p.setFont("Helvetica", 8)
-        p.drawString(50, 30, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        p.drawString(50, 20, "This is a system-generated document from Delhi High Court Case Management System")
-        
-        p.save()
-        buffer.seek(0)
-        
-        response = make_response(buffer.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename=case_{case_key.replace(".", "_")}.pdf'
-        
-        logger.info(f"PDF generated for case: {case_key}")
+        path = dossier_builder.build(dossier, timeout=PDF_BUILD_TIMEOUT)
+        response = send_file(path, mimetype='application/pdf', as_attachment=True,
+                             download_name=f'case_{case_key.replace(".", "_")}.pdf',
+                             etag=os.path.basename(path)[:-4], conditional=True)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
         return response
         
     except Exception as e:
@@ -212,36 +732,291 @@ def download_pdf(case_key):
         flash('An error occurred while generating the PDF. Please try again.', 'error')
         return redirect(url_for('index'))
 
+def load_dossiers(cases):
+    """Dossiers for a list of case rows, plus the keys of cases with no data"""
+    dossiers, missing = [], []
+    for case in cases:
+        dossier = load_dossier(case['case_type'], case['case_number'], case['filing_year'])
+        if dossier:
+            dossiers.append(dossier)
+        else:
+            missing.append(f"{case['case_type']}.{case['case_number']}.{case['filing_year']}")
+    return dossiers, missing
+
+@app.route('/api/dossiers/export', methods=['POST'])
+def export_dossiers():
+    """Zip of dossier PDFs for a CSV/JSON case list, streamed as each PDF is built"""
+    try:
+        cases = parse_bulk_input(request.get_data(as_text=True), request.content_type or '')
+    except BulkInputError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    if not cases:
+        return jsonify({'success': False, 'error': 'No cases supplied'}), 400
+    if len(cases) > BULK_MAX_ITEMS:
+        return jsonify({'success': False, 'error': f'At most {BULK_MAX_ITEMS} cases per request'}), 400
+
+    dossiers, missing = load_dossiers(cases)
+    logger.info(f"Exporting {len(dossiers)} dossiers ({len(missing)} cases without data)")
+    response = FlaskResponse(stream_dossier_zip(dossier_builder, dossiers, missing), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename=dossiers.zip'
+    return response
+
+@app.cli.command('export-dossiers')
+@click.argument('input_file', type=click.File('r'))
+@click.option('--output', '-o', type=click.File('wb'), required=True, help='Zip file to write')
+def export_dossiers_command(input_file, output):
+    """Build dossier PDFs for every case in a CSV or JSON file into one zip."""
+    try:
+        cases = parse_bulk_input(input_file.read(), 'json' if input_file.name.endswith('.json') else '')
+    except BulkInputError as e:
+        raise click.ClickException(str(e))
+
+    dossiers, missing = load_dossiers(cases)
+    for chunk in stream_dossier_zip(dossier_builder, dossiers, missing):
+        output.write(chunk)
+    click.echo(f"Exported {len(dossiers)} dossiers, {len(missing)} cases without data", err=True)
+
+@app.route('/documents/mirror')
+def mirror_document():
+    """Mirror a court PDF locally (downloaded once, then revalidated) and redirect to the copy"""
+    url = request.args.get('url', '').strip()
+    if not url:
+        return jsonify({'success': False, 'error': 'url is required'}), 400
+    if not document_mirror.is_allowed(url):
+        return jsonify({'success': False, 'error': 'Only court documents can be mirrored'}), 400
+
+    try:
+        digest = document_mirror.fetch(url)
+    except DocumentError as e:
+        logger.error(str(e))
+        return jsonify({'success': False, 'error': 'Document could not be downloaded from the court website'}), 502
+
+    if wants_json() or request.accept_mimetypes.best == 'application/json':
+        return jsonify({'success': True, 'hash': digest, 'url': url_for('get_document', digest=digest)})
+    return redirect(url_for('get_document', digest=digest))
+
+@app.route('/documents/<digest>')
+def get_document(digest):
+    """Serve a mirrored document; supports Range and conditional requests"""
+    document = document_mirror.get(digest) if DOCUMENT_HASH.match(digest) else None
+    if document is None:
+        return jsonify({'success': False, 'error': 'Document not found'}), 404
+
+    response = send_file(document['path'], mimetype=document['content_type'], conditional=True,
+                         etag=digest, max_age=365 * 86400, download_name=f'{digest[:16]}.pdf')
+    response.cache_control.immutable = True
+    response.cache_control.public = True
+    return response
+
+QUERY_LOG_PAGE_SIZE = 50
+QUERY_LOG_MAX_PAGE_SIZE = 500
+
+def query_log_filters():
+    """Filters shared by the log viewer and export, from the query string"""
+    filters = {
+        'case_type': request.args.get('case_type', '').strip() or None,
+        'filing_year': request.args.get('filing_year', '').strip() or None,
+        'ip_address': request.args.get('ip', '').strip() or None
+    }
+    for name, arg in (('since', 'from'), ('until', 'to')):
+        value = request.args.get(arg, '').strip()
+        filters[name] = datetime.fromisoformat(value) if value else None
+    return filters
+
 @app.route('/query_logs')
 def view_query_logs():
     """View query logs from database (admin functionality)"""
     try:
-        queries = get_recent_queries(limit=100)
-        return render_template('query_logs.html', logs=queries)
+        filters = query_log_filters()
+        limit = min(request.args.get('limit', QUERY_LOG_PAGE_SIZE, type=int), QUERY_LOG_MAX_PAGE_SIZE)
+        logs, next_cursor = get_query_log_page(limit=max(limit, 1), cursor=request.args.get('cursor'), **filters)
+    except ValueError:
+        flash('Invalid log filter or page cursor', 'error')
+        return redirect(url_for('view_query_logs'))
     except Exception as e:
         logger.error(f"Error fetching query logs: {str(e)}")
         flash('Error loading query logs', 'error')
         return redirect(url_for('index'))
 
+    if wants_json() or request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'logs': [{**log, 'timestamp': log['timestamp'].isoformat() if log['timestamp'] else None} for log in logs],
+            'next_cursor': next_cursor
+        })
+
+    filter_args = {arg: value for arg, value in request.args.items() if arg not in ('cursor', 'format') and value}
+    return render_template('query_logs.html', logs=logs, next_cursor=next_cursor,
+                           filter_args=filter_args, case_types=CASE_TYPES)
+
+@app.route('/query_logs/export')
+def export_query_logs():
+    """Stream matching query logs as CSV or NDJSON without loading them all"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    try:
+        filters = query_log_filters()
+    except ValueError:
+        return jsonify({'error': 'from/to must be ISO 8601 timestamps'}), 400
+
+    def rows():
+        for log in iter_query_logs(**filters):
+            log['timestamp'] = log['timestamp'].isoformat() if log['timestamp'] else None
+            yield log
+
+    if export_format == 'ndjson':
+        body = (json.dumps(log) + '\n' for log in rows())
+        mimetype = 'application/x-ndjson'
+    else:
+        def csv_chunks():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=QUERY_LOG_COLUMNS)
+            writer.writeheader()
+            for log in rows():
+                writer.writerow(log)
+                if buffer.tell() > 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        body = csv_chunks()
+        mimetype = 'text/csv'
+
+    response = FlaskResponse(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=query_logs.{export_format}'
+    return response
+
+STATS_WINDOW = re.compile(r'^(\d+)([hd])$')
+
 @app.route('/api/stats')
 def api_stats():
-    """API endpoint for dashboard statistics"""
+    """
+    API endpoint for dashboard statistics
+
+    Reads the precomputed rollups. ?window=24h / 7d, or ISO 8601 from/to,
+    restricts the figures to a time range.
+    """
     try:
+        since = until = None
+        window = request.args.get('window', '').strip()
+        if window:
+            match = STATS_WINDOW.match(window)
+            if not match:
+                return jsonify({'error': 'window must look like 24h or 7d'}), 400
+            amount, unit = int(match.group(1)), match.group(2)
+            since = datetime.utcnow() - (timedelta(hours=amount) if unit == 'h' else timedelta(days=amount))
+        if request.args.get('from'):
+            since = datetime.fromisoformat(request.args['from'])
+        if request.args.get('to'):
+            until = datetime.fromisoformat(request.args['to'])
+    except ValueError:
+        return jsonify({'error': 'from/to must be ISO 8601 timestamps'}), 400
 
-        total_queries = Query.query.count()
-        successful_responses = Response.query.filter_by(scrape_success=True).count()
-        failed_responses = Response.query.filter_by(scrape_success=False).count()
-        
+    try:
+        stats = get_dashboard_stats(since, until)
         return jsonify({
-            'total_queries': total_queries,
-            'successful_responses': successful_responses,
-            'failed_responses': failed_responses,
-            'success_rate': round((successful_responses / max(total_queries, 1)) * 100, 2)
+            'total_queries': stats['searches'],
+            'successful_responses': stats['successes'],
+            'failed_responses': stats['failures'],
+            **stats,
+            'cache': case_cache.stats(),
+            'coalescing': single_flight.stats(),
+            'documents': document_mirror.stats(),
+            'watchlist': refresh_scheduler.stats(),
+            'webhooks': webhook_dispatcher.stats(),
+            'upstream': upstream_guard.stats(),
+            'scraper_pool': scraper_pool.stats()
         })
     except Exception as e:
         logger.error(f"Error getting stats: {str(e)}")
         return jsonify({'error': 'Failed to get statistics'}), 500
 
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the dashboard statistics rollups from the query and response logs."""
+    buckets = rebuild_stats()
+    click.echo(f"Rebuilt {buckets} statistics buckets")
+
+SEARCH_TEXT_PAGE_SIZE = 20
+SEARCH_TEXT_MAX_PAGE_SIZE = 100
+
+@app.cli.command('prune-traces')
+@click.option('--days', default=7, show_default=True, help='Keep spans from the last N days')
+def prune_traces_command(days):
+    """Delete stored request traces older than --days"""
+    deleted = prune_trace_spans(datetime.utcnow() - timedelta(days=days))
+    click.echo(f"Deleted {deleted} trace spans")
+
+@app.cli.command('generate-mock-cases')
+@click.option('--count', default=1000000, show_default=True, help='Synthetic cases to generate')
+@click.option('--seed', default=0, show_default=True, help='Same seed, same cases')
+@click.option('--output', default=None, help='SQLite file to write (default: MOCK_DATASET or instance/mock_cases.db)')
+def generate_mock_cases_command(count, seed, output):
+    """Write a deterministic synthetic case dataset for the mock scraper (serve it with MOCK_DATASET)."""
+    output = output or os.environ.get("MOCK_DATASET") or os.path.join(app.instance_path, "mock_cases.db")
+    start = time.monotonic()
+    written = build_dataset(output, count, seed=seed)
+    click.echo(f"Wrote {written} synthetic cases to {output} in {time.monotonic() - start:.1f}s")
+
+@app.cli.command('reset-upstream')
+def reset_upstream_command():
+    """Close the court website circuit breaker and restore the full request rate"""
+    upstream_guard.reset()
+    click.echo(f"Circuit for {upstream_guard.name} closed")
+
+@app.cli.command('rebuild-cases')
+@click.option('--batch-size', default=5000, show_default=True, help='Responses replayed per transaction')
+def rebuild_cases_command(batch_size):
+    """Rebuild the canonical cases table and its change history from the response log."""
+    cases = rebuild_cases(batch_size=batch_size)
+    click.echo(f"Rebuilt {cases} cases")
+
+@app.route('/api/search-text')
+def api_search_text():
+    """
+    Ranked full-text search over scraped case details
+
+    ?q= matches any indexed field; party, petitioner, respondent, judge,
+    order and title restrict a phrase to those fields. The last word of
+    each term is prefix-matched unless prefix=0. Paginated with page and
+    per_page; case_type and filing_year narrow the results.
+    """
+    if not fulltext_available():
+        return jsonify({'error': 'Full-text search requires the SQLite database backend'}), 501
+
+    fields = {field: request.args.get(field, '').strip() for field in FULLTEXT_FIELDS if request.args.get(field)}
+    prefix = request.args.get('prefix', '1') not in ('0', 'false', 'no')
+    match = build_fulltext_query(request.args.get('q', ''), prefix=prefix, **fields)
+    if not match:
+        return jsonify({'error': 'Provide q or one of: ' + ', '.join(FULLTEXT_FIELDS)}), 400
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', SEARCH_TEXT_PAGE_SIZE, type=int), 1), SEARCH_TEXT_MAX_PAGE_SIZE)
+    try:
+        results, has_more = search_text(match, limit=per_page, offset=(page - 1) * per_page,
+                                        case_type=request.args.get('case_type', '').strip() or None,
+                                        filing_year=request.args.get('filing_year', '').strip() or None)
+    except Exception as e:
+        logger.error(f"Error running full-text search {match!r}: {str(e)}")
+        return jsonify({'error': 'Failed to run search'}), 500
+
+    return jsonify({
+        'query': match,
+        'page': page,
+        'per_page': per_page,
+        'next_page': page + 1 if has_more else None,
+        'results': results
+    })
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Backfill the full-text search index from every stored response."""
+    if not fulltext_available():
+        raise click.ClickException("Full-text search requires the SQLite database backend")
+    rebuild_fulltext()
+    click.echo(f"Indexed {db.session.query(Response).count()} responses")
+
 @app.errorhandler(404)
 def not_found(error):
     return render_template('error.html', 
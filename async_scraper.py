@@ -0,0 +1,350 @@
+"""asyncio/httpx backend for the Delhi High Court scraper
+
+AsyncDelhiHighCourtScraper follows the same flow as DelhiHighCourtScraper:
+session warm-up, search-page GET, form extraction, search POST and result
+parsing. It reuses the same setup, parsing and form-building helpers and
+the same form-state cache, so a warm client submits searches directly. One instance
+shares a pooled, HTTP/2-capable httpx.AsyncClient across all tasks, so
+hundreds of lookups can be in flight on a single event loop under one
+global rate limit.
+"""
+import asyncio
+import contextvars
+import hashlib
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from html_parsing import parse_html
+from metrics import async_backoff_sleep, record_retry, record_upstream, record_upstream_throttle, stage_timer
+from ratelimit import AsyncRateLimiter
+from scraper import (CASE_NOT_FOUND_ERROR, FORM_REJECTED_STATUSES, NOT_FOUND_PHRASES, DelhiHighCourtScraper,
+                     FormState)
+from tracing import span
+from upstream import UPSTREAM_UNAVAILABLE_ERROR, UpstreamUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Each task gets its own query ID; the sync scraper keeps it on the instance
+_current_query_id = contextvars.ContextVar('current_query_id', default=None)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class AsyncDelhiHighCourtScraper(DelhiHighCourtScraper):
+    """Non-blocking scraper for many concurrent lookups"""
+
+    def __init__(self, db_path: str = "court_scraper.db", write_behind_logging: Optional[bool] = None,
+                 base_url: Optional[str] = None, rate_limiter: Optional[AsyncRateLimiter] = None,
+                 max_connections: int = 100, timeout: float = 30.0, http2: bool = True):
+        self._init_common(db_path, write_behind_logging, base_url)
+        self.rate_limiter = rate_limiter or AsyncRateLimiter(rate=0)
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            http2=http2 and HTTP2_AVAILABLE,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections)
+        )
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+
+    @property
+    def current_query_id(self):
+        return _current_query_id.get()
+
+    @current_query_id.setter
+    def current_query_id(self, query_id):
+        _current_query_id.set(query_id)
+
+    async def __aenter__(self):
+        await self._initialize_session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def refresh_session(self) -> bool:
+        """Drop the client's cookies and cached form, then warm the session up again"""
+        async with self._init_lock:
+            self.client.cookies.clear()
+            self.invalidate_form_state()
+            self._initialized = False
+        return await self._initialize_session()
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        await self.rate_limiter.acquire()
+        # The guard runs SQLite transactions shared with other processes; keep them off the event loop
+        wait = await asyncio.to_thread(self.upstream.reserve)
+        if wait > 0:
+            record_upstream_throttle(wait)
+            with span('upstream.throttle', seconds=wait):
+                await asyncio.sleep(wait)
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            await asyncio.to_thread(self.upstream.record_failure, type(e).__name__)
+            raise
+        await asyncio.to_thread(self.upstream.record_response, response.status_code,
+                                response.headers.get('Retry-After'))
+        return response
+
+    async def _initialize_session(self):
+        """Visit the main page once to pick up cookies and tokens"""
+        async with self._init_lock:
+            if self._initialized:
+                return True
+            try:
+                with stage_timer('session_init'):
+                    response = await self._request('GET', self.base_url)
+                record_upstream('session_init', response.status_code)
+                logger.info(f"Async session initialized. Status: {response.status_code}")
+                self._initialized = True
+                return True
+            except Exception as e:
+                record_upstream('session_init', type(e).__name__)
+                logger.error(f"Failed to initialize async session: {str(e)}")
+                return False
+
+    async def _solve_captcha_async(self, captcha_url: str) -> Optional[str]:
+        """Download the CAPTCHA without blocking, then OCR it in a worker thread"""
+        logger.info(f"Attempting to solve CAPTCHA: {captcha_url}")
+        start_time = time.time()
+        try:
+            response = await self._request('GET', captcha_url)
+        except Exception as e:
+            logger.error(f"Error solving CAPTCHA: {str(e)}")
+            return None
+        if response.status_code != 200:
+            return None
+
+        ocr_result, confidence = await asyncio.to_thread(
+            self._ocr_captcha_image, response.content, captcha_url, start_time)
+        if ocr_result and confidence >= self.captcha_config['confidence_threshold']:
+            return ocr_result
+
+        service_result = self._solve_captcha_with_service(captcha_url)
+        if service_result:
+            return service_result
+
+        if ocr_result:
+            logger.warning(f"Using low-confidence OCR result: {ocr_result} (confidence: {confidence:.2f})")
+            return ocr_result
+
+        logger.error("Failed to solve CAPTCHA with all methods")
+        return None
+
+    async def _load_search_form_async(self) -> Tuple[Optional[FormState], str]:
+        """Async counterpart of DelhiHighCourtScraper._load_search_form"""
+        self.form_state_misses += 1
+        step_start = time.time()
+        with stage_timer('search_page_get'):
+            response = await self._request('GET', self.case_search_url)
+        record_upstream('search_page', response.status_code)
+
+        with stage_timer('scraper_logging'):
+            await asyncio.to_thread(
+                self.logger.log_response,
+                self.current_query_id, self.case_search_url, 'GET',
+                self.headers, {}, response.status_code,
+                dict(response.headers), response.text,
+                processing_time=int((time.time() - step_start) * 1000)
+            )
+
+        if response.status_code != 200:
+            error_msg = f"Failed to load search page. Status: {response.status_code}"
+            logger.error(error_msg)
+            return None, error_msg
+
+        with stage_timer('form_extraction'):
+            doc = parse_html(response.text)
+            form_data = self._extract_form_data(doc)
+            captcha_url = self._get_captcha_image(doc)
+            search_url, method = self._form_target(doc)
+
+        captcha_solution = None
+        if captcha_url:
+            logger.info(f"CAPTCHA detected: {captcha_url}")
+            with stage_timer('captcha'):
+                captcha_solution = await self._solve_captcha_async(captcha_url)
+            if not captcha_solution:
+                logger.warning("Failed to solve CAPTCHA, attempting search anyway")
+                captcha_solution = ""
+
+        form_state = FormState(form_data, search_url, method, captcha_required=captcha_url is not None,
+                               captcha_solution=captcha_solution)
+        if captcha_url is None and self.form_state_ttl > 0:
+            self._form_state = form_state
+        return form_state, ""
+
+    async def _submit_search_async(self, form_state: FormState, case_type: str, case_number: str,
+                                   filing_year: str) -> httpx.Response:
+        """Async counterpart of DelhiHighCourtScraper._submit_search"""
+        search_data = self._search_payload(form_state.form_data, case_type, case_number, filing_year,
+                                           form_state.captcha_solution)
+        search_headers = self._search_headers()
+        search_start = time.time()
+        with stage_timer('search_post'):
+            if form_state.method == 'POST':
+                search_response = await self._request('POST', form_state.url, data=search_data,
+                                                      headers=search_headers)
+            else:
+                search_response = await self._request('GET', form_state.url, params=search_data,
+                                                      headers=search_headers)
+        record_upstream('search_submit', search_response.status_code)
+
+        with stage_timer('scraper_logging'):
+            await asyncio.to_thread(
+                self.logger.log_response,
+                self.current_query_id, form_state.url, form_state.method,
+                {**self.headers, **search_headers}, search_data,
+                search_response.status_code, dict(search_response.headers),
+                search_response.text, processing_time=int((time.time() - search_start) * 1000)
+            )
+        return search_response
+
+    async def search_case(self, case_type: str, case_number: str, filing_year: str,
+                          max_retries: int = 3, ip_address: str = None,
+                          user_agent: str = None) -> Tuple[bool, Dict, str]:
+        """
+        Async counterpart of DelhiHighCourtScraper.search_case
+
+        Returns:
+            Tuple[bool, Dict, str]: (success, case_data, error_message)
+        """
+        await self._initialize_session()
+
+        session_id = hashlib.md5(f"{time.time()}".encode()).hexdigest()[:8]
+        # SQLite logging commits (log_query always, the rest unless write-behind) run in a worker thread
+        self.current_query_id = await asyncio.to_thread(
+            self.logger.log_query, case_type, case_number, filing_year, ip_address, user_agent, session_id
+        )
+
+        start_time = time.time()
+
+        for attempt in range(max_retries):
+            try:
+                logger.info(f"Searching case: {case_type} {case_number}/{filing_year} (Attempt {attempt + 1}/{max_retries})")
+
+                form_state = self._cached_form_state()
+                reused = form_state is not None
+                if form_state is None:
+                    form_state, error_msg = await self._load_search_form_async()
+                    if form_state is None:
+                        if attempt == max_retries - 1:
+                            return False, {}, error_msg
+                        record_retry('search_page_status')
+                        continue
+
+                search_response = await self._submit_search_async(form_state, case_type, case_number, filing_year)
+
+                if reused and search_response.status_code in FORM_REJECTED_STATUSES:
+                    logger.info(f"Cached search form rejected (status {search_response.status_code}), reloading it")
+                    self.invalidate_form_state()
+                    form_state, error_msg = await self._load_search_form_async()
+                    if form_state is None:
+                        if attempt == max_retries - 1:
+                            return False, {}, error_msg
+                        record_retry('search_page_status')
+                        continue
+                    search_response = await self._submit_search_async(form_state, case_type, case_number,
+                                                                      filing_year)
+
+                captcha_required = form_state.captcha_required
+                captcha_solution = form_state.captcha_solution
+
+                if search_response.status_code == 200:
+                    with stage_timer('parse'):
+                        case_data = self._parse_case_details(search_response.text)
+
+                    if case_data:
+                        total_time = int((time.time() - start_time) * 1000)
+                        logger.info(f"Successfully found case data in {total_time}ms")
+                        await asyncio.to_thread(
+                            self.logger.update_query_result,
+                            self.current_query_id, True, total_time,
+                            captcha_required=captcha_required,
+                            captcha_solved=captcha_solution is not None
+                        )
+                        return True, case_data, ""
+
+                    if any(phrase in search_response.text.lower() for phrase in NOT_FOUND_PHRASES):
+                        logger.info(CASE_NOT_FOUND_ERROR)
+                        return False, {}, CASE_NOT_FOUND_ERROR
+
+                    logger.warning("No case data found, but no explicit error message")
+                    self.invalidate_form_state()
+                    if attempt < max_retries - 1:
+                        await async_backoff_sleep(2 ** attempt, 'no_case_data')
+                        continue
+                else:
+                    error_msg = f"Search request failed. Status: {search_response.status_code}"
+                    logger.error(error_msg)
+                    self.invalidate_form_state()
+                    if attempt < max_retries - 1:
+                        await async_backoff_sleep(2 ** attempt, 'search_status')
+                        continue
+                    return False, {}, error_msg
+
+            except UpstreamUnavailableError as e:
+                logger.warning(f"Not searching, court website unavailable: {str(e)}")
+                record_upstream('search', 'rejected')
+                await asyncio.to_thread(
+                    self.logger.update_query_result,
+                    self.current_query_id, False, int((time.time() - start_time) * 1000),
+                    error_message=str(e)
+                )
+                return False, {}, UPSTREAM_UNAVAILABLE_ERROR
+
+            except httpx.TimeoutException:
+                error_msg = "Request timeout - court website may be slow"
+                logger.error(error_msg)
+                record_upstream('search', 'timeout')
+                if attempt < max_retries - 1:
+                    await async_backoff_sleep(5, 'timeout')
+                    continue
+                return False, {}, error_msg
+
+            except httpx.TransportError:
+                error_msg = "Connection error - court website may be down"
+                logger.error(error_msg)
+                record_upstream('search', 'connection_error')
+                if attempt < max_retries - 1:
+                    await async_backoff_sleep(10, 'connection_error')
+                    continue
+                return False, {}, error_msg
+
+            except Exception as e:
+                error_msg = f"Unexpected error during search: {str(e)}"
+                logger.error(error_msg, exc_info=True)
+                if attempt < max_retries - 1:
+                    await async_backoff_sleep(2 ** attempt, 'error')
+                    continue
+                return False, {}, error_msg
+
+        total_time = int((time.time() - start_time) * 1000)
+        await asyncio.to_thread(
+            self.logger.update_query_result,
+            self.current_query_id, False, total_time, error_message="Max retries exceeded"
+        )
+        return False, {}, "Failed to search case after multiple attempts"
+
+    async def search_many(self, cases: Iterable[Tuple[str, str, str]],
+                          concurrency: int = 100) -> List[Tuple[bool, Dict, str]]:
+        """Look up many (case_type, case_number, filing_year) tuples, at most `concurrency` at once"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(case):
+            async with semaphore:
+                return await self.search_case(*case)
+
+        return await asyncio.gather(*(run(case) for case in cases))
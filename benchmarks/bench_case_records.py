@@ -0,0 +1,96 @@
+"""Memory and serialization cost of case dicts versus CaseRecord
+
+Loads --count synthetic cases (see synthetic_cases.py) from their JSON, as
+the case cache does, once as plain dicts and once as CaseRecords, and
+reports the memory each set holds (tracemalloc) and the load time. Then
+times the JSON work done per logged search: the old dumps/loads/dumps
+round trip against a record's single to_json(), plus msgpack when it is
+installed.
+
+    python benchmarks/bench_case_records.py [--count 1000000] [--seed 0] [--json out.json]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from case_record import CaseRecord, dumps_json, msgpack, orjson  # noqa: E402
+from synthetic_cases import generate_cases  # noqa: E402
+
+def measure_load(load, texts):
+    """(bytes held by the loaded objects, seconds) for load(text) over every text"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    loaded = [load(text) for text in texts]
+    seconds = time.perf_counter() - start
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del loaded
+    return held, seconds
+
+def time_per_call(fn, items, repeat=3):
+    """Best-of-repeat microseconds per fn(item)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best / len(items) * 1e6, 2)
+
+def legacy_round_trip(case_data):
+    # record_search_result dumped the dict, log_response parsed it back and update_case dumped it again
+    json.dumps(case_data)
+    json.dumps(json.loads(json.dumps(case_data)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--count', type=int, default=1000000, help='Cases to load')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    texts = [json.dumps(case) for case in generate_cases(args.count, args.seed)]
+    dict_bytes, dict_seconds = measure_load(json.loads, texts)
+    record_bytes, record_seconds = measure_load(CaseRecord.from_json, texts)
+    print(f"{args.count} cases loaded from JSON (orjson {'on' if orjson else 'off'})")
+    print(f"  dict        {dict_bytes / 2 ** 20:8.1f} MiB  {dict_seconds:6.2f} s")
+    print(f"  CaseRecord  {record_bytes / 2 ** 20:8.1f} MiB  {record_seconds:6.2f} s  "
+          f"({100 * record_bytes / dict_bytes:.0f}% of the dict footprint)")
+
+    sample = [json.loads(text) for text in texts[:20000]]
+    del texts
+    timings = {
+        'legacy_dumps_loads_dumps': time_per_call(legacy_round_trip, sample),
+        'record_to_json': time_per_call(lambda case: CaseRecord.from_dict(case).to_json(), sample),
+        'json_dumps': time_per_call(json.dumps, sample),
+        'dumps_json': time_per_call(dumps_json, sample)
+    }
+    if msgpack is not None:
+        timings['msgpack_pack'] = time_per_call(lambda case: CaseRecord.from_dict(case).to_msgpack(), sample)
+    print("Serialization per logged search (us)")
+    for name, micros in timings.items():
+        print(f"  {name:26} {micros:8.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'count': args.count,
+                'seed': args.seed,
+                'orjson': orjson is not None,
+                'msgpack': msgpack is not None,
+                'memory_bytes': {'dict': dict_bytes, 'case_record': record_bytes},
+                'load_seconds': {'dict': round(dict_seconds, 3), 'case_record': round(record_seconds, 3)},
+                'serialize_us': timings
+            }, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Measure scraper log database growth per N searches
+
+Logs the search-page GET and result-page POST of each simulated search
+into two fresh databases: one with HTML inline in scraper_responses (the
+previous layout) and one through SQLiteLogger's html_blobs store.
+
+    python benchmarks/bench_html_storage.py [--searches 1000]
+"""
+import argparse
+import json
+import os
+import secrets
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import SQLiteLogger  # noqa: E402
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+
+def load_page(name):
+    with open(os.path.join(PAGES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+def simulated_pages(searches):
+    """Search pages differ only in their tokens; result pages differ per case"""
+    search_page = load_page('search_page.html')
+    result_page = load_page('result_page.html')
+    for i in range(searches):
+        viewstate = secrets.token_urlsafe(96)
+        yield (search_page.replace('value="/wEPDw', f'value="/wEPDw{viewstate}', 1),
+               result_page.replace('15234', str(10000 + i)))
+
+def log_inline(db_path, pages):
+    """The previous layout: every response row carries its own raw_html"""
+    sqlite_logger = SQLiteLogger(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute('ALTER TABLE scraper_responses ADD COLUMN inline_html TEXT')
+    for i, (search_html, result_html) in enumerate(pages):
+        query_id = sqlite_logger.log_query('W.P.(C)', str(10000 + i), '2024')
+        for method, html in (('GET', search_html), ('POST', result_html)):
+            conn.execute('INSERT INTO scraper_responses (query_id, timestamp, request_url, request_method, '
+                         'raw_html, html_hash) VALUES (?, ?, ?, ?, ?, ?)',
+                         (query_id, datetime.now().isoformat(), 'https://example.com', method, html, ''))
+        conn.commit()
+    conn.close()
+    sqlite_logger.close()
+
+def log_blobs(db_path, pages):
+    sqlite_logger = SQLiteLogger(db_path)
+    for i, (search_html, result_html) in enumerate(pages):
+        query_id = sqlite_logger.log_query('W.P.(C)', str(10000 + i), '2024')
+        sqlite_logger.log_response(query_id, 'https://example.com', 'GET', {}, {}, 200, {}, search_html)
+        sqlite_logger.log_response(query_id, 'https://example.com', 'POST', {}, {}, 200, {}, result_html)
+    sqlite_logger.close()
+
+def database_size(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.execute('VACUUM')
+    conn.close()
+    return os.path.getsize(db_path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--searches', type=int, default=1000)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    pages = list(simulated_pages(args.searches))
+    workdir = tempfile.mkdtemp()
+    results = {'searches': args.searches, 'bytes': {}}
+    for name, log in (('inline', log_inline), ('blobs', log_blobs)):
+        db_path = os.path.join(workdir, f'{name}.db')
+        log(db_path, pages)
+        results['bytes'][name] = database_size(db_path)
+
+    inline, blobs = results['bytes']['inline'], results['bytes']['blobs']
+    print(f"inline raw_html: {inline / 1024:10.1f} KiB per {args.searches} searches")
+    print(f"html_blobs:      {blobs / 1024:10.1f} KiB per {args.searches} searches ({inline / blobs:.1f}x smaller)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
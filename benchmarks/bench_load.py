@@ -0,0 +1,241 @@
+"""Load benchmark of the scrape path against a local stub of the court site
+
+Drives DelhiHighCourtScraper and the Flask app (served over HTTP in this
+process, scraping the stub with the result cache off) against
+stub_court.py, and MockScraper on its own, from concurrent threads. Reports
+p50/p95/p99 latency, requests/sec, database growth and memory per target;
+--json writes the results and --baseline compares them with an earlier
+run's file.
+
+    python benchmarks/bench_load.py [--targets scraper,mock,app] [--requests 200] [--concurrency 8]
+                                    [--latency 0.05] [--error-rate 0] [--mock-latency 0]
+                                    [--json out.json] [--baseline old.json]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import DelhiHighCourtScraper, MockScraper, close_sqlite_loggers  # noqa: E402
+from stub_court import start_stub_court  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+TARGETS = ('scraper', 'mock', 'app')
+MOCK_CASE = ('W.P.(C)', '15234', '2024')
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def current_rss_kib():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def peak_rss_kib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+
+def database_bytes(*paths):
+    """Size of SQLite databases including their WAL files"""
+    return sum(os.path.getsize(path + suffix) for path in paths for suffix in ('', '-wal')
+               if os.path.exists(path + suffix))
+
+def run_load(call, requests_total, concurrency):
+    """Run call(i) for i in range(requests_total) on concurrency threads; returns (latencies_ms, errors, seconds)"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            ok = call(i)
+        except Exception:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors[0] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(requests_total)))
+    return latencies, errors[0], time.perf_counter() - start
+
+def summarize(latencies, errors, seconds, concurrency, db_growth, rss_before):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'errors': errors,
+        'duration_s': round(seconds, 3),
+        'requests_per_sec': round(len(latencies) / seconds, 2) if seconds else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'mean': round(sum(latencies) / len(latencies), 2),
+            'max': round(latencies[-1], 2)
+        },
+        'db_growth_bytes': db_growth,
+        'rss_kib': {'before': rss_before, 'after': current_rss_kib(), 'peak': peak_rss_kib()}
+    }
+
+def bench_scraper(args, stub, workdir):
+    """DelhiHighCourtScraper against the stub, one scraper (and HTTP session) per worker thread"""
+    db_path = os.path.join(workdir, 'bench_scraper.db')
+    scrapers = queue.Queue()
+    for _ in range(args.concurrency):
+        scrapers.put(DelhiHighCourtScraper(db_path, base_url=stub.base_url))
+    size_before, rss_before = database_bytes(db_path), current_rss_kib()
+
+    def call(i):
+        scraper = scrapers.get()
+        try:
+            return scraper.search_case('W.P.(C)', str(100000 + i), '2024', max_retries=args.retries)[0]
+        finally:
+            scrapers.put(scraper)
+
+    latencies, errors, seconds = run_load(call, args.requests, args.concurrency)
+    close_sqlite_loggers()
+    return summarize(latencies, errors, seconds, args.concurrency,
+                     database_bytes(db_path) - size_before, rss_before)
+
+def bench_mock(args, stub, workdir):
+    """MockScraper on its own (no stub, no database)"""
+    scraper = MockScraper(latency=args.mock_latency)
+    rss_before = current_rss_kib()
+    latencies, errors, seconds = run_load(lambda i: scraper.search_case(*MOCK_CASE)[0],
+                                          args.requests, args.concurrency)
+    return summarize(latencies, errors, seconds, args.concurrency, 0, rss_before)
+
+def bench_app(args, stub, workdir):
+    """POST /search-case to the Flask app served over HTTP, scraping the stub on every request"""
+    from werkzeug.serving import make_server
+
+    app_db = os.path.join(workdir, 'bench_app.db')
+    scraper_db = os.path.join(workdir, 'court_scraper.db')  # the app's scrapers log to the working directory
+    os.environ.update({'DATABASE_URL': f'sqlite:///{app_db}', 'USE_MOCK_SCRAPER': 'false',
+                       'COURT_BASE_URL': stub.base_url, 'CASE_CACHE_BACKEND': 'none'})
+    os.chdir(workdir)
+    from app import app
+    logging.disable(logging.INFO)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-app', daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/search-case"
+    sessions = threading.local()
+    size_before, rss_before = database_bytes(app_db, scraper_db), current_rss_kib()
+
+    def call(i):
+        session = getattr(sessions, 'session', None)
+        if session is None:
+            session = sessions.session = requests.Session()
+        response = session.post(url, data={'case_type': 'W.P.(C)', 'case_number': str(200000 + i),
+                                           'filing_year': '2024'}, allow_redirects=False)
+        return response.status_code == 200
+
+    try:
+        latencies, errors, seconds = run_load(call, args.requests, args.concurrency)
+    finally:
+        server.shutdown()
+    close_sqlite_loggers()
+    return summarize(latencies, errors, seconds, args.concurrency,
+                     database_bytes(app_db, scraper_db) - size_before, rss_before)
+
+BENCHMARKS = {'scraper': bench_scraper, 'mock': bench_mock, 'app': bench_app}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(results, baseline):
+    """Print requests/sec and p95 changes against a previous results file"""
+    for target, current in results['targets'].items():
+        previous = baseline.get('targets', {}).get(target)
+        if not previous:
+            continue
+        rps_change = 100 * (current['requests_per_sec'] / previous['requests_per_sec'] - 1)
+        p95_change = 100 * (current['latency_ms']['p95'] / previous['latency_ms']['p95'] - 1)
+        print(f"{target:8} vs {baseline.get('commit') or 'baseline'}: "
+              f"{rps_change:+6.1f}% req/s, {p95_change:+6.1f}% p95")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--targets', default=','.join(TARGETS), help=f"Comma-separated subset of {', '.join(TARGETS)}")
+    parser.add_argument('--requests', type=int, default=200, help='Searches per target')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--retries', type=int, default=1, help='max_retries passed to the scraper target')
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub response latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random stub latency, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of stub responses that are HTTP 503')
+    parser.add_argument('--mock-latency', default=None,
+                        help='MOCK_LATENCY spec for the mock target, e.g. 0 or uniform:1,3 (default: MOCK_LATENCY)')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with the results JSON of an earlier run')
+    args = parser.parse_args()
+
+    targets = [target.strip() for target in args.targets.split(',') if target.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    logging.disable(logging.INFO)
+    stub = start_stub_court(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    workdir = tempfile.mkdtemp(prefix='bench_load_')
+    os.environ['UPSTREAM_STATE_DB'] = os.path.join(workdir, 'upstream_state.db')  # start with a closed circuit
+    results = {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('json', 'baseline')},
+        'targets': {}
+    }
+    for target in TARGETS:
+        if target not in targets:
+            continue
+        result = results['targets'][target] = BENCHMARKS[target](args, stub, workdir)
+        latency = result['latency_ms']
+        print(f"{target:8} {result['requests_per_sec']:8.1f} req/s  p50 {latency['p50']:8.1f} ms  "
+              f"p95 {latency['p95']:8.1f} ms  p99 {latency['p99']:8.1f} ms  errors {result['errors']:4}  "
+              f"db +{result['db_growth_bytes'] / 1024:.0f} KiB  rss {result['rss_kib']['after']} KiB")
+    results['stub'] = dict(stub.counters)
+    stub.shutdown()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""Benchmark the HTML parser backends against the original BeautifulSoup code
+
+Runs the search-page extraction (form fields, tokens, CAPTCHA) and the
+result-page parsing over every saved page in a directory. Each available
+backend's output is checked against the original implementation before it
+is timed.
+
+    python benchmarks/bench_parsing.py [pages_dir] [--iterations N]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_parsing import (available_backends, extract_case_fields, extract_data_tokens,  # noqa: E402
+                          extract_form_fields, extract_pdf_links, find_captcha_src, parse_html)
+
+BASE_URL = "https://delhihighcourt.nic.in"
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+
+def legacy_extract(html):
+    """The pre-backend scraper code: form data, CAPTCHA and case details"""
+    soup = BeautifulSoup(html, 'html.parser')
+    form_data = {}
+
+    forms = soup.find_all('form')
+    if not forms:
+        forms = soup.find_all('div', {'id': re.compile(r'.*form.*', re.I)})
+    for form in forms:
+        for inp in form.find_all('input'):
+            name = inp.get('name')
+            if name:
+                form_data[name] = inp.get('value', '')
+        for select in form.find_all('select'):
+            name = select.get('name')
+            if name:
+                selected_option = select.find('option', {'selected': True})
+                if selected_option:
+                    form_data[name] = selected_option.get('value', '')
+                else:
+                    first_option = select.find('option')
+                    if first_option:
+                        form_data[name] = first_option.get('value', '')
+    csrf_meta = soup.find('meta', {'name': re.compile(r'csrf.*token', re.I)})
+    if csrf_meta:
+        form_data['csrf_token'] = csrf_meta.get('content', '')
+    for script in soup.find_all('script'):
+        if script.string:
+            for pattern in [r'token["\']?\s*[:=]\s*["\']([^"\']+)["\']',
+                            r'csrf["\']?\s*[:=]\s*["\']([^"\']+)["\']',
+                            r'__RequestVerificationToken["\']?\s*[:=]\s*["\']([^"\']+)["\']']:
+                for match in re.findall(pattern, script.string, re.I):
+                    if len(match) > 10:
+                        form_data[f'js_token_{len(form_data)}'] = match
+    for elem in soup.find_all(attrs={'data-token': True}):
+        if elem.get('data-token'):
+            form_data['data_token'] = elem.get('data-token')
+
+    captcha_url = None
+    captcha_img = soup.find('img', {'alt': 'captcha'}) or soup.find('img', src=re.compile(r'captcha', re.I))
+    if captcha_img and captcha_img.get('src'):
+        captcha_url = urljoin(BASE_URL, captcha_img.get('src'))
+
+    case_data = {}
+    for table in soup.find_all('table'):
+        for row in table.find_all('tr'):
+            cells = row.find_all(['td', 'th'])
+            if len(cells) >= 2:
+                for i in range(0, len(cells) - 1, 2):
+                    key = cells[i].get_text(strip=True).lower()
+                    value = cells[i + 1].get_text(strip=True)
+                    if 'case' in key and 'no' in key:
+                        case_data['case_number'] = value
+                    elif 'title' in key or 'parties' in key:
+                        case_data['case_title'] = value
+                    elif 'petitioner' in key or 'appellant' in key:
+                        case_data['petitioner'] = value
+                    elif 'respondent' in key:
+                        case_data['respondent'] = value
+                    elif 'filing' in key and 'date' in key:
+                        case_data['filing_date'] = value
+                    elif 'next' in key and 'hearing' in key:
+                        case_data['next_hearing_date'] = value
+                    elif 'judge' in key:
+                        case_data['judge_name'] = value
+                    elif 'court' in key:
+                        case_data['court_number'] = value
+                    elif 'status' in key:
+                        case_data['case_status'] = value
+                    elif 'order' in key or 'judgment' in key:
+                        case_data['latest_order'] = value
+    pdf_links = soup.find_all('a', href=re.compile(r'\.pdf', re.I))
+    if pdf_links:
+        case_data['pdf_links'] = [{'url': urljoin(BASE_URL, link.get('href')), 'text': link.get_text(strip=True)}
+                                  for link in pdf_links if link.get('href')]
+        if case_data['pdf_links']:
+            case_data['pdf_link'] = case_data['pdf_links'][0]['url']
+
+    return form_data, captcha_url, case_data
+
+def backend_extract(html, backend):
+    """The same outputs through html_parsing, parsing the document once"""
+    doc = parse_html(html, backend)
+    form_data = extract_form_fields(doc)
+    data_tokens = extract_data_tokens(doc)
+    if data_tokens:
+        form_data['data_token'] = data_tokens[-1]
+
+    captcha_src = find_captcha_src(doc)
+    captcha_url = urljoin(BASE_URL, captcha_src) if captcha_src else None
+
+    case_data = extract_case_fields(doc)
+    pdf_links = [{'url': urljoin(BASE_URL, href), 'text': text} for href, text in extract_pdf_links(doc)]
+    if pdf_links:
+        case_data['pdf_links'] = pdf_links
+        case_data['pdf_link'] = pdf_links[0]['url']
+
+    return form_data, captcha_url, case_data
+
+def time_it(fn, pages, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages.values():
+            fn(html)
+    return (time.perf_counter() - start) / (iterations * len(pages)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('pages_dir', nargs='?', default=PAGES_DIR)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    pages = {}
+    for name in sorted(os.listdir(args.pages_dir)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(args.pages_dir, name), encoding='utf-8', errors='replace') as f:
+                pages[name] = f.read()
+    if not pages:
+        sys.exit(f"No .html pages found in {args.pages_dir}")
+
+    expected = {name: legacy_extract(html) for name, html in pages.items()}
+    for backend in available_backends():
+        for name, html in pages.items():
+            if backend_extract(html, backend) != expected[name]:
+                sys.exit(f"Output mismatch: backend {backend} on {name}")
+    print(f"Output identical to the original parser for {len(pages)} pages "
+          f"on backends: {', '.join(available_backends())}")
+
+    baseline = time_it(legacy_extract, pages, args.iterations)
+    results = {'pages': len(pages), 'iterations': args.iterations,
+               'ms_per_page': {'original': round(baseline, 3)}}
+    print(f"{'original (html.parser)':<24} {baseline:8.3f} ms/page")
+    for backend in available_backends():
+        elapsed = time_it(lambda html: backend_extract(html, backend), pages, args.iterations)
+        results['ms_per_page'][backend] = round(elapsed, 3)
+        print(f"{backend:<24} {elapsed:8.3f} ms/page  ({baseline / elapsed:.1f}x)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Local stand-in for the court website, replaying the recorded pages
+
+Serves benchmarks/pages/search_page.html (with fresh view-state tokens per
+request) and result_page.html (with the requested case number) with a
+configurable response latency and rate of injected server errors, so the
+scrape path can be measured without touching the real site. Case numbers
+starting with 404 get the "no record" page.
+
+    python benchmarks/stub_court.py --port 8081 --latency 0.2 --error-rate 0.05
+    COURT_BASE_URL=http://127.0.0.1:8081 USE_MOCK_SCRAPER=false python main.py
+"""
+import argparse
+import io
+import os
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from PIL import Image
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+RECORDED_CASE_NUMBER = '15234'
+NOT_FOUND_PAGE = "<html><body><div class='alert'>No record found</div></body></html>"
+CAPTCHA_MARKUP = '<img src="/app/captcha-image?id=48213" alt="captcha">'
+
+def load_page(name):
+    with open(os.path.join(PAGES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+def captcha_png():
+    buffer = io.BytesIO()
+    Image.new('L', (120, 40), color=255).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+class StubCourtHandler(BaseHTTPRequestHandler):
+    """Request handler; the serving StubCourtServer holds the configuration and counters"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, status=200, content_type='text/html; charset=utf-8'):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _delay_or_fail(self) -> bool:
+        """Sleep for the configured latency; True if this request should fail instead"""
+        court = self.server
+        court.count('requests')
+        delay = court.latency + random.uniform(0, court.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if court.error_rate and random.random() < court.error_rate:
+            court.count('errors')
+            self._send('<html><body>Service Unavailable</body></html>', 503)
+            return True
+        return False
+
+    def do_GET(self):
+        if self._delay_or_fail():
+            return
+        if self.path.startswith('/app/captcha-image'):
+            self._send(self.server.captcha_image, content_type='image/png')
+        elif self.path.startswith('/app/case-number'):
+            self._send(self.server.search_page())
+        else:
+            self._send('<html><body>Delhi High Court</body></html>')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        if self._delay_or_fail():
+            return
+        case_number = form.get('case_number', [''])[0]
+        if not case_number or case_number.startswith('404'):
+            self._send(NOT_FOUND_PAGE)
+        else:
+            self._send(self.server.result_page.replace(RECORDED_CASE_NUMBER, case_number))
+
+class StubCourtServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency: float = 0.05, jitter: float = 0.0,
+                 error_rate: float = 0.0, captcha: bool = False):
+        super().__init__(address, StubCourtHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.captcha_image = captcha_png()
+        self._search_page = load_page('search_page.html')
+        if not captcha:
+            self._search_page = self._search_page.replace(CAPTCHA_MARKUP, '')
+        self.result_page = load_page('result_page.html')
+        self.counters = {'requests': 0, 'errors': 0}
+        self._counters_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, name: str):
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    def search_page(self) -> str:
+        """The recorded search page with tokens that differ per request, like the real site"""
+        return self._search_page.replace('value="/wEPDw', f'value="/wEPDw{secrets.token_urlsafe(32)}', 1)
+
+def start_stub_court(**config) -> StubCourtServer:
+    """Start a stub court on a free local port in a background thread"""
+    server = StubCourtServer(**config)
+    threading.Thread(target=server.serve_forever, name='stub-court', daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 503')
+    parser.add_argument('--captcha', action='store_true', help='Keep the CAPTCHA image on the search page')
+    args = parser.parse_args()
+
+    server = StubCourtServer(('127.0.0.1', args.port), latency=args.latency, jitter=args.jitter,
+                             error_rate=args.error_rate, captcha=args.captcha)
+    print(f"Stub court serving at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Content-addressed storage for raw HTML
+
+Pages are stored once per distinct SHA-256 in an ``html_blobs`` table,
+compressed with zstd when the zstandard package is installed and zlib
+otherwise (the codec is recorded per blob). Log rows keep only the hash.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_CODEC = 'zstd' if zstandard is not None else 'zlib'
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 6
+
+CREATE_BLOB_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS html_blobs (
+        hash TEXT PRIMARY KEY,
+        codec TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        data BLOB NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+INSERT_BLOB_SQL = 'INSERT OR IGNORE INTO html_blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)'
+
+def html_hash(encoded: bytes) -> str:
+    return hashlib.sha256(encoded).hexdigest()
+
+def compress_blob(encoded: bytes, codec: str = DEFAULT_CODEC) -> Tuple[str, bytes]:
+    """Compress UTF-8 HTML, returning (codec, data)"""
+    if codec == 'zstd' and zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(encoded)
+    return 'zlib', zlib.compress(encoded, ZLIB_LEVEL)
+
+def decompress_blob(codec: str, data: bytes) -> str:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed HTML blobs")
+        return zstandard.ZstdDecompressor().decompress(data).decode()
+    if codec == 'zlib':
+        return zlib.decompress(data).decode()
+    raise ValueError(f"Unknown HTML blob codec: {codec}")
+
+class KnownHashes:
+    """Bounded LRU of hashes already written, so repeated pages skip compression"""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, digest: str) -> bool:
+        with self._lock:
+            if digest in self._hashes:
+                self._hashes.move_to_end(digest)
+                return True
+            return False
+
+    def add(self, digest: str) -> bool:
+        """Remember digest; False if it was already known"""
+        with self._lock:
+            if digest in self._hashes:
+                self._hashes.move_to_end(digest)
+                return False
+            self._hashes[digest] = None
+            if len(self._hashes) > self.max_size:
+                self._hashes.popitem(last=False)
+            return True
+
+def read_blob(conn: sqlite3.Connection, digest: str) -> Optional[str]:
+    row = conn.execute('SELECT codec, data FROM html_blobs WHERE hash = ?', (digest,)).fetchone()
+    return decompress_blob(row[0], row[1]) if row else None
+
+def migrate_sqlite_html(db_path: str, table: str = 'scraper_responses', batch_size: int = 500,
+                        vacuum: bool = False) -> dict:
+    """
+    Move inline raw_html from an existing SQLite table into html_blobs
+
+    Each row's html_hash is (re)computed from its HTML and raw_html is set
+    to NULL. Safe to run repeatedly; rows already migrated are skipped.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.execute(CREATE_BLOB_TABLE_SQL)
+        before = conn.execute(f'SELECT COALESCE(SUM(LENGTH(raw_html)), 0) FROM {table} '
+                              f'WHERE raw_html IS NOT NULL').fetchone()[0]
+        rows = 0
+        last_id = 0
+        while True:
+            batch = conn.execute(f'SELECT id, raw_html FROM {table} WHERE raw_html IS NOT NULL AND id > ? '
+                                 f'ORDER BY id LIMIT ?', (last_id, batch_size)).fetchall()
+            if not batch:
+                break
+            for row_id, raw_html in batch:
+                encoded = raw_html.encode()
+                digest = html_hash(encoded)
+                codec, data = compress_blob(encoded)
+                conn.execute(INSERT_BLOB_SQL, (digest, codec, len(encoded), data))
+                conn.execute(f'UPDATE {table} SET raw_html = NULL, html_hash = ? WHERE id = ?', (digest, row_id))
+            conn.commit()
+            rows += len(batch)
+            last_id = batch[-1][0]
+            logger.info(f"Migrated {rows} rows of {table} to html_blobs")
+
+        blobs, blob_bytes = conn.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM html_blobs').fetchone()
+        if vacuum and rows:
+            conn.execute('VACUUM')
+        return {'rows': rows, 'inline_bytes': before, 'blobs': blobs, 'blob_bytes': blob_bytes}
+    finally:
+        conn.close()
@@ -0,0 +1,101 @@
+"""Bulk case lookups with bounded concurrency
+
+Used by ``POST /api/bulk-search`` and the ``flask bulk-search`` command. Results
+are yielded as soon as each lookup finishes, not in input order; every result
+carries the ``index`` of its input row.
+"""
+import csv
+import io
+import json
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from scraper import CASE_NOT_FOUND_ERROR
+
+logger = logging.getLogger(__name__)
+
+CASE_FIELDS = ('case_type', 'case_number', 'filing_year')
+
+SearchFn = Callable[[str, str, str], Tuple[bool, Dict, str, bool]]
+
+class BulkInputError(ValueError):
+    """Raised when a bulk request body cannot be parsed"""
+
+def parse_bulk_input(body: str, content_type: str = '') -> List[Dict[str, str]]:
+    """
+    Parse a JSON or CSV list of cases
+
+    JSON may be a list of objects or {"cases": [...]}; CSV needs a header row
+    with case_type, case_number and filing_year columns.
+    """
+    body = body.strip()
+    if 'json' in content_type or body.startswith(('[', '{')):
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise BulkInputError(f"Invalid JSON: {str(e)}")
+        rows = payload.get('cases', []) if isinstance(payload, dict) else payload
+    else:
+        rows = list(csv.DictReader(io.StringIO(body)))
+
+    cases = []
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise BulkInputError(f"Row {i} is not an object")
+        case = {field: str(row.get(field, '') or '').strip() for field in CASE_FIELDS}
+        if not all(case.values()):
+            raise BulkInputError(f"Row {i} is missing one of {', '.join(CASE_FIELDS)}")
+        cases.append(case)
+    return cases
+
+def _search_with_retries(index: int, case: Dict[str, str], search_fn: SearchFn,
+                         retries: int, retry_backoff: float) -> Dict:
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            success, case_data, error_message, cache_hit = search_fn(
+                case['case_type'], case['case_number'], case['filing_year'])
+        except Exception as e:
+            logger.error(f"Bulk lookup {index} raised: {str(e)}")
+            success, case_data, error_message, cache_hit = False, {}, f"Unexpected error: {str(e)}", False
+
+        transient = not success and error_message != CASE_NOT_FOUND_ERROR
+        if not transient or attempts > retries:
+            return {
+                'index': index,
+                **case,
+                'success': success,
+                'case_data': case_data if success else None,
+                'error': error_message if not success else None,
+                'cached': cache_hit,
+                'attempts': attempts
+            }
+        time.sleep(retry_backoff * (2 ** (attempts - 1)))
+
+def bulk_search(cases: Iterable[Dict[str, str]], search_fn: SearchFn, concurrency: int = 4,
+                retries: int = 2, retry_backoff: float = 1.0) -> Iterator[Dict]:
+    """Run search_fn over cases with at most `concurrency` lookups in flight, yielding as they finish"""
+    concurrency = max(concurrency, 1)
+    pending = set()
+    cases = iter(enumerate(cases))
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bulk-search')
+
+    def fill():
+        for index, case in cases:
+            pending.add(executor.submit(_search_with_retries, index, case, search_fn, retries, retry_backoff))
+            if len(pending) >= concurrency:
+                break
+
+    try:
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                yield future.result()
+            fill()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,307 @@
+"""Case-result cache in front of the scrapers
+
+Results are keyed on the normalized ``case_type.case_number.filing_year`` key.
+Successful lookups are kept for ``ttl`` seconds and "case not found" answers
+for ``negative_ttl`` seconds; transient failures (timeouts, 5xx, ...) are never
+cached. Two backends are available:
+
+* ``MemoryCaseCache`` - per-process LRU dict
+* ``SQLiteCaseCache`` - shared SQLite file, so every gunicorn worker benefits
+
+Both store the case as a ``CaseRecord``, so neither keeps ``raw_html`` and
+both return the same dict for a cached case.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from case_record import case_record, loads_json
+from scraper import CASE_NOT_FOUND_ERROR
+
+logger = logging.getLogger(__name__)
+
+CachedResult = Tuple[bool, Dict, str]
+
+def normalize_case_key(case_type: str, case_number: str, filing_year: str) -> str:
+    """Build the canonical case key (matches the MOCK_CASES key format)"""
+    case_type = re.sub(r'\s+', '', (case_type or '').strip().upper()).rstrip('.')
+    case_number = (case_number or '').strip().lstrip('0') or '0'
+    filing_year = (filing_year or '').strip()
+    return f"{case_type}.{case_number}.{filing_year}"
+
+class CaseCache:
+    """Base class with the shared TTL / negative-caching policy"""
+
+    backend = 'none'
+
+    def __init__(self, ttl: int = 900, negative_ttl: int = 300, max_size: int = 10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+
+    def get(self, case_key: str, record_stats: bool = True) -> Optional[CachedResult]:
+        """Return (success, case_data, error_message) or None on a miss"""
+        return None
+
+    def set(self, case_key: str, success: bool, case_data: Dict, error_message: str = ""):
+        pass
+
+    def invalidate(self, case_key: str):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self) -> Dict:
+        return {'backend': self.backend, 'hits': 0, 'misses': 0, 'size': 0, 'hit_rate': 0.0}
+
+    def store_result(self, case_key: str, success: bool, case_data: Dict, error_message: str) -> bool:
+        """Cache a scrape result if it is cacheable; returns True when stored"""
+        if success and case_data:
+            self.set(case_key, True, case_data, "")
+            return True
+        if error_message == CASE_NOT_FOUND_ERROR:
+            self.set(case_key, False, {}, error_message)
+            return True
+        return False
+
+    def _expiry(self, success: bool) -> float:
+        return time.time() + (self.ttl if success else self.negative_ttl)
+
+    @staticmethod
+    def _hit_rate(hits: int, misses: int) -> float:
+        return round((hits / max(hits + misses, 1)) * 100, 2)
+
+class MemoryCaseCache(CaseCache):
+    """In-process LRU cache"""
+
+    backend = 'memory'
+
+    def __init__(self, ttl: int = 900, negative_ttl: int = 300, max_size: int = 10000):
+        super().__init__(ttl, negative_ttl, max_size)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, case_key: str, record_stats: bool = True) -> Optional[CachedResult]:
+        with self._lock:
+            entry = self._entries.get(case_key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[case_key]
+                if record_stats:
+                    self.misses += 1
+                return None
+
+            self._entries.move_to_end(case_key)
+            if record_stats:
+                self.hits += 1
+            _, success, record, error_message = entry
+            return success, record.to_dict() if record else {}, error_message
+
+    def set(self, case_key: str, success: bool, case_data: Dict, error_message: str = ""):
+        with self._lock:
+            self._entries[case_key] = (self._expiry(success), success, case_record(case_data), error_message)
+            self._entries.move_to_end(case_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, case_key: str):
+        with self._lock:
+            self._entries.pop(case_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'hit_rate': self._hit_rate(self.hits, self.misses)
+            }
+
+class SQLiteCaseCache(CaseCache):
+    """
+    Cache stored in a SQLite file shared by all worker processes
+
+    Lookups only read: hit/miss counters and last-access times are batched
+    in memory and written in one transaction every ``flush_every`` lookups
+    or ``flush_interval`` seconds (and before eviction or stats), so a read
+    does not take the file's write lock.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, db_path: str = "case_cache.db", ttl: int = 900, negative_ttl: int = 300,
+                 max_size: int = 10000, evict_every: int = 64, flush_every: int = 64,
+                 flush_interval: float = 5.0):
+        super().__init__(ttl, negative_ttl, max_size)
+        self.db_path = db_path
+        self.evict_every = evict_every
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._sets_since_evict = 0
+        self._pending_lock = threading.Lock()
+        self._pending_hits = 0
+        self._pending_misses = 0
+        self._pending_access = {}
+        self._last_flush = time.monotonic()
+        self._local = threading.local()
+        self._init_database()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_database(self):
+        conn = self._get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS case_cache (
+                case_key TEXT PRIMARY KEY,
+                success BOOLEAN NOT NULL,
+                case_data TEXT,
+                error_message TEXT,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_case_cache_last_access ON case_cache (last_access)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS case_cache_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute("INSERT OR IGNORE INTO case_cache_stats (name, value) VALUES ('hits', 0), ('misses', 0)")
+        conn.commit()
+
+    def get(self, case_key: str, record_stats: bool = True) -> Optional[CachedResult]:
+        conn = self._get_connection()
+        now = time.time()
+        row = conn.execute(
+            'SELECT success, case_data, error_message, expires_at FROM case_cache WHERE case_key = ?',
+            (case_key,)
+        ).fetchone()
+
+        if row is None or row[3] < now:
+            if row is not None:
+                conn.execute('DELETE FROM case_cache WHERE case_key = ?', (case_key,))
+                conn.commit()
+            self._note_lookup(misses=int(record_stats))
+            return None
+
+        self._note_lookup(case_key, now, hits=int(record_stats))
+        return bool(row[0]), loads_json(row[1] or '{}'), row[2] or ""
+
+    def _note_lookup(self, case_key: Optional[str] = None, accessed_at: float = 0.0, hits: int = 0,
+                     misses: int = 0):
+        with self._pending_lock:
+            if case_key is not None:
+                self._pending_access[case_key] = accessed_at
+            self._pending_hits += hits
+            self._pending_misses += misses
+            due = (len(self._pending_access) + self._pending_hits + self._pending_misses >= self.flush_every
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Write the batched hit/miss counters and last-access times in one transaction"""
+        with self._pending_lock:
+            hits, misses, accesses = self._pending_hits, self._pending_misses, self._pending_access
+            self._pending_hits, self._pending_misses, self._pending_access = 0, 0, {}
+            self._last_flush = time.monotonic()
+        if not (hits or misses or accesses):
+            return
+        conn = self._get_connection()
+        conn.executemany('UPDATE case_cache SET last_access = MAX(last_access, ?) WHERE case_key = ?',
+                         [(accessed_at, case_key) for case_key, accessed_at in accesses.items()])
+        conn.executemany('UPDATE case_cache_stats SET value = value + ? WHERE name = ?',
+                         [(count, name) for name, count in (('hits', hits), ('misses', misses)) if count])
+        conn.commit()
+
+    def set(self, case_key: str, success: bool, case_data: Dict, error_message: str = ""):
+        record = case_record(case_data)
+        conn = self._get_connection()
+        conn.execute('''
+            INSERT OR REPLACE INTO case_cache
+            (case_key, success, case_data, error_message, expires_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (case_key, success, record.to_json() if record else '{}', error_message, self._expiry(success),
+              time.time()))
+        conn.commit()
+
+        self._sets_since_evict += 1
+        if self._sets_since_evict >= self.evict_every:
+            self._sets_since_evict = 0
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_size"""
+        self.flush_stats()
+        conn = self._get_connection()
+        conn.execute('DELETE FROM case_cache WHERE expires_at < ?', (time.time(),))
+        conn.execute('''
+            DELETE FROM case_cache WHERE case_key IN (
+                SELECT case_key FROM case_cache ORDER BY last_access
+                LIMIT MAX((SELECT COUNT(*) FROM case_cache) - ?, 0)
+            )
+        ''', (self.max_size,))
+        conn.commit()
+
+    def invalidate(self, case_key: str):
+        conn = self._get_connection()
+        conn.execute('DELETE FROM case_cache WHERE case_key = ?', (case_key,))
+        conn.commit()
+
+    def clear(self):
+        with self._pending_lock:
+            self._pending_hits, self._pending_misses, self._pending_access = 0, 0, {}
+        conn = self._get_connection()
+        conn.execute('DELETE FROM case_cache')
+        conn.execute('UPDATE case_cache_stats SET value = 0')
+        conn.commit()
+
+    def stats(self) -> Dict:
+        self.flush_stats()
+        conn = self._get_connection()
+        counters = dict(conn.execute('SELECT name, value FROM case_cache_stats').fetchall())
+        size = conn.execute('SELECT COUNT(*) FROM case_cache').fetchone()[0]
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        return {
+            'backend': self.backend,
+            'hits': hits,
+            'misses': misses,
+            'size': size,
+            'hit_rate': self._hit_rate(hits, misses)
+        }
+
+def get_case_cache() -> CaseCache:
+    """Factory function to build the cache configured through the environment"""
+    backend = os.environ.get("CASE_CACHE_BACKEND", "memory").lower()
+    ttl = int(os.environ.get("CASE_CACHE_TTL", "900"))
+    negative_ttl = int(os.environ.get("CASE_CACHE_NEGATIVE_TTL", "300"))
+    max_size = int(os.environ.get("CASE_CACHE_MAX_SIZE", "10000"))
+
+    if backend == 'sqlite':
+        db_path = os.environ.get("CASE_CACHE_DB", "case_cache.db")
+        logger.info(f"Using SQLite case cache: {db_path}")
+        return SQLiteCaseCache(db_path, ttl=ttl, negative_ttl=negative_ttl, max_size=max_size)
+    if backend == 'memory':
+        return MemoryCaseCache(ttl=ttl, negative_ttl=negative_ttl, max_size=max_size)
+    return CaseCache(ttl=ttl, negative_ttl=negative_ttl, max_size=max_size)
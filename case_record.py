@@ -0,0 +1,118 @@
+"""Compact in-memory form of a parsed case
+
+A CaseRecord holds the fields of one case_data dict in ``__slots__``
+instead of a per-record hash table. The few distinct values of the
+enum-like fields (case type, status, court, judge) are interned, so a
+million cached records share one copy of each. Keys outside FIELDS are
+kept in a small ``extra`` dict. Absent fields stay unset, so a record
+converts back to exactly the dict it was built from (less ``raw_html``,
+which is stored as a blob rather than as part of the case).
+
+JSON goes through orjson when it is installed, and msgpack is available
+for a binary form when the msgpack package is. A record's JSON is computed
+once and reused, so records must not be modified after they are built.
+"""
+import json
+import sys
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FIELDS = ('case_number', 'case_type', 'case_title', 'petitioner', 'respondent', 'filing_date',
+          'next_hearing_date', 'latest_order', 'judge_name', 'court_number', 'case_status', 'pdf_link',
+          'pdf_links')
+_FIELD_SET = frozenset(FIELDS)
+INTERNED_FIELDS = frozenset({'case_type', 'case_status', 'court_number', 'judge_name'})
+# Keys describing the scrape rather than the case
+IGNORED_KEYS = frozenset({'raw_html'})
+
+def dumps_json(data: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data)
+
+def loads_json(text):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+class CaseRecord:
+    """One parsed case; build with from_dict / from_json and treat as immutable"""
+
+    __slots__ = FIELDS + ('extra', '_json')
+
+    @classmethod
+    def from_dict(cls, case_data: Dict[str, Any]) -> 'CaseRecord':
+        record = cls()
+        extra = None
+        for key, value in case_data.items():
+            if key in IGNORED_KEYS:
+                continue
+            if key in INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            if key in _FIELD_SET:
+                setattr(record, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        record.extra = extra
+        record._json = None
+        return record
+
+    @classmethod
+    def from_json(cls, text) -> 'CaseRecord':
+        return cls.from_dict(loads_json(text))
+
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> 'CaseRecord':
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return cls.from_dict(msgpack.unpackb(data))
+
+    def get(self, field: str, default: Any = None) -> Any:
+        if field in _FIELD_SET:
+            return getattr(self, field, default)
+        return self.extra.get(field, default) if self.extra else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {}
+        for field in FIELDS:
+            try:
+                data[field] = getattr(self, field)
+            except AttributeError:
+                pass
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def to_json(self) -> str:
+        """The record as JSON, serialized on first use only"""
+        if self._json is None:
+            self._json = dumps_json(self.to_dict())
+        return self._json
+
+    def to_msgpack(self) -> bytes:
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return msgpack.packb(self.to_dict())
+
+    def __eq__(self, other):
+        if not isinstance(other, CaseRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"CaseRecord({self.to_dict()!r})"
+
+def case_record(case_data: Optional[Dict[str, Any]]) -> Optional['CaseRecord']:
+    """CaseRecord for case_data, None for an empty result"""
+    return CaseRecord.from_dict(case_data) if case_data else None
@@ -0,0 +1,292 @@
+"""Local mirror of judgment/order PDFs linked from case pages
+
+Each URL is downloaded once and revalidated with a conditional GET
+(ETag / If-Modified-Since) at most every ``revalidate_after`` seconds.
+Files are stored by SHA-256 of their content, so the same PDF linked
+from several URLs is kept once. An SQLite index tracks sizes and last
+access (recorded at most every ``access_resolution`` seconds per file, so
+Range requests do not each commit a write); the least recently used files
+are evicted past ``quota_bytes``. ``prefetch`` mirrors links in a
+background thread so the first click on them is served locally.
+Only URLs on ``allowed_hosts`` are fetched, and redirects are followed
+only while every hop stays on them.
+"""
+import hashlib
+import logging
+import os
+import queue
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from scraper import COURT_BASE_URL, DEFAULT_HEADERS
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_HASH = re.compile(r'^[0-9a-f]{64}$')
+
+class DocumentError(Exception):
+    """A document could not be mirrored"""
+
+class DocumentMirror:
+    """Content-addressed PDF store with an LRU disk quota"""
+
+    def __init__(self, root_dir: str, quota_bytes: int = 1024 ** 3, max_document_bytes: int = 50 * 1024 ** 2,
+                 revalidate_after: int = 86400, allowed_hosts: Iterable[str] = (),
+                 timeout: float = 30.0, max_redirects: int = 5, access_resolution: float = 60.0,
+                 prefetch_queue_size: int = 256, session: Optional[requests.Session] = None):
+        self.root_dir = root_dir
+        self.quota_bytes = quota_bytes
+        self.max_document_bytes = max_document_bytes
+        self.revalidate_after = revalidate_after
+        self.allowed_hosts = {host.lower() for host in allowed_hosts}
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.access_resolution = access_resolution
+        self.prefetch_queue_size = prefetch_queue_size
+        self.session = session or requests.Session()
+        self.session.headers.update({k: v for k, v in DEFAULT_HEADERS.items() if k != 'Accept'})
+        self.session.headers['Accept'] = 'application/pdf,*/*;q=0.8'
+        self.db_path = os.path.join(root_dir, 'documents.db')
+        self._single_flight = SingleFlight()
+        self._evict_lock = threading.Lock()
+        self._local = threading.local()
+        self._prefetch_queue = None
+        self._prefetch_pid = None
+        self._prefetch_lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+        self._init_database()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_database(self):
+        conn = self._get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS documents (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_documents_last_access ON documents (last_access)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS document_sources (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                checked_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_document_sources_hash ON document_sources (hash)')
+        conn.commit()
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root_dir, digest[:2], f"{digest}.pdf")
+
+    def is_allowed(self, url: str) -> bool:
+        parsed = urlparse(url)
+        return parsed.scheme in ('http', 'https') and (parsed.hostname or '').lower() in self.allowed_hosts
+
+    def get(self, digest: str) -> Optional[Dict]:
+        """Index entry for a stored document (and mark it used), or None"""
+        if not DOCUMENT_HASH.match(digest or ''):
+            return None
+        conn = self._get_connection()
+        row = conn.execute('SELECT size, content_type, last_access FROM documents WHERE hash = ?',
+                           (digest,)).fetchone()
+        path = self.path_for(digest)
+        if row is None or not os.path.exists(path):
+            return None
+        now = time.time()
+        if now - row[2] >= self.access_resolution:
+            conn.execute('UPDATE documents SET last_access = ? WHERE hash = ?', (now, digest))
+            conn.commit()
+        return {'hash': digest, 'path': path, 'size': row[0], 'content_type': row[1] or 'application/pdf'}
+
+    def fetch(self, url: str) -> str:
+        """Mirror url and return the SHA-256 of its content; raises DocumentError"""
+        if not self.is_allowed(url):
+            raise DocumentError(f"Host not allowed for document mirroring: {url}")
+        digest, _ = self._single_flight.do(url, lambda: self._fetch(url))
+        return digest
+
+    def prefetch(self, urls: Iterable[str]) -> int:
+        """Queue allowed urls for mirroring in the background; returns how many were queued"""
+        if self._prefetch_pid != os.getpid():
+            with self._prefetch_lock:
+                if self._prefetch_pid != os.getpid():
+                    self._prefetch_queue = queue.Queue(maxsize=self.prefetch_queue_size)
+                    threading.Thread(target=self._prefetch_loop, args=(self._prefetch_queue,),
+                                     name="document-prefetch", daemon=True).start()
+                    self._prefetch_pid = os.getpid()
+        queued = 0
+        for url in dict.fromkeys(urls):
+            if not self.is_allowed(url):
+                continue
+            try:
+                self._prefetch_queue.put_nowait(url)
+            except queue.Full:
+                logger.warning(f"Document prefetch queue full, skipping {url}")
+                break
+            queued += 1
+        return queued
+
+    def _prefetch_loop(self, urls: queue.Queue):
+        while True:
+            url = urls.get()
+            try:
+                self.fetch(url)
+            except Exception as e:
+                logger.warning(f"Prefetch of {url} failed: {str(e)}")
+
+    def _fetch(self, url: str) -> str:
+        conn = self._get_connection()
+        source = conn.execute(
+            'SELECT hash, etag, last_modified, checked_at FROM document_sources WHERE url = ?', (url,)
+        ).fetchone()
+        have_copy = source is not None and os.path.exists(self.path_for(source[0]))
+        if have_copy and time.time() - source[3] < self.revalidate_after:
+            return source[0]
+
+        headers = {}
+        if have_copy:
+            if source[1]:
+                headers['If-None-Match'] = source[1]
+            if source[2]:
+                headers['If-Modified-Since'] = source[2]
+
+        try:
+            response = self._get(url, headers)
+        except requests.RequestException as e:
+            if have_copy:
+                logger.warning(f"Revalidation of {url} failed, serving mirrored copy: {str(e)}")
+                return source[0]
+            raise DocumentError(f"Failed to download {url}: {str(e)}")
+
+        with response:
+            if response.status_code == 304 and have_copy:
+                conn.execute('UPDATE document_sources SET checked_at = ? WHERE url = ?', (time.time(), url))
+                conn.commit()
+                return source[0]
+            if response.status_code != 200:
+                if have_copy:
+                    return source[0]
+                raise DocumentError(f"Failed to download {url}: HTTP {response.status_code}")
+            digest, size = self._store(response)
+            content_type = response.headers.get('Content-Type', 'application/pdf').split(';')[0]
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+        now = time.time()
+        conn.execute('''
+            INSERT INTO documents (hash, size, content_type, created_at, last_access) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(hash) DO UPDATE SET last_access = excluded.last_access
+        ''', (digest, size, content_type, now, now))
+        conn.execute('''
+            INSERT OR REPLACE INTO document_sources (url, hash, etag, last_modified, checked_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (url, digest, etag, last_modified, now))
+        conn.commit()
+        logger.info(f"Mirrored {url} as {digest} ({size} bytes)")
+        self.evict(keep=digest)
+        return digest
+
+    def _get(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        """Streaming GET that follows redirects itself, refusing any hop off allowed_hosts"""
+        for _ in range(self.max_redirects + 1):
+            response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True,
+                                        allow_redirects=False)
+            if not response.is_redirect:
+                return response
+            location = urljoin(url, response.headers['Location'])
+            response.close()
+            if not self.is_allowed(location):
+                raise DocumentError(f"Redirect to a host not allowed for document mirroring: {location}")
+            url = location
+        raise DocumentError(f"Too many redirects downloading {url}")
+
+    def _store(self, response: requests.Response):
+        """Stream the body to disk while hashing it; identical content is kept once"""
+        sha256 = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > self.max_document_bytes:
+                        raise DocumentError(f"Document exceeds {self.max_document_bytes} bytes: {response.url}")
+                    sha256.update(chunk)
+                    f.write(chunk)
+            digest = sha256.hexdigest()
+            path = self.path_for(digest)
+            if os.path.exists(path):
+                os.unlink(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return digest, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Delete least recently used documents until the mirror fits its quota"""
+        with self._evict_lock:
+            conn = self._get_connection()
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM documents').fetchone()[0]
+            removed = 0
+            if total <= self.quota_bytes:
+                return removed
+            for digest, size in conn.execute(
+                    'SELECT hash, size FROM documents WHERE hash != ? ORDER BY last_access',
+                    (keep or '',)).fetchall():
+                if total <= self.quota_bytes:
+                    break
+                try:
+                    os.unlink(self.path_for(digest))
+                except FileNotFoundError:
+                    pass
+                conn.execute('DELETE FROM documents WHERE hash = ?', (digest,))
+                conn.execute('DELETE FROM document_sources WHERE hash = ?', (digest,))
+                total -= size
+                removed += 1
+            conn.commit()
+            if removed:
+                logger.info(f"Evicted {removed} mirrored documents to stay under {self.quota_bytes} bytes")
+            return removed
+
+    def stats(self) -> Dict:
+        conn = self._get_connection()
+        documents, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents').fetchone()
+        sources = conn.execute('SELECT COUNT(*) FROM document_sources').fetchone()[0]
+        return {'documents': documents, 'sources': sources, 'bytes': size, 'quota_bytes': self.quota_bytes}
+
+def get_document_mirror(default_dir: str) -> DocumentMirror:
+    """Build the document mirror from DOCUMENT_* environment variables"""
+    court_host = urlparse(os.environ.get("COURT_BASE_URL", COURT_BASE_URL)).hostname
+    extra_hosts = [h.strip() for h in os.environ.get("DOCUMENT_ALLOWED_HOSTS", "").split(',') if h.strip()]
+    return DocumentMirror(
+        os.environ.get("DOCUMENT_DIR", default_dir),
+        quota_bytes=int(float(os.environ.get("DOCUMENT_QUOTA_MB", "1024")) * 1024 ** 2),
+        max_document_bytes=int(float(os.environ.get("DOCUMENT_MAX_SIZE_MB", "50")) * 1024 ** 2),
+        revalidate_after=int(os.environ.get("DOCUMENT_REVALIDATE_AFTER", "86400")),
+        allowed_hosts=[court_host, *extra_hosts]
+    )
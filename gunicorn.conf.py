@@ -0,0 +1,23 @@
+"""gunicorn hooks (gunicorn loads ./gunicorn.conf.py automatically)
+
+With PROMETHEUS_MULTIPROC_DIR set, workers write metrics to files in that
+directory; start each run with it empty and drop the files of exited workers.
+
+Workers are threaded (gthread), so long-lived requests such as the
+/jobs/<id>/events stream occupy one thread rather than a whole worker.
+"""
+import os
+import shutil
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+
+def on_starting(server):
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -0,0 +1,239 @@
+"""HTML parser backends for the scraper
+
+The scraper only needs a handful of tree operations, so every backend is
+wrapped in the same small node interface. A page is parsed once with
+``parse_html`` and all extraction runs on that tree. Backends, fastest first:
+
+* ``selectolax`` - lexbor via selectolax, if installed
+* ``lxml``       - BeautifulSoup with the lxml tree builder, if installed
+* ``html.parser`` - BeautifulSoup with the standard library parser
+
+``PARSER_BACKEND`` picks one explicitly; the default ``auto`` uses the
+fastest one available.
+"""
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Ordered label -> field rules for result tables. A rule matches when every
+# keyword of any one of its alternatives appears in the lower-cased label;
+# the first matching rule wins, exactly like the original if/elif chain.
+CASE_FIELD_RULES = (
+    ('case_number', (('case', 'no'),)),
+    ('case_title', (('title',), ('parties',))),
+    ('petitioner', (('petitioner',), ('appellant',))),
+    ('respondent', (('respondent',),)),
+    ('filing_date', (('filing', 'date'),)),
+    ('next_hearing_date', (('next', 'hearing'),)),
+    ('judge_name', (('judge',),)),
+    ('court_number', (('court',),)),
+    ('case_status', (('status',),)),
+    ('latest_order', (('order',), ('judgment',))),
+)
+
+@lru_cache(maxsize=4096)
+def field_for_label(label: str) -> Optional[str]:
+    """Map a lower-cased table label to a case_data field (memoized)"""
+    for field, alternatives in CASE_FIELD_RULES:
+        for keywords in alternatives:
+            if all(keyword in label for keyword in keywords):
+                return field
+    return None
+
+class SoupNode:
+    """BeautifulSoup-backed node"""
+
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        self._node = node
+
+    def find_all(self, *tags: str) -> List['SoupNode']:
+        return [SoupNode(n) for n in self._node.find_all(list(tags) if len(tags) > 1 else tags[0])]
+
+    def find(self, tag: str) -> Optional['SoupNode']:
+        node = self._node.find(tag)
+        return SoupNode(node) if node is not None else None
+
+    def get(self, name: str, default=None):
+        value = self._node.get(name)
+        if value is None:
+            return default
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def has_attr(self, name: str) -> bool:
+        return self._node.get(name) is not None
+
+    def text(self) -> str:
+        return self._node.get_text(strip=True)
+
+    def string(self) -> Optional[str]:
+        return self._node.string
+
+class LexborNode:
+    """selectolax/lexbor-backed node"""
+
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        self._node = node
+
+    def find_all(self, *tags: str) -> List['LexborNode']:
+        return [LexborNode(n) for n in self._node.css(', '.join(tags))]
+
+    def find(self, tag: str) -> Optional['LexborNode']:
+        node = self._node.css_first(tag)
+        return LexborNode(node) if node is not None else None
+
+    def get(self, name: str, default=None):
+        attributes = self._node.attributes
+        if name not in attributes:
+            return default
+        value = attributes[name]
+        return '' if value is None else value
+
+    def has_attr(self, name: str) -> bool:
+        return name in self._node.attributes
+
+    def text(self) -> str:
+        return self._node.text(deep=True, separator='', strip=True)
+
+    def string(self) -> Optional[str]:
+        return self._node.text(deep=True) or None
+
+def available_backends() -> List[str]:
+    backends = []
+    if LexborHTMLParser is not None:
+        backends.append('selectolax')
+    if LXML_AVAILABLE:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    backend = (backend or os.environ.get("PARSER_BACKEND", "auto")).lower()
+    available = available_backends()
+    if backend == 'auto':
+        return available[0]
+    if backend not in available:
+        logger.warning(f"Parser backend {backend} unavailable, using {available[0]}")
+        return available[0]
+    return backend
+
+def parse_html(html: str, backend: Optional[str] = None):
+    """Parse a document once and return its root node"""
+    backend = resolve_backend(backend)
+    if backend == 'selectolax':
+        return LexborNode(LexborHTMLParser(html).root)
+    return SoupNode(BeautifulSoup(html, backend))
+
+# Search page extraction
+
+TOKEN_NAME_HINTS = ('viewstate', 'token', 'csrf', 'validation')
+FORM_DIV_ID = re.compile(r'.*form.*', re.I)
+CSRF_META_NAME = re.compile(r'csrf.*token', re.I)
+SCRIPT_TOKEN_PATTERNS = (
+    re.compile(r'token["\']?\s*[:=]\s*["\']([^"\']+)["\']', re.I),
+    re.compile(r'csrf["\']?\s*[:=]\s*["\']([^"\']+)["\']', re.I),
+    re.compile(r'__RequestVerificationToken["\']?\s*[:=]\s*["\']([^"\']+)["\']', re.I),
+)
+CAPTCHA_SRC = re.compile(r'captcha', re.I)
+PDF_HREF = re.compile(r'\.pdf', re.I)
+
+def extract_form_fields(doc) -> dict:
+    """Collect form inputs, selects, CSRF meta tags, script tokens and data-token values"""
+    form_data = {}
+    log_tokens = logger.isEnabledFor(logging.DEBUG)
+
+    forms = doc.find_all('form')
+    if not forms:
+        forms = [div for div in doc.find_all('div') if FORM_DIV_ID.search(div.get('id', ''))]
+
+    for form in forms:
+        for inp in form.find_all('input'):
+            name = inp.get('name')
+            if name:
+                value = inp.get('value', '')
+                form_data[name] = value
+                if log_tokens and any(token in name.lower() for token in TOKEN_NAME_HINTS):
+                    logger.debug(f"Found token field: {name} = {value[:50]}..." if len(value) > 50 else f"Found token field: {name} = {value}")
+
+        for select in form.find_all('select'):
+            name = select.get('name')
+            if name:
+                options = select.find_all('option')
+                selected = next((option for option in options if option.has_attr('selected')), None)
+                if selected is not None:
+                    form_data[name] = selected.get('value', '')
+                elif options:
+                    form_data[name] = options[0].get('value', '')
+
+    for meta in doc.find_all('meta'):
+        if CSRF_META_NAME.search(meta.get('name', '')):
+            form_data['csrf_token'] = meta.get('content', '')
+            break
+
+    for script in doc.find_all('script'):
+        source = script.string()
+        if source:
+            for pattern in SCRIPT_TOKEN_PATTERNS:
+                for match in pattern.findall(source):
+                    if len(match) > 10:
+                        form_data[f'js_token_{len(form_data)}'] = match
+
+    return form_data
+
+def extract_data_tokens(doc) -> List[str]:
+    """Values of every non-empty data-token attribute, in document order"""
+    if isinstance(doc, LexborNode):
+        nodes = doc.find_all('[data-token]')
+    else:
+        nodes = [SoupNode(n) for n in doc._node.find_all(attrs={'data-token': True})]
+    return [value for value in (node.get('data-token') for node in nodes) if value]
+
+def find_captcha_src(doc) -> Optional[str]:
+    """src of the CAPTCHA image, matched by alt text first and then by src"""
+    images = doc.find_all('img')
+    for img in images:
+        if img.get('alt') == 'captcha':
+            return img.get('src')
+    for img in images:
+        if CAPTCHA_SRC.search(img.get('src', '')):
+            return img.get('src')
+    return None
+
+# Result page extraction
+
+def extract_case_fields(doc) -> dict:
+    """Map label/value cell pairs of every table row onto case_data fields"""
+    case_data = {}
+    for table in doc.find_all('table'):
+        for row in table.find_all('tr'):
+            cells = row.find_all('td', 'th')
+            if len(cells) >= 2:
+                for i in range(0, len(cells) - 1, 2):
+                    field = field_for_label(cells[i].text().lower())
+                    if field:
+                        case_data[field] = cells[i + 1].text()
+    return case_data
+
+def extract_pdf_links(doc) -> List[tuple]:
+    """(href, link text) for every anchor pointing at a PDF"""
+    return [(a.get('href'), a.text()) for a in doc.find_all('a') if PDF_HREF.search(a.get('href', ''))]
@@ -0,0 +1,144 @@
+"""Background execution of case searches
+
+``POST /search-case`` in async mode stores a ``SearchJob`` row and returns its
+ID straight away; a local pool of worker threads claims queued jobs and runs
+the scrape outside the request cycle. Because jobs live in the database, a
+sweeper periodically re-queues jobs left behind by a crashed or restarted
+worker.
+"""
+import logging
+import os
+import queue
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+from models import (SearchJob, db, claim_search_job, create_search_job, finish_search_job,
+                    get_pending_search_job_ids, get_search_job)
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[SearchJob], Tuple[bool, dict, str, Optional[int]]]
+
+class SearchJobRunner:
+    """Thread pool that executes persisted search jobs"""
+
+    def __init__(self, app, handler: JobHandler, workers: int = 4,
+                 stale_after: int = 300, sweep_interval: int = 30):
+        self.app = app
+        self.handler = handler
+        self.workers = workers
+        self.stale_after = stale_after
+        self.sweep_interval = sweep_interval
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._threads = []
+        self._started_pid = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def ensure_started(self):
+        """Start the pool once per process (safe to call after a gunicorn fork)"""
+        if self._started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            with self._pending_lock:
+                self._pending = set()
+            self._threads = [
+                threading.Thread(target=self._worker_loop, name=f"search-job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            self._threads.append(threading.Thread(target=self._sweeper_loop, name="search-job-sweeper",
+                                                  daemon=True))
+            for thread in self._threads:
+                thread.start()
+            self._started_pid = os.getpid()
+            self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+            logger.info(f"Search job runner started with {self.workers} workers ({self.worker_name})")
+
+    def submit(self, case_type: str, case_number: str, filing_year: str,
+               query_id: Optional[int] = None) -> SearchJob:
+        """Persist a new job and hand it to the local pool"""
+        self.ensure_started()
+        job = create_search_job(case_type, case_number, filing_year, query_id=query_id)
+        self._enqueue(job.id)
+        return job
+
+    def _enqueue(self, job_id: str) -> bool:
+        """Queue a job locally unless it is already waiting in the local queue"""
+        with self._pending_lock:
+            if job_id in self._pending:
+                return False
+            self._pending.add(job_id)
+        self._queue.put(job_id)
+        return True
+
+    def stop(self):
+        self._stop.set()
+        for _ in range(self.workers):
+            self._queue.put(None)
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            job_id = self._queue.get()
+            if job_id is None:
+                break
+            with self._pending_lock:
+                self._pending.discard(job_id)
+            with self.app.app_context():
+                try:
+                    self._run_job(job_id)
+                except Exception as e:
+                    logger.error(f"Search job {job_id} crashed: {str(e)}", exc_info=True)
+
+    def _run_job(self, job_id: str):
+        if not claim_search_job(job_id, self.worker_name):
+            return
+
+        job = get_search_job(job_id)
+        logger.info(f"Running search job {job_id}: {job.case_type} {job.case_number}/{job.filing_year}")
+        try:
+            success, case_data, error_message, response_id = self.handler(job)
+        except Exception as e:
+            logger.error(f"Search job {job_id} failed: {str(e)}", exc_info=True)
+            db.session.rollback()
+            finish_search_job(job_id, False,
+                              error_message='An internal server error occurred while searching for the case')
+            return
+
+        finish_search_job(job_id, success, case_data=case_data,
+                          error_message=error_message if not success else None,
+                          response_id=response_id)
+
+    def _sweeper_loop(self):
+        while True:
+            self.recover()
+            if self._stop.wait(self.sweep_interval):
+                break
+
+    def recover(self):
+        """Queue jobs persisted by earlier or crashed processes"""
+        try:
+            with self.app.app_context():
+                stale_before = datetime.utcnow() - timedelta(seconds=self.stale_after)
+                job_ids = get_pending_search_job_ids(stale_before)
+        except Exception as e:
+            logger.error(f"Failed to recover search jobs: {str(e)}")
+            return
+
+        queued = sum(self._enqueue(job_id) for job_id in job_ids)
+        if queued:
+            logger.info(f"Recovered {queued} pending search jobs")
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queued_locally': self._queue.qsize(),
+            'running': self._started_pid == os.getpid()
+        }
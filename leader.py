@@ -0,0 +1,42 @@
+"""Single-leader election between processes on one host
+
+Background loops that must run in exactly one gunicorn worker hold an
+exclusive ``flock`` on a file; the lock is released by the kernel when the
+holder exits, so another worker takes over on its next attempt.
+"""
+import fcntl
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class FileLeaderLock:
+    """Non-blocking exclusive lock on ``path``; a path of None means always leader"""
+
+    def __init__(self, path: Optional[str], name: str = 'leader'):
+        self.path = path
+        self.name = name
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        if self._file is not None or self.path is None:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lock_file = open(self.path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        logger.info(f"{self.name} is leader in process {os.getpid()}")
+        return True
+
+    def reset(self):
+        """Forget a lock inherited across fork (the child does not hold it)"""
+        self._file = None
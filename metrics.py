@@ -0,0 +1,118 @@
+"""Prometheus metrics for searches, scrape stages and upstream behaviour
+
+Exposed in the Prometheus text format at ``/metrics``. Under gunicorn set
+``PROMETHEUS_MULTIPROC_DIR`` to an empty, writable directory before the
+workers start; every worker then records into its own files there and
+``/metrics`` aggregates all of them (``gunicorn.conf.py`` cleans up after
+exited workers). Without the prometheus_client package every metric is a
+no-op and ``/metrics`` reports that metrics are unavailable.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Scrape stages take from milliseconds (parsing) to tens of seconds (upstream timeouts)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+if prometheus_client is not None:
+    STAGE_SECONDS = prometheus_client.Histogram(
+        'court_stage_seconds', 'Time spent in each stage of a case search', ['stage'], buckets=STAGE_BUCKETS)
+    SEARCH_SECONDS = prometheus_client.Histogram(
+        'court_search_seconds', 'End-to-end case lookup time', ['outcome', 'cache'], buckets=STAGE_BUCKETS)
+    HTTP_REQUEST_SECONDS = prometheus_client.Histogram(
+        'court_http_request_seconds', 'Dashboard request handling time', ['endpoint', 'method', 'status'],
+        buckets=STAGE_BUCKETS)
+    UPSTREAM_RESPONSES = prometheus_client.Counter(
+        'court_upstream_responses_total', 'Responses from the court website by step and status',
+        ['step', 'status'])
+    SCRAPE_RETRIES = prometheus_client.Counter(
+        'court_scrape_retries_total', 'Search attempts retried, by reason', ['reason'])
+    BACKOFF_SLEEPS = prometheus_client.Counter(
+        'court_backoff_sleeps_total', 'Backoff sleeps before a retry, by reason', ['reason'])
+    BACKOFF_SECONDS = prometheus_client.Counter(
+        'court_backoff_sleep_seconds_total', 'Time slept backing off before retries, by reason', ['reason'])
+    UPSTREAM_REJECTED = prometheus_client.Counter(
+        'court_upstream_rejected_total', 'Requests not sent because the court website circuit was open or throttled',
+        ['reason'])
+    UPSTREAM_THROTTLE_SECONDS = prometheus_client.Counter(
+        'court_upstream_throttle_seconds_total', 'Time spent waiting for the adaptive upstream rate limit')
+else:
+    STAGE_SECONDS = SEARCH_SECONDS = HTTP_REQUEST_SECONDS = _NoopMetric()
+    UPSTREAM_RESPONSES = SCRAPE_RETRIES = BACKOFF_SLEEPS = BACKOFF_SECONDS = _NoopMetric()
+    UPSTREAM_REJECTED = UPSTREAM_THROTTLE_SECONDS = _NoopMetric()
+
+def metrics_available() -> bool:
+    return prometheus_client is not None
+
+@contextmanager
+def stage_timer(stage: str):
+    """Record the duration of the enclosed block (also when it raises) under court_stage_seconds and as a trace span"""
+    start = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+def record_upstream(step: str, status) -> None:
+    UPSTREAM_RESPONSES.labels(step, str(status)).inc()
+
+def record_retry(reason: str, sleep_seconds: float = 0) -> None:
+    """Count a retry and the backoff sleep preceding it"""
+    SCRAPE_RETRIES.labels(reason).inc()
+    if sleep_seconds > 0:
+        BACKOFF_SLEEPS.labels(reason).inc()
+        BACKOFF_SECONDS.labels(reason).inc(sleep_seconds)
+
+def record_upstream_rejection(reason: str) -> None:
+    UPSTREAM_REJECTED.labels(reason).inc()
+
+def record_upstream_throttle(seconds: float) -> None:
+    UPSTREAM_THROTTLE_SECONDS.inc(seconds)
+
+def backoff_sleep(seconds: float, reason: str) -> None:
+    record_retry(reason, seconds)
+    with span('backoff_sleep', reason=reason, seconds=seconds):
+        time.sleep(seconds)
+
+async def async_backoff_sleep(seconds: float, reason: str) -> None:
+    record_retry(reason, seconds)
+    with span('backoff_sleep', reason=reason, seconds=seconds):
+        await asyncio.sleep(seconds)
+
+def render_metrics() -> bytes:
+    """Current metrics in the Prometheus text format, across all workers in multiprocess mode"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return prometheus_client.generate_latest(registry)
+    return prometheus_client.generate_latest(prometheus_client.REGISTRY)
+
+def mark_process_dead(pid: int) -> None:
+    """Drop the live-gauge files of an exited worker (gunicorn child_exit hook)"""
+    if prometheus_client is not None and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
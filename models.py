@@ -1,29 +1,52 @@
 # models.py
 import os
-from datetime import datetime
+import json
+import re
+import uuid
+from datetime import datetime, timedelta
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from blobstore import compress_blob, decompress_blob, html_hash
+from cache import normalize_case_key
+from case_record import IGNORED_KEYS, CaseRecord
+from tracing import current_trace_id, span
 
 db = SQLAlchemy()
 
+def _query_case_key(context):
+    params = context.get_current_parameters()
+    return normalize_case_key(params['case_type'], params['case_number'], params['filing_year'])
+
 class Query(db.Model):
     __tablename__ = 'queries'
     id = db.Column(db.Integer, primary_key=True)
     case_type = db.Column(db.String(50), nullable=False)
     case_number = db.Column(db.String(20), nullable=False)
     filing_year = db.Column(db.String(4), nullable=False)
+    # normalize_case_key of the three fields above, filled on insert so SQL can group and join on it
+    case_key = db.Column(db.String(120), default=_query_case_key, index=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     ip_address = db.Column(db.String(45))
     user_agent = db.Column(db.Text)
     session_id = db.Column(db.String(255))
+    trace_id = db.Column(db.String(32))  # trace of the request that made the query, see /debug/trace
+
+    # (timestamp, id) serves newest-first keyset pagination of the query log
+    __table_args__ = (db.Index('ix_queries_timestamp_id', 'timestamp', 'id'),
+                      db.Index('ix_queries_case', 'case_number', 'filing_year'))
 
     responses = db.relationship('Response', backref='query', lazy=True, cascade='all, delete-orphan')
 
 class Response(db.Model):
     __tablename__ = 'responses'
     id = db.Column(db.Integer, primary_key=True)
-    query_id = db.Column(db.Integer, db.ForeignKey('queries.id'), nullable=False)
+    query_id = db.Column(db.Integer, db.ForeignKey('queries.id'), nullable=False, index=True)
 
-    raw_html = db.Column(db.Text)
+    raw_html = db.Column(db.Text)  # legacy inline copy; new rows use raw_html_hash
+    raw_html_hash = db.Column(db.String(64))
     response_status = db.Column(db.Integer)
     response_headers = db.Column(db.Text)
     parsed_json = db.Column(db.Text)
@@ -40,8 +63,213 @@ class Response(db.Model):
     judgment_pdf = db.Column(db.Text)
     order_pdf = db.Column(db.Text)
     scrape_timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    scrape_success = db.Column(db.Boolean, default=False)
+    scrape_success = db.Column(db.Boolean, default=False, index=True)
     error_message = db.Column(db.Text)
+    case_version = db.Column(db.Integer)  # version of the cases row this response saw
+
+    @property
+    def html(self):
+        if self.raw_html:
+            return self.raw_html
+        if self.raw_html_hash:
+            blob = db.session.get(HtmlBlob, self.raw_html_hash)
+            return blob.text() if blob else None
+        return None
+
+class HtmlBlob(db.Model):
+    __tablename__ = 'html_blobs'
+    hash = db.Column(db.String(64), primary_key=True)
+    codec = db.Column(db.String(10), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def text(self):
+        return decompress_blob(self.codec, self.data)
+
+class Case(db.Model):
+    """Current state of a case, one row per normalized case key"""
+    __tablename__ = 'cases'
+    case_key = db.Column(db.String(120), primary_key=True)
+    case_type = db.Column(db.String(50), nullable=False)
+    case_number = db.Column(db.String(20), nullable=False)
+    filing_year = db.Column(db.String(4), nullable=False)
+
+    parsed_json = db.Column(db.Text, nullable=False)
+    case_title = db.Column(db.Text)
+    petitioner = db.Column(db.Text)
+    respondent = db.Column(db.Text)
+    filing_date = db.Column(db.String(20))
+    next_hearing_date = db.Column(db.String(20))
+    latest_order = db.Column(db.Text)
+    judge_name = db.Column(db.String(255))
+    court_number = db.Column(db.String(50))
+    case_status = db.Column(db.String(100))
+    pdf_link = db.Column(db.Text)
+
+    version = db.Column(db.Integer, default=1, nullable=False)
+    first_seen = db.Column(db.DateTime, nullable=False)
+    last_changed = db.Column(db.DateTime, nullable=False)
+    last_scraped = db.Column(db.DateTime, nullable=False)
+
+    @property
+    def data(self):
+        return json.loads(self.parsed_json)
+
+    def to_dict(self):
+        return {
+            'case_key': self.case_key,
+            'case_type': self.case_type,
+            'case_number': self.case_number,
+            'filing_year': self.filing_year,
+            'version': self.version,
+            'first_seen': self.first_seen.isoformat(),
+            'last_changed': self.last_changed.isoformat(),
+            'last_scraped': self.last_scraped.isoformat(),
+            'case_data': self.data
+        }
+
+class CaseChange(db.Model):
+    """One field that changed between two versions of a case (values JSON-encoded, NULL = absent)"""
+    __tablename__ = 'case_changes'
+    id = db.Column(db.Integer, primary_key=True)
+    case_key = db.Column(db.String(120), db.ForeignKey('cases.case_key'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False)
+    field = db.Column(db.String(50), nullable=False)
+    old_value = db.Column(db.Text)
+    new_value = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index('ix_case_changes_case_version', 'case_key', 'version'),
+    )
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'changed_at': self.changed_at.isoformat(),
+            'field': self.field,
+            'old': json.loads(self.old_value) if self.old_value is not None else None,
+            'new': json.loads(self.new_value) if self.new_value is not None else None
+        }
+
+class WatchedCase(db.Model):
+    """A case the refresh scheduler keeps up to date"""
+    __tablename__ = 'watchlist'
+    case_key = db.Column(db.String(120), primary_key=True)
+    case_type = db.Column(db.String(50), nullable=False)
+    case_number = db.Column(db.String(20), nullable=False)
+    filing_year = db.Column(db.String(4), nullable=False)
+    added_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    next_refresh_at = db.Column(db.DateTime, nullable=False, index=True)
+    last_refreshed_at = db.Column(db.DateTime)
+    refresh_count = db.Column(db.Integer, default=0, nullable=False)
+    consecutive_failures = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+
+    def to_dict(self):
+        return {
+            'case_key': self.case_key,
+            'case_type': self.case_type,
+            'case_number': self.case_number,
+            'filing_year': self.filing_year,
+            'added_at': self.added_at.isoformat(),
+            'next_refresh_at': self.next_refresh_at.isoformat(),
+            'last_refreshed_at': self.last_refreshed_at.isoformat() if self.last_refreshed_at else None,
+            'refresh_count': self.refresh_count,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error
+        }
+
+class WebhookSubscription(db.Model):
+    """Endpoint notified when watched fields of a case (or of every case) change"""
+    __tablename__ = 'webhook_subscriptions'
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.Text, nullable=False)
+    secret = db.Column(db.String(64), nullable=False)
+    case_key = db.Column(db.String(120), index=True)  # NULL: every case
+    fields = db.Column(db.Text, nullable=False)  # comma-separated
+    active = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    next_attempt_at = db.Column(db.DateTime)
+    consecutive_failures = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'url': self.url,
+            'case_key': self.case_key,
+            'fields': self.fields.split(','),
+            'active': self.active,
+            'created_at': self.created_at.isoformat(),
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error
+        }
+
+class WebhookOutbox(db.Model):
+    """A change notification waiting to be delivered to one subscription"""
+    __tablename__ = 'webhook_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    subscription_id = db.Column(db.Integer, db.ForeignKey('webhook_subscriptions.id'), nullable=False)
+    case_key = db.Column(db.String(120), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    status = db.Column(db.String(10), default='pending', nullable=False)  # pending / delivered / dead
+    delivered_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_webhook_outbox_pending', 'status', 'subscription_id', 'id'),
+    )
+
+class StatsRollup(db.Model):
+    """Search counters per case type for one hour, one day, or all time ('total')"""
+    __tablename__ = 'stats_rollups'
+    period = db.Column(db.String(5), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    case_type = db.Column(db.String(50), primary_key=True)
+    searches = db.Column(db.Integer, default=0, nullable=False)
+    successes = db.Column(db.Integer, default=0, nullable=False)
+    failures = db.Column(db.Integer, default=0, nullable=False)
+    cache_hits = db.Column(db.Integer, default=0, nullable=False)
+    latency_count = db.Column(db.Integer, default=0, nullable=False)
+    latency_sum_ms = db.Column(db.BigInteger, default=0, nullable=False)
+
+class LatencyRollup(db.Model):
+    """Latency histogram matching stats_rollups; le_ms is the bucket's upper bound"""
+    __tablename__ = 'stats_latency'
+    period = db.Column(db.String(5), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    case_type = db.Column(db.String(50), primary_key=True)
+    le_ms = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+class TraceSpan(db.Model):
+    """A finished tracing span of a request that logged a query"""
+    __tablename__ = 'trace_spans'
+    id = db.Column(db.Integer, primary_key=True)
+    trace_id = db.Column(db.String(32), nullable=False, index=True)
+    span_id = db.Column(db.String(16), nullable=False)
+    parent_id = db.Column(db.String(16))
+    name = db.Column(db.String(100), nullable=False)
+    start_us = db.Column(db.BigInteger, nullable=False)  # microseconds since the epoch
+    duration_ms = db.Column(db.Float, nullable=False)
+    error = db.Column(db.Text)
+    attributes = db.Column(db.Text)
+
+    def to_dict(self):
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_us': self.start_us,
+            'duration_ms': round(self.duration_ms, 3),
+            'error': self.error,
+            'attributes': json.loads(self.attributes) if self.attributes else {}
+        }
 
 class CaptchaLog(db.Model):
     __tablename__ = 'captcha_logs'
@@ -53,24 +281,179 @@ class CaptchaLog(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     ip_address = db.Column(db.String(45))
 
+class SearchJob(db.Model):
+    __tablename__ = 'search_jobs'
+    id = db.Column(db.String(32), primary_key=True)
+    query_id = db.Column(db.Integer, db.ForeignKey('queries.id'))
+    case_type = db.Column(db.String(50), nullable=False)
+    case_number = db.Column(db.String(20), nullable=False)
+    filing_year = db.Column(db.String(4), nullable=False)
+    status = db.Column(db.String(20), default='queued', nullable=False, index=True)
+    success = db.Column(db.Boolean)
+    result_json = db.Column(db.Text)
+    error_message = db.Column(db.Text)
+    response_id = db.Column(db.Integer)
+    worker = db.Column(db.String(100))
+    attempts = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'query_id': self.query_id,
+            'case_type': self.case_type,
+            'case_number': self.case_number,
+            'filing_year': self.filing_year,
+            'success': self.success,
+            'case_data': json.loads(self.result_json) if self.result_json else None,
+            'error': self.error_message,
+            'response_id': self.response_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+# Columns added after a table was first created; create_all() does not add
+# columns or indexes to existing tables, so _upgrade_schema adds whatever is missing.
+SCHEMA_UPGRADES = {
+    'responses': {'raw_html_hash': 'VARCHAR(64)', 'case_version': 'INTEGER'},
+    'queries': {'trace_id': 'VARCHAR(32)', 'case_key': 'VARCHAR(120)'},
+}
+
+def _upgrade_schema():
+    inspector = db.inspect(db.engine)
+    for table, columns in SCHEMA_UPGRADES.items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        for name, ddl in columns.items():
+            if name not in existing:
+                db.session.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+    db.session.commit()
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def backfill_query_case_keys(batch_size=5000):
+    """Fill queries.case_key for rows logged before the column existed; returns the number updated"""
+    updated = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Query.id, Query.case_type, Query.case_number, Query.filing_year)
+            .where(Query.case_key.is_(None)).limit(batch_size)).all()
+        if not rows:
+            return updated
+        db.session.execute(db.update(Query), [
+            {'id': row.id, 'case_key': normalize_case_key(row.case_type, row.case_number, row.filing_year)}
+            for row in rows])
+        db.session.commit()
+        updated += len(rows)
+
 def init_db(app):
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get("DATABASE_URL", "sqlite:///court.db")
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     db.init_app(app)
     with app.app_context():
         db.create_all()
+        _upgrade_schema()
+        backfill_query_case_keys()
+        _init_fulltext()
+
+# Dashboard statistics rollups
+
+STATS_EPOCH = datetime(1970, 1, 1)
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+def latency_bucket(latency_ms):
+    """Upper bound of the histogram bucket for latency_ms (the last bucket also holds anything slower)"""
+    for bound in LATENCY_BUCKETS_MS:
+        if latency_ms <= bound:
+            return bound
+    return LATENCY_BUCKETS_MS[-1]
+
+def _stats_buckets(moment):
+    return (('hour', moment.replace(minute=0, second=0, microsecond=0)),
+            ('day', moment.replace(hour=0, minute=0, second=0, microsecond=0)),
+            ('total', STATS_EPOCH))
+
+def _upsert_increments(model, keys, increments):
+    """INSERT ... ON CONFLICT DO UPDATE adding increments to the existing counters"""
+    insert = postgresql_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    stmt = insert(model).values(**keys, **increments)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: getattr(model, name) + stmt.excluded[name] for name in increments})
+    db.session.execute(stmt)
+
+def record_stats(case_type, moment=None, latency_ms=None, **increments):
+    """Add counters to the hour, day and all-time rollups (committed by the caller)"""
+    if latency_ms is not None:
+        latency_ms = max(int(latency_ms), 0)
+        increments.update(latency_count=1, latency_sum_ms=latency_ms)
+    for period, bucket_start in _stats_buckets(moment or datetime.utcnow()):
+        keys = {'period': period, 'bucket_start': bucket_start, 'case_type': case_type or ''}
+        _upsert_increments(StatsRollup, keys, increments)
+        if latency_ms is not None:
+            _upsert_increments(LatencyRollup, {**keys, 'le_ms': latency_bucket(latency_ms)}, {'count': 1})
 
 def log_query(case_type, case_number, filing_year, ip_address=None, user_agent=None, session_id=None):
-    query = Query(case_type=case_type, case_number=case_number, filing_year=filing_year,
-                  ip_address=ip_address, user_agent=user_agent, session_id=session_id)
-    db.session.add(query)
-    db.session.commit()
+    with span('models.log_query'):
+        query = Query(case_type=case_type, case_number=case_number, filing_year=filing_year,
+                      ip_address=ip_address, user_agent=user_agent, session_id=session_id,
+                      timestamp=datetime.utcnow(), trace_id=current_trace_id())
+        db.session.add(query)
+        record_stats(case_type, query.timestamp, searches=1)
+        with span('db.commit'):
+            db.session.commit()
     return query
 
-def log_response(query_id, **kwargs):
-    response = Response(query_id=query_id, **kwargs)
-    db.session.add(response)
-    db.session.commit()
+def store_html_blob(html):
+    """Add html to html_blobs unless an identical page is already stored; returns its hash"""
+    encoded = html.encode()
+    digest = html_hash(encoded)
+    if db.session.get(HtmlBlob, digest) is None:
+        codec, data = compress_blob(encoded)
+        try:
+            with db.session.begin_nested():
+                db.session.add(HtmlBlob(hash=digest, codec=codec, size=len(encoded), data=data))
+        except IntegrityError:
+            pass  # stored concurrently by another worker
+    return digest
+
+def log_response(query_id, raw_html=None, latency_ms=None, cache_hit=False, case_record=None, **kwargs):
+    """
+    Log the outcome of a search
+
+    Successful results are folded into the canonical cases row, and
+    case_version records which version of it the response saw. The response
+    keeps its own parsed fields too, so the response log, the full-text
+    index and the query-log views read every row on its own. Cache hits do
+    not touch the cases row. Pass the CaseRecord that parsed_json was serialized from as case_record
+    to save parsing it back.
+    """
+    with span('models.log_response'):
+        if raw_html:
+            with span('db.store_html_blob'):
+                kwargs['raw_html_hash'] = store_html_blob(raw_html)
+        success = bool(kwargs.get('scrape_success'))
+        query = db.session.get(Query, query_id)
+        scraped_at = datetime.utcnow()
+        if success and kwargs.get('parsed_json') and query is not None:
+            version = db.session.query(Case.version).filter_by(case_key=query.case_key).scalar() if cache_hit else None
+            if version is None:
+                with span('db.update_case'):
+                    record = case_record or CaseRecord.from_json(kwargs['parsed_json'])
+                    version, _ = update_case(query.case_type, query.case_number, query.filing_year,
+                                             record, scraped_at)
+            kwargs['case_version'] = version
+        response = Response(query_id=query_id, scrape_timestamp=scraped_at, **kwargs)
+        db.session.add(response)
+        record_stats(query.case_type if query else None, scraped_at, latency_ms=latency_ms,
+                     successes=int(success), failures=int(not success), cache_hits=int(cache_hit))
+        with span('db.commit'):
+            db.session.commit()
     return response
 
 def log_captcha(**kwargs):
@@ -82,6 +465,713 @@ def log_captcha(**kwargs):
 def get_recent_queries(limit=50):
     return Query.query.order_by(Query.timestamp.desc()).limit(limit).all()
 
+QUERY_LOG_COLUMNS = ('id', 'timestamp', 'case_type', 'case_number', 'filing_year',
+                     'ip_address', 'user_agent', 'session_id', 'trace_id')
+
+def encode_log_cursor(timestamp, query_id):
+    return f"{timestamp.isoformat()}_{query_id}"
+
+def decode_log_cursor(cursor):
+    """Inverse of encode_log_cursor; raises ValueError on malformed input"""
+    timestamp, _, query_id = cursor.rpartition('_')
+    return datetime.fromisoformat(timestamp), int(query_id)
+
+def _query_log_select(case_type=None, filing_year=None, ip_address=None, since=None, until=None):
+    stmt = db.select(*(getattr(Query, column) for column in QUERY_LOG_COLUMNS))
+    if case_type:
+        stmt = stmt.where(Query.case_type == case_type)
+    if filing_year:
+        stmt = stmt.where(Query.filing_year == filing_year)
+    if ip_address:
+        stmt = stmt.where(Query.ip_address == ip_address)
+    if since:
+        stmt = stmt.where(Query.timestamp >= since)
+    if until:
+        stmt = stmt.where(Query.timestamp < until)
+    return stmt.order_by(Query.timestamp.desc(), Query.id.desc())
+
+def _after_cursor(stmt, cursor):
+    timestamp, query_id = cursor
+    return stmt.where(db.or_(Query.timestamp < timestamp,
+                             db.and_(Query.timestamp == timestamp, Query.id < query_id)))
+
+def get_query_log_page(limit=50, cursor=None, **filters):
+    """
+    One newest-first page of the query log using keyset pagination
+
+    Returns (rows, next_cursor); rows are dicts of QUERY_LOG_COLUMNS and
+    next_cursor is None on the last page.
+    """
+    stmt = _query_log_select(**filters)
+    if cursor:
+        stmt = _after_cursor(stmt, decode_log_cursor(cursor))
+    rows = [row._asdict() for row in db.session.execute(stmt.limit(limit + 1))]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_log_cursor(rows[-1]['timestamp'], rows[-1]['id'])
+    return rows, next_cursor
+
+def iter_query_logs(batch_size=1000, **filters):
+    """Yield every matching query log row, fetching one keyset batch at a time"""
+    stmt = _query_log_select(**filters)
+    cursor = None
+    while True:
+        page = stmt if cursor is None else _after_cursor(stmt, cursor)
+        rows = [row._asdict() for row in db.session.execute(page.limit(batch_size))]
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        cursor = (rows[-1]['timestamp'], rows[-1]['id'])
+
+# Canonical case rows and their change history
+
+CASE_COLUMNS = ('case_title', 'petitioner', 'respondent', 'filing_date', 'next_hearing_date',
+                'latest_order', 'judge_name', 'court_number', 'case_status', 'pdf_link')
+# Parsed keys that describe the scrape rather than the case
+CASE_IGNORED_KEYS = IGNORED_KEYS
+
+def diff_case_data(old, new):
+    """Changed fields between two parsed results: {field: (old JSON, new JSON)}, None meaning absent"""
+    changes = {}
+    for field in sorted(old.keys() | new.keys()):
+        if field in old and field in new and old[field] == new[field]:
+            continue
+        changes[field] = (json.dumps(old[field]) if field in old else None,
+                          json.dumps(new[field]) if field in new else None)
+    return changes
+
+def _case_values(record, moment):
+    values = {column: record.get(column) for column in CASE_COLUMNS}
+    values.update(parsed_json=record.to_json(), last_changed=moment, last_scraped=moment)
+    return values
+
+def update_case(case_type, case_number, filing_year, case_data, moment=None, attempts=5, notify=True):
+    """
+    Fold one successful scrape into the canonical cases row
+
+    Field-level differences from the current row are recorded in
+    case_changes under the next version number and, when notify is set,
+    queued for matching webhook subscriptions in the same transaction.
+    Concurrent writers are resolved optimistically on the version column.
+    case_data may be a dict or a CaseRecord. Does not commit.
+
+    Returns (version, changed).
+    """
+    moment = moment or datetime.utcnow()
+    case_key = normalize_case_key(case_type, case_number, filing_year)
+    # CaseRecord drops CASE_IGNORED_KEYS
+    record = case_data if isinstance(case_data, CaseRecord) else CaseRecord.from_dict(case_data)
+    for _ in range(attempts):
+        current = db.session.execute(
+            db.select(Case.version, Case.parsed_json).where(Case.case_key == case_key)).first()
+        if current is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(Case).values(
+                        case_key=case_key, case_type=case_type, case_number=case_number,
+                        filing_year=filing_year, version=1, first_seen=moment, **_case_values(record, moment)))
+                return 1, True
+            except IntegrityError:
+                continue
+
+        changes = diff_case_data(json.loads(current.parsed_json), record.to_dict())
+        if not changes:
+            db.session.execute(db.update(Case).where(Case.case_key == case_key)
+                               .values(last_scraped=moment).execution_options(synchronize_session=False))
+            return current.version, False
+
+        version = current.version + 1
+        result = db.session.execute(
+            db.update(Case).where(Case.case_key == case_key, Case.version == current.version)
+            .values(version=version, **_case_values(record, moment))
+            .execution_options(synchronize_session=False))
+        if result.rowcount != 1:
+            continue
+        db.session.add_all(CaseChange(case_key=case_key, version=version, changed_at=moment, field=field,
+                                      old_value=old_value, new_value=new_value)
+                           for field, (old_value, new_value) in changes.items())
+        if notify:
+            enqueue_change_notifications(case_key, version, changes, moment)
+        return version, True
+    raise RuntimeError(f"Case {case_key} kept changing underneath {attempts} update attempts")
+
+def get_case(case_type, case_number, filing_year):
+    """Canonical row for a case (primary key lookup), or None"""
+    return db.session.get(Case, normalize_case_key(case_type, case_number, filing_year))
+
+def get_case_changes(case_key, limit=100):
+    """Most recent field changes of a case, newest first"""
+    return db.session.execute(
+        db.select(CaseChange).where(CaseChange.case_key == case_key)
+        .order_by(CaseChange.version.desc(), CaseChange.id).limit(limit)).scalars().all()
+
+def get_case_history(case_type, case_number, filing_year):
+    """
+    Every distinct version of a case, oldest first
+
+    Rebuilt from the canonical row by undoing its recorded changes.
+    Returns a list of (time the version was first seen, case_data).
+    """
+    case = get_case(case_type, case_number, filing_year)
+    if case is None:
+        return []
+    changes_by_version = {}
+    for change in db.session.execute(
+            db.select(CaseChange).where(CaseChange.case_key == case.case_key)).scalars():
+        changes_by_version.setdefault(change.version, []).append(change)
+
+    data = case.data
+    history = []
+    for version in range(case.version, 0, -1):
+        changes = changes_by_version.get(version, [])
+        seen = changes[0].changed_at if changes else case.first_seen
+        history.append((seen, dict(data)))
+        for change in changes:
+            if change.old_value is None:
+                data.pop(change.field, None)
+            else:
+                data[change.field] = json.loads(change.old_value)
+    history.reverse()
+    return history
+
+def rebuild_cases(batch_size=5000):
+    """
+    Recompute cases and case_changes by replaying every successful response in order
+
+    For databases that predate the canonical table (responses are replayed
+    in id order). Returns the number of cases.
+    """
+    db.session.query(CaseChange).delete()
+    db.session.query(Case).delete()
+    db.session.commit()
+
+    cases = set()
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            db.select(Response.id, Response.scrape_timestamp, Response.parsed_json,
+                      Query.case_type, Query.case_number, Query.filing_year)
+            .join(Query, Response.query_id == Query.id)
+            .where(Response.id > last_id, Response.scrape_success.is_(True), Response.parsed_json.isnot(None))
+            .order_by(Response.id).limit(batch_size)).all()
+        if not batch:
+            break
+        for row in batch:
+            version, _ = update_case(row.case_type, row.case_number, row.filing_year,
+                                     CaseRecord.from_json(row.parsed_json), row.scrape_timestamp or datetime.utcnow(),
+                                     notify=False)
+            db.session.execute(db.update(Response).where(Response.id == row.id).values(case_version=version)
+                               .execution_options(synchronize_session=False))
+            cases.add(normalize_case_key(row.case_type, row.case_number, row.filing_year))
+        db.session.commit()
+        last_id = batch[-1].id
+    return len(cases)
+
+# Watchlist of cases refreshed by the scheduler
+
+def add_to_watchlist(cases, first_refresh_at=None):
+    """
+    Watch each {case_type, case_number, filing_year}; already watched cases are left alone
+
+    New entries are due at first_refresh_at (default now). Returns the number added.
+    """
+    first_refresh_at = first_refresh_at or datetime.utcnow()
+    added = 0
+    for case in cases:
+        case_key = normalize_case_key(case['case_type'], case['case_number'], case['filing_year'])
+        if db.session.get(WatchedCase, case_key) is not None:
+            continue
+        db.session.add(WatchedCase(case_key=case_key, case_type=case['case_type'],
+                                   case_number=case['case_number'], filing_year=case['filing_year'],
+                                   next_refresh_at=first_refresh_at))
+        added += 1
+    db.session.commit()
+    return added
+
+def remove_from_watchlist(case_key):
+    removed = db.session.query(WatchedCase).filter_by(case_key=case_key).delete()
+    db.session.commit()
+    return bool(removed)
+
+def get_watched_case(case_key):
+    return db.session.get(WatchedCase, case_key)
+
+def get_watchlist(limit=100, offset=0):
+    """Watched cases, next due first"""
+    return db.session.execute(
+        db.select(WatchedCase).order_by(WatchedCase.next_refresh_at, WatchedCase.case_key)
+        .limit(limit).offset(offset)).scalars().all()
+
+def get_due_watched_cases(now=None, limit=10):
+    """Watched cases whose refresh time has passed, most overdue first"""
+    now = now or datetime.utcnow()
+    return db.session.execute(
+        db.select(WatchedCase).where(WatchedCase.next_refresh_at <= now)
+        .order_by(WatchedCase.next_refresh_at).limit(limit)).scalars().all()
+
+def get_next_watch_due():
+    return db.session.query(db.func.min(WatchedCase.next_refresh_at)).scalar()
+
+def record_watch_refresh(case_key, success, next_refresh_at, error_message=None):
+    watched = db.session.get(WatchedCase, case_key)
+    if watched is None:
+        return
+    watched.next_refresh_at = next_refresh_at
+    if success:
+        watched.last_refreshed_at = datetime.utcnow()
+        watched.refresh_count += 1
+        watched.consecutive_failures = 0
+        watched.last_error = None
+    else:
+        watched.consecutive_failures += 1
+        watched.last_error = error_message
+    db.session.commit()
+
+# Webhook subscriptions and their transactional outbox
+
+WEBHOOK_FIELDS = ('next_hearing_date', 'case_status', 'latest_order')
+
+def create_webhook_subscription(url, secret, case_key=None, fields=WEBHOOK_FIELDS):
+    subscription = WebhookSubscription(url=url, secret=secret, case_key=case_key, fields=','.join(fields))
+    db.session.add(subscription)
+    db.session.commit()
+    return subscription
+
+def get_webhook_subscriptions():
+    return db.session.execute(db.select(WebhookSubscription).order_by(WebhookSubscription.id)).scalars().all()
+
+def deactivate_webhook_subscription(subscription_id):
+    updated = db.session.query(WebhookSubscription).filter_by(id=subscription_id, active=True).update(
+        {'active': False}, synchronize_session=False)
+    db.session.commit()
+    return bool(updated)
+
+def enqueue_change_notifications(case_key, version, changes, moment):
+    """Queue one outbox row per active subscription interested in any of the changed fields"""
+    subscriptions = db.session.execute(
+        db.select(WebhookSubscription).where(
+            WebhookSubscription.active.is_(True),
+            db.or_(WebhookSubscription.case_key == case_key, WebhookSubscription.case_key.is_(None)))).scalars()
+    for subscription in subscriptions:
+        fields = subscription.fields.split(',')
+        relevant = {field: {'old': json.loads(old) if old is not None else None,
+                            'new': json.loads(new) if new is not None else None}
+                    for field, (old, new) in changes.items() if field in fields}
+        if not relevant:
+            continue
+        payload = {'case_key': case_key, 'version': version, 'changed_at': moment.isoformat() + 'Z',
+                   'changes': relevant}
+        db.session.add(WebhookOutbox(subscription_id=subscription.id, case_key=case_key, version=version,
+                                     payload=json.dumps(payload), created_at=moment))
+
+def get_deliverable_subscription_ids(now=None):
+    """Active subscriptions with pending notifications that are not backing off"""
+    now = now or datetime.utcnow()
+    return db.session.execute(
+        db.select(WebhookSubscription.id)
+        .where(WebhookSubscription.active.is_(True),
+               db.or_(WebhookSubscription.next_attempt_at.is_(None), WebhookSubscription.next_attempt_at <= now),
+               db.exists().where(WebhookOutbox.subscription_id == WebhookSubscription.id,
+                                 WebhookOutbox.status == 'pending'))
+        .order_by(WebhookSubscription.id)).scalars().all()
+
+def get_pending_notifications(subscription_id, limit=100):
+    """Oldest pending outbox rows of one subscription, in the order they were queued"""
+    return db.session.execute(
+        db.select(WebhookOutbox).where(WebhookOutbox.subscription_id == subscription_id,
+                                       WebhookOutbox.status == 'pending')
+        .order_by(WebhookOutbox.id).limit(limit)).scalars().all()
+
+def record_webhook_delivery(subscription_id, outbox_ids, success, error_message=None,
+                            retry_at=None, max_attempts=10):
+    """
+    Mark a batch delivered, or count the failed attempt and back the subscription off
+
+    Notifications that have failed max_attempts times are moved to 'dead'.
+    """
+    now = datetime.utcnow()
+    subscription = db.session.get(WebhookSubscription, subscription_id)
+    outbox = db.session.query(WebhookOutbox).filter(WebhookOutbox.id.in_(outbox_ids))
+    if success:
+        outbox.update({'status': 'delivered', 'delivered_at': now, 'attempts': WebhookOutbox.attempts + 1},
+                      synchronize_session=False)
+        subscription.consecutive_failures = 0
+        subscription.next_attempt_at = None
+        subscription.last_error = None
+    else:
+        outbox.update({'attempts': WebhookOutbox.attempts + 1}, synchronize_session=False)
+        db.session.query(WebhookOutbox).filter(WebhookOutbox.id.in_(outbox_ids),
+                                               WebhookOutbox.attempts >= max_attempts).update(
+            {'status': 'dead'}, synchronize_session=False)
+        subscription.consecutive_failures += 1
+        subscription.next_attempt_at = retry_at
+        subscription.last_error = error_message
+    db.session.commit()
+
+def get_webhook_outbox_counts():
+    return dict(db.session.query(WebhookOutbox.status, db.func.count()).group_by(WebhookOutbox.status).all())
+
+# Request traces
+
+def store_trace_spans(spans):
+    """Insert the finished spans of a trace (tracing.Span objects)"""
+    db.session.execute(db.insert(TraceSpan), [{
+        'trace_id': s.trace_id,
+        'span_id': s.span_id,
+        'parent_id': s.parent_id,
+        'name': s.name,
+        'start_us': s.start_ns // 1000,
+        'duration_ms': s.duration_ms,
+        'error': s.error,
+        'attributes': json.dumps(s.attributes, default=str) if s.attributes else None
+    } for s in spans])
+    db.session.commit()
+
+def get_trace_spans(trace_id):
+    return db.session.query(TraceSpan).filter_by(trace_id=trace_id).order_by(TraceSpan.start_us, TraceSpan.id).all()
+
+def prune_trace_spans(before):
+    """Delete spans that started before the given datetime; returns the number deleted"""
+    cutoff = int((before - STATS_EPOCH).total_seconds() * 1_000_000)
+    deleted = db.session.execute(db.delete(TraceSpan).where(TraceSpan.start_us < cutoff)).rowcount
+    db.session.commit()
+    return deleted
+
 def get_successful_responses(limit=20):
-    return Response.query.filter_by(scrape_success=True).order_by(
+    return db.session.query(Response).filter_by(scrape_success=True).order_by(
         Response.scrape_timestamp.desc()).limit(limit).all()
+
+def create_search_job(case_type, case_number, filing_year, query_id=None):
+    job = SearchJob(id=uuid.uuid4().hex, query_id=query_id, case_type=case_type,
+                    case_number=case_number, filing_year=filing_year, status='queued')
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def get_search_job(job_id):
+    return db.session.get(SearchJob, job_id)
+
+def claim_search_job(job_id, worker):
+    """Atomically move a queued job to running; False if another worker got it first"""
+    claimed = SearchJob.query.filter_by(id=job_id, status='queued').update({
+        'status': 'running',
+        'worker': worker,
+        'started_at': datetime.utcnow(),
+        'attempts': SearchJob.attempts + 1
+    }, synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+def finish_search_job(job_id, success, case_data=None, error_message=None, response_id=None):
+    job = db.session.get(SearchJob, job_id)
+    job.status = 'done' if success else 'failed'
+    job.success = success
+    job.result_json = json.dumps(case_data) if case_data else None
+    job.error_message = error_message
+    job.response_id = response_id
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+def get_pending_search_job_ids(stale_before):
+    """Queued jobs, plus running jobs whose worker died before stale_before"""
+    SearchJob.query.filter(SearchJob.status == 'running', SearchJob.started_at < stale_before).update(
+        {'status': 'queued'}, synchronize_session=False)
+    db.session.commit()
+    return [job_id for (job_id,) in db.session.query(SearchJob.id).filter_by(status='queued')
+            .order_by(SearchJob.created_at).all()]
+
+def migrate_inline_html(batch_size=500):
+    """Move legacy responses.raw_html values into html_blobs; returns the number of rows moved"""
+    moved = 0
+    while True:
+        batch = db.session.query(Response).filter(Response.raw_html.isnot(None)).order_by(
+            Response.id).limit(batch_size).all()
+        if not batch:
+            return moved
+        for response in batch:
+            if response.raw_html:
+                response.raw_html_hash = store_html_blob(response.raw_html)
+            response.raw_html = None
+        db.session.commit()
+        moved += len(batch)
+
+def _latency_percentiles(histogram, count):
+    """p50/p90/p99 as histogram bucket upper bounds"""
+    percentiles = {}
+    for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+        if not count:
+            percentiles[name] = None
+            continue
+        cumulative = 0
+        for bound in sorted(histogram):
+            cumulative += histogram[bound]
+            if cumulative >= fraction * count:
+                percentiles[name] = bound
+                break
+    return percentiles
+
+def _summarize(counters, histogram):
+    latency_count = counters['latency_count']
+    return {
+        'searches': counters['searches'],
+        'successes': counters['successes'],
+        'failures': counters['failures'],
+        'cache_hits': counters['cache_hits'],
+        'success_rate': round(counters['successes'] / max(counters['searches'], 1) * 100, 2),
+        'latency_ms': {
+            'count': latency_count,
+            'mean': round(counters['latency_sum_ms'] / latency_count, 1) if latency_count else None,
+            **_latency_percentiles(histogram, latency_count)
+        }
+    }
+
+STATS_COUNTERS = ('searches', 'successes', 'failures', 'cache_hits', 'latency_count', 'latency_sum_ms')
+
+def get_dashboard_stats(since=None, until=None):
+    """
+    Dashboard statistics from the rollup tables
+
+    Without a window the all-time rows are read. With one, hourly buckets
+    are summed for windows up to a week and daily buckets beyond that;
+    since is rounded down to the start of its bucket.
+    """
+    if since is None and until is None:
+        period = 'total'
+    else:
+        until = until or datetime.utcnow()
+        since = since or STATS_EPOCH
+        period = 'hour' if until - since <= timedelta(days=7) else 'day'
+
+    def window(model):
+        stmt = db.select(model).where(model.period == period)
+        if period != 'total':
+            bucket_floor = _stats_buckets(since)[0 if period == 'hour' else 1][1]
+            stmt = stmt.where(model.bucket_start >= bucket_floor, model.bucket_start < until)
+        return stmt
+
+    counters, histograms = {}, {}
+    for row in db.session.execute(window(StatsRollup)).scalars():
+        totals = counters.setdefault(row.case_type, dict.fromkeys(STATS_COUNTERS, 0))
+        for name in STATS_COUNTERS:
+            totals[name] += getattr(row, name)
+    for row in db.session.execute(window(LatencyRollup)).scalars():
+        histogram = histograms.setdefault(row.case_type, {})
+        histogram[row.le_ms] = histogram.get(row.le_ms, 0) + row.count
+
+    overall = dict.fromkeys(STATS_COUNTERS, 0)
+    overall_histogram = {}
+    for totals in counters.values():
+        for name in STATS_COUNTERS:
+            overall[name] += totals[name]
+    for histogram in histograms.values():
+        for bound, count in histogram.items():
+            overall_histogram[bound] = overall_histogram.get(bound, 0) + count
+
+    return {
+        'period': period,
+        'since': since.isoformat() if period != 'total' else None,
+        'until': until.isoformat() if period != 'total' else None,
+        **_summarize(overall, overall_histogram),
+        'by_case_type': {case_type: _summarize(totals, histograms.get(case_type, {}))
+                         for case_type, totals in sorted(counters.items())}
+    }
+
+def rebuild_stats(batch_size=5000):
+    """
+    Recompute the rollups from the queries and responses tables
+
+    Latency is taken as the time from the query to its response row;
+    cache hits are not recorded in the logs and start from zero.
+    """
+    db.session.query(StatsRollup).delete()
+    db.session.query(LatencyRollup).delete()
+
+    counters, histograms = {}, {}
+
+    def add(case_type, moment, latency_ms=None, **increments):
+        for period, bucket_start in _stats_buckets(moment):
+            key = (period, bucket_start, case_type or '')
+            totals = counters.setdefault(key, dict.fromkeys(STATS_COUNTERS, 0))
+            for name, value in increments.items():
+                totals[name] += value
+            if latency_ms is not None:
+                totals['latency_count'] += 1
+                totals['latency_sum_ms'] += latency_ms
+                bound = latency_bucket(latency_ms)
+                histograms[key + (bound,)] = histograms.get(key + (bound,), 0) + 1
+
+    for case_type, timestamp in db.session.execute(
+            db.select(Query.case_type, Query.timestamp).where(Query.timestamp.isnot(None)).execution_options(
+                yield_per=batch_size)):
+        add(case_type, timestamp, searches=1)
+
+    for case_type, queried_at, responded_at, success in db.session.execute(
+            db.select(Query.case_type, Query.timestamp, Response.scrape_timestamp, Response.scrape_success)
+            .join(Response, Response.query_id == Query.id)
+            .where(Response.scrape_timestamp.isnot(None)).execution_options(yield_per=batch_size)):
+        latency_ms = None
+        if queried_at is not None and responded_at >= queried_at:
+            latency_ms = int((responded_at - queried_at).total_seconds() * 1000)
+        add(case_type, responded_at, latency_ms=latency_ms,
+            successes=int(bool(success)), failures=int(not success))
+
+    db.session.bulk_insert_mappings(StatsRollup, [
+        {'period': period, 'bucket_start': bucket_start, 'case_type': case_type, **totals}
+        for (period, bucket_start, case_type), totals in counters.items()])
+    db.session.bulk_insert_mappings(LatencyRollup, [
+        {'period': period, 'bucket_start': bucket_start, 'case_type': case_type, 'le_ms': bound, 'count': count}
+        for (period, bucket_start, case_type, bound), count in histograms.items()])
+    db.session.commit()
+    return len(counters)
+
+# Full-text search over scraped responses (SQLite FTS5)
+
+FULLTEXT_COLUMNS = ('case_title', 'petitioner', 'respondent', 'judge_name', 'latest_order')
+# bm25 weights, in FULLTEXT_COLUMNS order: party and judge names outrank order text
+FULLTEXT_WEIGHTS = (2.0, 4.0, 4.0, 3.0, 1.0)
+FULLTEXT_FIELDS = {
+    'title': ('case_title',),
+    'party': ('petitioner', 'respondent'),
+    'petitioner': ('petitioner',),
+    'respondent': ('respondent',),
+    'judge': ('judge_name',),
+    'order': ('latest_order',),
+}
+
+def fulltext_available():
+    return db.engine.dialect.name == 'sqlite'
+
+def _init_fulltext():
+    """
+    Create the responses_fts external-content index and the triggers that
+    keep it in sync with every insert, update and delete on responses
+    """
+    if not fulltext_available():
+        return
+    columns = ', '.join(FULLTEXT_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in FULLTEXT_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in FULLTEXT_COLUMNS)
+    statements = [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS responses_fts USING fts5(
+            {columns}, content='responses', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+        f"""CREATE TRIGGER IF NOT EXISTS responses_fts_insert AFTER INSERT ON responses BEGIN
+            INSERT INTO responses_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS responses_fts_delete AFTER DELETE ON responses BEGIN
+            INSERT INTO responses_fts(responses_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS responses_fts_update AFTER UPDATE OF {columns} ON responses BEGIN
+            INSERT INTO responses_fts(responses_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO responses_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END""",
+    ]
+    for statement in statements:
+        db.session.execute(db.text(statement))
+    db.session.commit()
+
+def rebuild_fulltext():
+    """Re-index every row of responses (backfills databases created before the index)"""
+    db.session.execute(db.text("INSERT INTO responses_fts(responses_fts) VALUES ('rebuild')"))
+    db.session.execute(db.text("INSERT INTO responses_fts(responses_fts) VALUES ('optimize')"))
+    db.session.commit()
+
+def _fts_phrase(text, prefix):
+    """Quote the words of text as one FTS5 phrase, optionally prefix-matching the last word"""
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return '"' + ' '.join(words) + '"' + ('*' if prefix else '')
+
+def build_fulltext_query(text=None, prefix=True, **fields):
+    """
+    FTS5 MATCH expression from free text and per-field phrases
+
+    Free-text words must all appear somewhere; each field value (see
+    FULLTEXT_FIELDS) must appear as a phrase in that field. User input is
+    always quoted, so FTS5 operators in it are matched literally.
+    """
+    terms = []
+    for word in re.findall(r'\w+', text or ''):
+        terms.append(_fts_phrase(word, prefix))
+    for field, value in fields.items():
+        phrase = _fts_phrase(value or '', prefix)
+        if phrase:
+            terms.append('{' + ' '.join(FULLTEXT_FIELDS[field]) + '} : ' + phrase)
+    return ' AND '.join(terms)
+
+def search_text(match, limit=20, offset=0, case_type=None, filing_year=None):
+    """
+    Ranked full-text search, one hit per case (its best-matching scrape)
+
+    Matches are grouped per case key and paged in SQL. Returns (hits,
+    has_more). Hits carry the case's current fields from cases (the matched
+    response's where no cases row exists yet), a bm25 score and a
+    highlighted snippet of the matched order text.
+    """
+    weights = ', '.join(str(weight) for weight in FULLTEXT_WEIGHTS)
+    filters = ''
+    params = {'match': match, 'limit': limit + 1, 'offset': offset}
+    if case_type:
+        filters += " AND q.case_type = :case_type"
+        params['case_type'] = case_type
+    if filing_year:
+        filters += " AND q.filing_year = :filing_year"
+        params['filing_year'] = filing_year
+    # bm25() cannot appear inside an aggregate, so the matches are scored in a
+    # materialized CTE (SQLite 3.35+); the grouping then takes the bare
+    # response_id column from the row holding MIN(score)
+    sql = f"""
+        WITH matches AS MATERIALIZED (
+            SELECT r.id AS response_id, q.case_key,
+                   bm25(responses_fts, {weights}) AS score
+            FROM responses_fts
+            JOIN responses r ON r.id = responses_fts.rowid
+            JOIN queries q ON q.id = r.query_id
+            WHERE responses_fts MATCH :match AND r.scrape_success = 1{filters}
+        ), best AS (
+            SELECT response_id, case_key, MIN(score) AS score
+            FROM matches
+            GROUP BY case_key
+            ORDER BY score, case_key
+            LIMIT :limit OFFSET :offset
+        )
+        SELECT best.response_id, best.case_key, best.score,
+               coalesce(c.case_type, q.case_type) AS case_type,
+               coalesce(c.case_number, q.case_number) AS case_number,
+               coalesce(c.filing_year, q.filing_year) AS filing_year,
+               coalesce(c.case_title, r.case_title) AS case_title,
+               coalesce(c.petitioner, r.petitioner) AS petitioner,
+               coalesce(c.respondent, r.respondent) AS respondent,
+               coalesce(c.judge_name, r.judge_name) AS judge_name,
+               coalesce(c.case_status, r.case_status) AS case_status,
+               coalesce(c.next_hearing_date, r.next_hearing_date) AS next_hearing_date,
+               coalesce(c.last_scraped, r.scrape_timestamp) AS scraped_at,
+               snippet(responses_fts, 4, '[', ']', '...', 16) AS order_snippet
+        FROM best
+        JOIN responses_fts ON responses_fts.rowid = best.response_id AND responses_fts MATCH :match
+        JOIN responses r ON r.id = best.response_id
+        JOIN queries q ON q.id = r.query_id
+        LEFT JOIN cases c ON c.case_key = best.case_key
+        ORDER BY best.score, best.case_key
+    """
+    rows = db.session.execute(db.text(sql), params).fetchall()
+    hits = [{
+        'case_key': row.case_key,
+        'response_id': row.response_id,
+        'case_type': row.case_type,
+        'case_number': row.case_number,
+        'filing_year': row.filing_year,
+        'case_title': row.case_title,
+        'petitioner': row.petitioner,
+        'respondent': row.respondent,
+        'judge_name': row.judge_name,
+        'case_status': row.case_status,
+        'next_hearing_date': row.next_hearing_date,
+        'scraped_at': str(row.scraped_at) if row.scraped_at else None,
+        'score': round(-row.score, 4),
+        'order_snippet': row.order_snippet
+    } for row in rows[:limit]]
+    return hits, len(rows) > limit
@@ -0,0 +1,345 @@
+"""Case dossier PDFs: rendering, on-disk cache and a process-pool build pipeline
+
+A dossier gathers everything scraped for one case: the latest details,
+every distinct order seen over time and every linked PDF. Rendered files
+are keyed by case key plus a hash of the dossier, so a PDF is only rebuilt
+when the data it shows changes. They are written to a temporary file and
+renamed into place, so concurrent workers never serve a partial file.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout changes so cached files are re-rendered
+RENDER_VERSION = 2
+
+DETAIL_FIELDS = (
+    ('Case Number', 'case_number'),
+    ('Case Type', 'case_type'),
+    ('Case Title', 'case_title'),
+    ('Filing Date', 'filing_date'),
+    ('Next Hearing', 'next_hearing_date'),
+    ('Status', 'case_status'),
+    ('Judge', 'judge_name'),
+    ('Court', 'court_number'),
+)
+
+def wrap_text(text: str, font_name: str, font_size: float, max_width: float) -> List[str]:
+    """
+    Greedy word wrap measuring each word once
+
+    Widths of the standard fonts are additive, so the width of the current
+    line is tracked incrementally instead of re-measuring it per word.
+    """
+    space_width = stringWidth(' ', font_name, font_size)
+    lines = []
+    current_line = []
+    current_width = 0.0
+
+    for word in text.split():
+        word_width = stringWidth(word, font_name, font_size)
+        candidate_width = current_width + space_width + word_width if current_line else word_width
+        if candidate_width < max_width:
+            current_line.append(word)
+            current_width = candidate_width
+        else:
+            if current_line:
+                lines.append(' '.join(current_line))
+            current_line = [word]
+            current_width = word_width
+
+    if current_line:
+        lines.append(' '.join(current_line))
+    return lines
+
+def build_dossier(case_key: str, history: Iterable[Tuple[Optional[datetime], dict]]) -> dict:
+    """
+    Combine scrape results for one case, oldest first, into a dossier
+
+    The latest result supplies the case details; each change of
+    latest_order becomes an entry in the order history, and PDF links
+    from every result are collected without duplicates.
+    """
+    case, orders, links, seen_urls = {}, [], [], set()
+    for scraped_at, case_data in history:
+        case = case_data
+        order = (case_data.get('latest_order') or '').strip()
+        if order and (not orders or orders[-1]['text'] != order):
+            orders.append({'seen': scraped_at.strftime('%Y-%m-%d') if scraped_at else None, 'text': order})
+
+        candidates = list(case_data.get('pdf_links') or [])
+        if case_data.get('pdf_link'):
+            candidates.append({'url': case_data['pdf_link'], 'text': ''})
+        for link in candidates:
+            if link.get('url') and link['url'] not in seen_urls:
+                seen_urls.add(link['url'])
+                links.append({'url': link['url'], 'text': link.get('text') or ''})
+
+    details = {field: case.get(field) or '' for _, field in DETAIL_FIELDS}
+    details['case_status'] = details['case_status'] or case.get('status', '')
+    return {
+        'case_key': case_key,
+        'details': details,
+        'petitioner': case.get('petitioner', ''),
+        'respondent': case.get('respondent', ''),
+        'orders': orders,
+        'pdf_links': links,
+    }
+
+class _PageWriter:
+    """Draws wrapped text top to bottom, starting a new page when one fills up"""
+
+    MARGIN = 50
+    FOOTER = 50
+
+    def __init__(self, output, title: str):
+        self.canvas = canvas.Canvas(output, pagesize=letter)
+        self.width, self.height = letter
+        self.max_width = self.width - 2 * self.MARGIN
+        self.title = title
+        self.page = 1
+        self.generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.y = self.height - self.MARGIN
+
+    def _footer(self):
+        self.canvas.setFont("Helvetica", 8)
+        self.canvas.drawString(self.MARGIN, 30, f"Generated on: {self.generated}")
+        self.canvas.drawString(self.MARGIN, 20, "This is a system-generated document from Delhi High Court Case Management System")
+        self.canvas.drawRightString(self.width - self.MARGIN, 20, f"{self.title} - page {self.page}")
+
+    def _new_page(self):
+        self._footer()
+        self.canvas.showPage()
+        self.page += 1
+        self.y = self.height - self.MARGIN
+
+    def line(self, text: str, font: str = "Helvetica", size: float = 10, leading: float = 15):
+        if self.y < self.FOOTER:
+            self._new_page()
+        self.canvas.setFont(font, size)
+        self.canvas.drawString(self.MARGIN, self.y, text)
+        self.y -= leading
+
+    def paragraph(self, text: str, font: str = "Helvetica", size: float = 10, leading: float = 15):
+        for wrapped in wrap_text(text, font, size, self.max_width) or ['']:
+            self.line(wrapped, font, size, leading)
+
+    def heading(self, text: str, size: float = 12):
+        # Keep a heading on the same page as the first line below it
+        if self.y < self.FOOTER + 2 * size:
+            self._new_page()
+        self.line(text, "Helvetica-Bold", size, 20)
+
+    def space(self, amount: float):
+        self.y -= amount
+
+    def save(self):
+        self._footer()
+        self.canvas.save()
+
+def render_dossier_pdf(dossier: dict, output):
+    """Draw a dossier onto a file path or file object, paginating as needed"""
+    writer = _PageWriter(output, dossier['case_key'])
+    writer.line("DELHI HIGH COURT", "Helvetica-Bold", 16, 20)
+    writer.line("CASE DOSSIER", "Helvetica-Bold", 16, 20)
+    writer.space(30)
+
+    for label, field in DETAIL_FIELDS:
+        if dossier['details'].get(field):
+            writer.paragraph(f"{label}: {dossier['details'][field]}", size=12, leading=20)
+    writer.space(20)
+
+    writer.heading("PARTIES:")
+    writer.paragraph(f"Petitioner: {dossier['petitioner']}")
+    writer.paragraph(f"Respondent: {dossier['respondent']}")
+    writer.space(15)
+
+    writer.heading("ORDER HISTORY:" if len(dossier['orders']) > 1 else "LATEST ORDER:")
+    if not dossier['orders']:
+        writer.paragraph("No orders recorded.")
+    for order in reversed(dossier['orders']):
+        if order['seen']:
+            writer.line(f"First seen {order['seen']}", "Helvetica-Oblique", 9, 13)
+        writer.paragraph(order['text'])
+        writer.space(8)
+
+    if dossier['pdf_links']:
+        writer.space(7)
+        writer.heading("DOCUMENTS:")
+        for link in dossier['pdf_links']:
+            if link['text']:
+                writer.paragraph(link['text'], "Helvetica-Bold", 10)
+            writer.paragraph(link['url'], size=9, leading=13)
+
+    writer.save()
+
+def dossier_hash(dossier: dict) -> str:
+    payload = json.dumps(dossier, sort_keys=True, default=str)
+    return hashlib.sha256(f"{RENDER_VERSION}:{payload}".encode()).hexdigest()
+
+def dossier_filename(case_key: str) -> str:
+    return re.sub(r'[^A-Za-z0-9]+', '_', case_key).strip('_')
+
+def _render_file(dossier: dict, path: str) -> str:
+    """Render into path atomically (runs in a pool worker process)"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            render_dossier_pdf(dossier, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+class PDFCache:
+    """Rendered dossier PDFs on disk, one current file per case key"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, dossier: dict) -> str:
+        return os.path.join(self.cache_dir, f"{dossier_filename(dossier['case_key'])}-{dossier_hash(dossier)[:32]}.pdf")
+
+    def get(self, dossier: dict) -> Optional[str]:
+        path = self.path_for(dossier)
+        return path if os.path.exists(path) else None
+
+    def get_or_render(self, dossier: dict) -> str:
+        """Path of the cached PDF for this dossier, rendering it in-process on a miss"""
+        path = self.get(dossier)
+        if path is None:
+            path = _render_file(dossier, self.path_for(dossier))
+            logger.info(f"Rendered PDF for case {dossier['case_key']}: {path}")
+            self.remove_stale(dossier['case_key'], path)
+        return path
+
+    def remove_stale(self, case_key: str, current_path: str):
+        """Delete renders of older versions of the same case"""
+        prefix = dossier_filename(case_key) + '-'
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(prefix) and name.endswith('.pdf') and path != current_path:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+class DossierBuilder:
+    """
+    Renders dossiers on a process pool, sharing the PDF cache
+
+    Cached dossiers resolve immediately and identical in-flight builds
+    share one future. The pool is created lazily per process with the
+    spawn start method, so it is safe to use after a server fork.
+    """
+
+    def __init__(self, cache: PDFCache, workers: Optional[int] = None):
+        self.cache = cache
+        self.workers = workers or os.cpu_count() or 2
+        self._executor = None
+        self._pid = None
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            self._pid = os.getpid()
+            self._in_flight = {}
+        return self._executor
+
+    def submit(self, dossier: dict) -> Future:
+        """Future resolving to the dossier's PDF path"""
+        path = self.cache.path_for(dossier)
+        with self._lock:
+            if os.path.exists(path):
+                future = Future()
+                future.set_result(path)
+                return future
+            future = self._in_flight.get(path)
+            if future is not None:
+                return future
+            future = self._get_executor().submit(_render_file, dossier, path)
+            self._in_flight[path] = future
+        # Outside the lock: the callback runs immediately if the render already finished
+        future.add_done_callback(lambda f, key=dossier['case_key']: self._finished(key, path, f))
+        return future
+
+    def _finished(self, case_key: str, path: str, future: Future):
+        with self._lock:
+            self._in_flight.pop(path, None)
+        if future.exception() is None:
+            self.cache.remove_stale(case_key, path)
+        else:
+            logger.error(f"Dossier render failed for {case_key}: {future.exception()}")
+
+    def build(self, dossier: dict, timeout: Optional[float] = None) -> str:
+        return self.submit(dossier).result(timeout)
+
+    def build_many(self, dossiers: Iterable[dict]) -> Iterator[Tuple[dict, Future]]:
+        """Yield (dossier, finished future) in completion order"""
+        futures = {self.submit(dossier): dossier for dossier in dossiers}
+        for future in as_completed(futures):
+            yield futures[future], future
+
+    def shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=True)
+        self._executor = None
+
+class _ChunkSink:
+    """Write-only file object whose contents are drained as chunks"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def stream_dossier_zip(builder: DossierBuilder, dossiers: List[dict],
+                       missing: Iterable[str] = ()) -> Iterator[bytes]:
+    """
+    Build dossiers in parallel and yield a zip archive as each PDF finishes
+
+    Cases without data and failed renders are listed in MISSING.txt at the
+    end of the archive.
+    """
+    sink = _ChunkSink()
+    problems = [f"{case_key}: no scraped data" for case_key in missing]
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for dossier, future in builder.build_many(dossiers):
+            if future.exception() is not None:
+                problems.append(f"{dossier['case_key']}: render failed ({future.exception()})")
+                continue
+            archive.write(future.result(), f"{dossier_filename(dossier['case_key'])}.pdf")
+            yield sink.drain()
+        if problems:
+            archive.writestr('MISSING.txt', '\n'.join(problems) + '\n')
+    yield sink.drain()
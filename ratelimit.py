@@ -0,0 +1,47 @@
+"""Rate limiting for requests sent to the court website"""
+import asyncio
+import threading
+import time
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` requests per second with bursts of `burst`"""
+
+    def __init__(self, rate: float = 1.0, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        if self.rate <= 0:
+            return
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+class AsyncRateLimiter:
+    """asyncio token bucket shared by every task on one event loop"""
+
+    def __init__(self, rate: float = 1.0, burst: int = 1):
+        self._bucket = RateLimiter(rate, burst)
+
+    async def acquire(self):
+        """Wait without blocking the event loop until a request may be sent"""
+        if self._bucket.rate <= 0:
+            return
+        wait = self._bucket._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
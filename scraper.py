@@ -4,215 +4,472 @@ import re
 import logging
 import sqlite3
 from datetime import datetime
-from bs4 import BeautifulSoup
+from html_parsing import (parse_html, extract_form_fields, extract_data_tokens, find_captcha_src,
+                          extract_case_fields, extract_pdf_links)
 from urllib.parse import urljoin, urlparse
 import time
 import random
-from typing import Dict, Optional, Tuple, List
+import math
+import asyncio
+from typing import Callable, Dict, Iterable, Optional, Tuple, List
 import base64
 import io
 from PIL import Image, ImageEnhance, ImageFilter
 import pytesseract
 import hashlib
 import os
+import threading
+import queue
+import atexit
+from blobstore import CREATE_BLOB_TABLE_SQL, INSERT_BLOB_SQL, KnownHashes, compress_blob, html_hash, read_blob
+from metrics import backoff_sleep, record_retry, record_upstream, stage_timer
+from tracing import current_trace_id, span
+from upstream import UPSTREAM_UNAVAILABLE_ERROR, UpstreamUnavailableError, get_upstream_guard
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+CASE_NOT_FOUND_ERROR = "Case not found in court records"
+NOT_FOUND_PHRASES = ['not found', 'no data', 'no record', 'invalid case', 'does not exist']
+COURT_BASE_URL = "https://delhihighcourt.nic.in"
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0'
+}
+
 class SQLiteLogger:
-    """SQLite database logger for scraping activities"""
+    """
+    SQLite database logger for scraping activities
+
+    Every thread keeps one long-lived WAL connection instead of reconnecting
+    per call. With write_behind=True the INSERT/UPDATE statements go onto a
+    bounded queue that a background writer drains and commits in batches;
+    log_query stays synchronous because callers need the new row ID.
+    Response HTML goes to the content-addressed html_blobs table; rows in
+    scraper_responses only carry its html_hash.
+    """
     
-    def __init__(self, db_path: str = "court_scraper.db"):
+    def __init__(self, db_path: str = "court_scraper.db", write_behind: bool = False,
+                 batch_size: int = 100, flush_interval: float = 0.5, max_queue_size: int = 10000):
         self.db_path = db_path
+        self.write_behind = write_behind
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped_writes = 0
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._queue = None
+        self._writer = None
+        self._closed = False
+        # Orders enqueues against close() putting the stop sentinel, and guards dropped_writes
+        self._state_lock = threading.Lock()
+        self._known_blobs = KnownHashes()
         self._init_database()
+        
+        if write_behind:
+            self._queue = queue.Queue(maxsize=max_queue_size)
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True,
+                                            name=f"sqlite-logger-writer:{db_path}")
+            self._writer.start()
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Return the calling thread's persistent connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with span('sqlite_logger.connect'):
+                conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
     
     def _init_database(self):
         """Initialize SQLite database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS scraper_queries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
-                    case_type TEXT NOT NULL,
-                    case_number TEXT NOT NULL,
-                    filing_year TEXT NOT NULL,
-                    query_hash TEXT UNIQUE NOT NULL,
-                    ip_address TEXT,
-                    user_agent TEXT,
-                    session_id TEXT,
-                    attempt_number INTEGER DEFAULT 1,
-                    success BOOLEAN DEFAULT FALSE,
-                    error_message TEXT,
-                    response_time_ms INTEGER,
-                    captcha_required BOOLEAN DEFAULT FALSE,
-                    captcha_solved BOOLEAN DEFAULT FALSE,
-                    captcha_solution TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS scraper_responses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    query_id INTEGER,
-                    timestamp TEXT NOT NULL,
-                    request_url TEXT NOT NULL,
-                    request_method TEXT DEFAULT 'GET',
-                    request_headers TEXT,
-                    request_data TEXT,
-                    response_status INTEGER,
-                    response_headers TEXT,
-                    raw_html TEXT,
-                    html_hash TEXT,
-                    parsed_data TEXT,
-                    processing_time_ms INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (query_id) REFERENCES scraper_queries (id)
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS captcha_attempts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    query_id INTEGER,
-                    timestamp TEXT NOT NULL,
-                    captcha_url TEXT,
-                    captcha_image_hash TEXT,
-                    ocr_result TEXT,
-                    manual_solution TEXT,
-                    success BOOLEAN DEFAULT FALSE,
-                    method_used TEXT, -- 'ocr', 'manual', 'service'
-                    confidence_score REAL,
-                    processing_time_ms INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (query_id) REFERENCES scraper_queries (id)
-                )
-            ''')
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scraper_queries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                case_type TEXT NOT NULL,
+                case_number TEXT NOT NULL,
+                filing_year TEXT NOT NULL,
+                query_hash TEXT NOT NULL,
+                ip_address TEXT,
+                user_agent TEXT,
+                session_id TEXT,
+                attempt_number INTEGER DEFAULT 1,
+                success BOOLEAN DEFAULT FALSE,
+                error_message TEXT,
+                response_time_ms INTEGER,
+                captcha_required BOOLEAN DEFAULT FALSE,
+                captcha_solved BOOLEAN DEFAULT FALSE,
+                captcha_solution TEXT,
+                trace_id TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_scraper_queries_hash ON scraper_queries (query_hash)
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scraper_responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query_id INTEGER,
+                timestamp TEXT NOT NULL,
+                request_url TEXT NOT NULL,
+                request_method TEXT DEFAULT 'GET',
+                request_headers TEXT,
+                request_data TEXT,
+                response_status INTEGER,
+                response_headers TEXT,
+                raw_html TEXT,
+                html_hash TEXT,
+                parsed_data TEXT,
+                processing_time_ms INTEGER,
+                trace_id TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (query_id) REFERENCES scraper_queries (id)
+            )
+        ''')
+        
+        # Databases created before trace ids were logged
+        for table in ('scraper_queries', 'scraper_responses'):
+            columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+            if 'trace_id' not in columns:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN trace_id TEXT')
+        
+        cursor.execute(CREATE_BLOB_TABLE_SQL)
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS captcha_attempts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query_id INTEGER,
+                timestamp TEXT NOT NULL,
+                captcha_url TEXT,
+                captcha_image_hash TEXT,
+                ocr_result TEXT,
+                manual_solution TEXT,
+                success BOOLEAN DEFAULT FALSE,
+                method_used TEXT, -- 'ocr', 'manual', 'service'
+                confidence_score REAL,
+                processing_time_ms INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (query_id) REFERENCES scraper_queries (id)
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS viewstate_tokens (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query_id INTEGER,
+                timestamp TEXT NOT NULL,
+                viewstate TEXT,
+                viewstate_generator TEXT,
+                event_validation TEXT,
+                csrf_token TEXT,
+                session_token TEXT,
+                other_tokens TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (query_id) REFERENCES scraper_queries (id)
+            )
+        ''')
+        
+        conn.commit()
+        logger.info(f"SQLite database initialized: {self.db_path}")
+    
+    def _write(self, sql: str, params: tuple):
+        """Execute a write now, or hand it to the background writer in write-behind mode"""
+        if self._queue is not None:
+            with self._state_lock:
+                queued = not self._closed
+                if queued:
+                    try:
+                        self._queue.put_nowait((sql, params))
+                    except queue.Full:
+                        self.dropped_writes += 1
+                        logger.warning(f"SQLite log queue full, dropped write ({self.dropped_writes} dropped so far)")
+            if queued:
+                return
+        
+        with span('sqlite_logger.write'):
+            conn = self._get_connection()
+            conn.execute(sql, params)
+            conn.commit()
+        self._mark_committed(sql, params)
+    
+    def _mark_committed(self, sql: str, params: tuple):
+        """Remember a blob only once its row is committed, so no response can reference a missing blob"""
+        if sql is INSERT_BLOB_SQL:
+            self._known_blobs.add(params[0])
+    
+    def _writer_loop(self):
+        """Drain the write queue and commit statements in batches"""
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
             
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS viewstate_tokens (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    query_id INTEGER,
-                    timestamp TEXT NOT NULL,
-                    viewstate TEXT,
-                    viewstate_generator TEXT,
-                    event_validation TEXT,
-                    csrf_token TEXT,
-                    session_token TEXT,
-                    other_tokens TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (query_id) REFERENCES scraper_queries (id)
-                )
-            ''')
+            batch, waiters = [], []
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
             
+            if batch:
+                self._commit_batch(batch)
+            for waiter in waiters:
+                waiter.set()
+    
+    def _commit_batch(self, batch: List[Tuple[str, tuple]]):
+        """Commit a batch in one transaction, falling back to row-by-row on error"""
+        conn = self._get_connection()
+        try:
+            for sql, params in batch:
+                conn.execute(sql, params)
             conn.commit()
-            logger.info(f"SQLite database initialized: {self.db_path}")
+            for sql, params in batch:
+                self._mark_committed(sql, params)
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Batched log write failed, retrying individually: {str(e)}")
+            for sql, params in batch:
+                try:
+                    conn.execute(sql, params)
+                    conn.commit()
+                    self._mark_committed(sql, params)
+                except sqlite3.Error as row_error:
+                    conn.rollback()
+                    logger.error(f"Dropping log write: {str(row_error)}")
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until every write queued so far has been committed"""
+        if self._writer is None or not self._writer.is_alive():
+            return True
+        
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+    
+    def close(self):
+        """Flush pending writes, stop the writer thread and close all connections"""
+        if self._closed:
+            return
+        
+        if self._writer is not None and self._writer.is_alive():
+            self.flush()
+            with self._state_lock:
+                # Writes after this point run synchronously; none can land behind the sentinel
+                self._closed = True
+                self._queue.put(None)
+            self._writer.join()
+        self._closed = True
+        
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+        self._local = threading.local()
     
     def log_query(self, case_type: str, case_number: str, filing_year: str, 
                   ip_address: str = None, user_agent: str = None, session_id: str = None) -> int:
         """Log a new query and return the query ID"""
         query_hash = hashlib.md5(f"{case_type}.{case_number}.{filing_year}".encode()).hexdigest()
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+        with span('sqlite_logger.log_query'):
+            conn = self._get_connection()
+            cursor = conn.execute('''
                 INSERT INTO scraper_queries 
                 (timestamp, case_type, case_number, filing_year, query_hash, 
-                 ip_address, user_agent, session_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                 ip_address, user_agent, session_id, trace_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 datetime.now().isoformat(),
                 case_type, case_number, filing_year, query_hash,
-                ip_address, user_agent, session_id
+                ip_address, user_agent, session_id, current_trace_id()
             ))
             conn.commit()
-            return cursor.lastrowid
+        return cursor.lastrowid
+    
+    def update_query_result(self, query_id: int, success: bool, response_time_ms: int,
+                            captcha_required: bool = False, captcha_solved: bool = False,
+                            error_message: str = None):
+        """Record the final outcome of a query"""
+        self._write('''
+            UPDATE scraper_queries 
+            SET success = ?, response_time_ms = ?, captcha_required = ?,
+                captcha_solved = ?, error_message = ?
+            WHERE id = ?
+        ''', (success, response_time_ms, captcha_required, captcha_solved, error_message, query_id))
     
     def log_response(self, query_id: int, url: str, method: str, headers: dict, 
                      data: dict, status: int, response_headers: dict, 
                      raw_html: str, parsed_data: dict = None, processing_time: int = 0):
-        """Log raw HTML response and parsed data"""
-        html_hash = hashlib.sha256(raw_html.encode()).hexdigest()
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO scraper_responses 
-                (query_id, timestamp, request_url, request_method, request_headers,
-                 request_data, response_status, response_headers, raw_html, html_hash,
-                 parsed_data, processing_time_ms)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                query_id, datetime.now().isoformat(), url, method,
-                json.dumps(dict(headers)), json.dumps(data or {}), status,
-                json.dumps(dict(response_headers)), raw_html, html_hash,
-                json.dumps(parsed_data or {}), processing_time
-            ))
-            conn.commit()
+        """Log a response; its HTML is stored once per distinct page in html_blobs"""
+        encoded = raw_html.encode()
+        digest = html_hash(encoded)
+        # A page still waiting in the write queue is queued again; INSERT OR IGNORE keeps one copy
+        if digest not in self._known_blobs:
+            codec, blob = compress_blob(encoded)
+            self._write(INSERT_BLOB_SQL, (digest, codec, len(encoded), blob))
+        
+        self._write('''
+            INSERT INTO scraper_responses 
+            (query_id, timestamp, request_url, request_method, request_headers,
+             request_data, response_status, response_headers, html_hash,
+             parsed_data, processing_time_ms, trace_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            query_id, datetime.now().isoformat(), url, method,
+            json.dumps(dict(headers)), json.dumps(data or {}), status,
+            json.dumps(dict(response_headers)), digest,
+            json.dumps(parsed_data or {}), processing_time, current_trace_id()
+        ))
+    
+    def get_response_html(self, response_id: int) -> Optional[str]:
+        """Raw HTML of a logged response, from html_blobs or the legacy inline column"""
+        conn = self._get_connection()
+        row = conn.execute(
+            'SELECT raw_html, html_hash FROM scraper_responses WHERE id = ?', (response_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        raw_html, digest = row
+        if raw_html is not None:
+            return raw_html
+        return read_blob(conn, digest) if digest else None
     
     def log_captcha_attempt(self, query_id: int, captcha_url: str, ocr_result: str,
                            success: bool, method: str, confidence: float = 0.0,
                            processing_time: int = 0):
         """Log CAPTCHA solving attempt"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO captcha_attempts 
-                (query_id, timestamp, captcha_url, ocr_result, success, method_used,
-                 confidence_score, processing_time_ms)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                query_id, datetime.now().isoformat(), captcha_url, ocr_result,
-                success, method, confidence, processing_time
-            ))
-            conn.commit()
+        self._write('''
+            INSERT INTO captcha_attempts 
+            (query_id, timestamp, captcha_url, ocr_result, success, method_used,
+             confidence_score, processing_time_ms)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            query_id, datetime.now().isoformat(), captcha_url, ocr_result,
+            success, method, confidence, processing_time
+        ))
     
     def log_viewstate_tokens(self, query_id: int, tokens: dict):
         """Log extracted view-state tokens"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO viewstate_tokens 
-                (query_id, timestamp, viewstate, viewstate_generator, event_validation,
-                 csrf_token, session_token, other_tokens)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                query_id, datetime.now().isoformat(),
-                tokens.get('__VIEWSTATE', ''),
-                tokens.get('__VIEWSTATEGENERATOR', ''),
-                tokens.get('__EVENTVALIDATION', ''),
-                tokens.get('csrf_token', ''),
-                tokens.get('session_token', ''),
-                json.dumps({k: v for k, v in tokens.items() 
-                           if k not in ['__VIEWSTATE', '__VIEWSTATEGENERATOR', '__EVENTVALIDATION', 'csrf_token', 'session_token']})
-            ))
-            conn.commit()
+        self._write('''
+            INSERT INTO viewstate_tokens 
+            (query_id, timestamp, viewstate, viewstate_generator, event_validation,
+             csrf_token, session_token, other_tokens)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            query_id, datetime.now().isoformat(),
+            tokens.get('__VIEWSTATE', ''),
+            tokens.get('__VIEWSTATEGENERATOR', ''),
+            tokens.get('__EVENTVALIDATION', ''),
+            tokens.get('csrf_token', ''),
+            tokens.get('session_token', ''),
+            json.dumps({k: v for k, v in tokens.items() 
+                       if k not in ['__VIEWSTATE', '__VIEWSTATEGENERATOR', '__EVENTVALIDATION', 'csrf_token', 'session_token']})
+        ))
+
+_shared_loggers: Dict[Tuple[str, bool], SQLiteLogger] = {}
+_shared_loggers_lock = threading.Lock()
+
+def get_sqlite_logger(db_path: str = "court_scraper.db", write_behind: bool = False) -> SQLiteLogger:
+    """Return a process-wide SQLiteLogger for db_path so connections and the writer thread are shared"""
+    key = (os.path.abspath(db_path), write_behind)
+    with _shared_loggers_lock:
+        sqlite_logger = _shared_loggers.get(key)
+        if sqlite_logger is None or sqlite_logger._closed:
+            sqlite_logger = SQLiteLogger(db_path, write_behind=write_behind)
+            _shared_loggers[key] = sqlite_logger
+        return sqlite_logger
+
+def close_sqlite_loggers():
+    """Flush and close every shared logger (registered to run at interpreter exit)"""
+    with _shared_loggers_lock:
+        loggers = list(_shared_loggers.values())
+        _shared_loggers.clear()
+    for sqlite_logger in loggers:
+        sqlite_logger.close()
+
+atexit.register(close_sqlite_loggers)
+
+# Submission statuses that mean the form's tokens are no longer accepted
+FORM_REJECTED_STATUSES = (400, 403, 419, 440)
+
+class FormState:
+    """The parsed search form of one HTTP session: where to submit it and its fields and tokens"""
+    
+    __slots__ = ('form_data', 'url', 'method', 'captcha_required', 'captcha_solution', 'loaded_at')
+    
+    def __init__(self, form_data: Dict[str, str], url: str, method: str, captcha_required: bool = False,
+                 captcha_solution: Optional[str] = None):
+        self.form_data = form_data
+        self.url = url
+        self.method = method
+        self.captcha_required = captcha_required
+        self.captcha_solution = captcha_solution
+        self.loaded_at = time.monotonic()
+    
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at
 
 class DelhiHighCourtScraper:
     """Enhanced scraper for Delhi High Court case information with comprehensive CAPTCHA bypass"""
     
-    def __init__(self, db_path: str = "court_scraper.db"):
-        self.base_url = "https://delhihighcourt.nic.in"
-        self.case_search_url = f"{self.base_url}/app/case-number"
+    def __init__(self, db_path: str = "court_scraper.db", write_behind_logging: Optional[bool] = None,
+                 base_url: Optional[str] = None):
+        self._init_common(db_path, write_behind_logging, base_url)
         self.session = requests.Session()
-        self.logger = SQLiteLogger(db_path)
+        self.session.headers.update(self.headers)
+        
+        self._initialize_session()
+    
+    def _init_common(self, db_path: str, write_behind_logging: Optional[bool], base_url: Optional[str]):
+        """Configuration, logger, upstream guard and form-state cache shared with the async scraper"""
+        self.base_url = (base_url or os.environ.get("COURT_BASE_URL", COURT_BASE_URL)).rstrip('/')
+        self.case_search_url = f"{self.base_url}/app/case-number"
+        if write_behind_logging is None:
+            write_behind_logging = os.environ.get("SCRAPER_LOG_WRITE_BEHIND", "true").lower() == "true"
+        self.logger = get_sqlite_logger(db_path, write_behind=write_behind_logging)
+        self.upstream = get_upstream_guard(self.base_url)
         self.current_query_id = None
-      
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0'
-        })
+        self.form_state_ttl = float(os.environ.get("FORM_STATE_TTL", "120"))
+        self._form_state = None
+        self.form_state_hits = 0
+        self.form_state_misses = 0
+        self.headers = dict(DEFAULT_HEADERS)
         
         self.captcha_config = {
             'ocr_config': '--psm 8 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz',
@@ -220,27 +477,48 @@ class DelhiHighCourtScraper:
             'retry_attempts': 3,
             'confidence_threshold': 0.7
         }
-        
-        self._initialize_session()
+    
+    def refresh_session(self) -> bool:
+        """Replace the HTTP session with a freshly initialized one; False if the court website did not answer"""
+        self.session.close()
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        return self._initialize_session()
+    
+    def close(self):
+        self.session.close()
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request to the court website through the shared circuit breaker and rate limit"""
+        self.upstream.acquire()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            self.upstream.record_failure(type(e).__name__)
+            raise
+        self.upstream.record_response(response.status_code, response.headers.get('Retry-After'))
+        return response
     
     def _initialize_session(self):
         """Initialize session by visiting main page to get cookies and tokens"""
+        self.invalidate_form_state()
         try:
-            response = self.session.get(self.base_url)
+            with stage_timer('session_init'):
+                response = self._request('GET', self.base_url)
+            record_upstream('session_init', response.status_code)
             logger.info(f"Session initialized. Status: {response.status_code}")
             return True
         except Exception as e:
+            record_upstream('session_init', type(e).__name__)
             logger.error(f"Failed to initialize session: {str(e)}")
             return False
     
-    def _get_captcha_image(self, soup) -> Optional[str]:
-        """Extract CAPTCHA image from the page"""
+    def _get_captcha_image(self, doc) -> Optional[str]:
+        """Extract CAPTCHA image from the parsed page"""
         try:
-            captcha_img = soup.find('img', {'alt': 'captcha'}) or soup.find('img', src=re.compile(r'captcha', re.I))
-            if captcha_img:
-                img_src = captcha_img.get('src')
-                if img_src:
-                    return urljoin(self.base_url, img_src)
+            img_src = find_captcha_src(doc)
+            if img_src:
+                return urljoin(self.base_url, img_src)
             return None
         except Exception as e:
             logger.error(f"Error extracting CAPTCHA image: {str(e)}")
@@ -283,11 +561,19 @@ class DelhiHighCourtScraper:
         start_time = time.time()
         
         try:
-            response = self.session.get(captcha_url)
+            response = self._request('GET', captcha_url)
             if response.status_code != 200:
                 return None, 0.0
-   
-            image = Image.open(io.BytesIO(response.content))
+        except Exception as e:
+            logger.error(f"Error solving CAPTCHA: {str(e)}")
+            return None, 0.0
+        
+        return self._ocr_captcha_image(response.content, captcha_url, start_time)
+    
+    def _ocr_captcha_image(self, image_bytes: bytes, captcha_url: str, start_time: float) -> Tuple[Optional[str], float]:
+        """Run the OCR passes over downloaded CAPTCHA image bytes"""
+        try:
+            image = Image.open(io.BytesIO(image_bytes))
             processed_images = self._preprocess_captcha_image(image)
             results = []
             
@@ -369,7 +655,7 @@ class DelhiHighCourtScraper:
         logger.error("Failed to solve CAPTCHA with all methods")
         return None
     
-    def _extract_form_data(self, soup) -> Dict[str, str]:
+    def _extract_form_data(self, doc) -> Dict[str, str]:
         """
         Enhanced extraction of form fields, view-state tokens, and CSRF tokens
         Handles multiple form types and token formats
@@ -377,59 +663,11 @@ class DelhiHighCourtScraper:
         form_data = {}
         
         try:
-            forms = soup.find_all('form')
-            if not forms:
-                forms = soup.find_all('div', {'id': re.compile(r'.*form.*', re.I)})
+            form_data = extract_form_fields(doc)
             
-            for form in forms:
-                inputs = form.find_all('input')
-                for inp in inputs:
-                    name = inp.get('name')
-                    value = inp.get('value', '')
-                    input_type = inp.get('type', 'text').lower()
-                    
-                    if name:
-                        form_data[name] = value
-                        
-                        if any(token in name.lower() for token in ['viewstate', 'token', 'csrf', 'validation']):
-                            logger.debug(f"Found token field: {name} = {value[:50]}..." if len(value) > 50 else f"Found token field: {name} = {value}")
-          
-                selects = form.find_all('select')
-                for select in selects:
-                    name = select.get('name')
-                    if name:
-                        selected_option = select.find('option', {'selected': True})
-                        if selected_option:
-                            form_data[name] = selected_option.get('value', '')
-                        else:
-                            first_option = select.find('option')
-                            if first_option:
-                                form_data[name] = first_option.get('value', '')
-            
-            csrf_meta = soup.find('meta', {'name': re.compile(r'csrf.*token', re.I)})
-            if csrf_meta:
-                form_data['csrf_token'] = csrf_meta.get('content', '')
-            
-            scripts = soup.find_all('script')
-            for script in scripts:
-                if script.string:
-                    token_patterns = [
-                        r'token["\']?\s*[:=]\s*["\']([^"\']+)["\']',
-                        r'csrf["\']?\s*[:=]\s*["\']([^"\']+)["\']',
-                        r'__RequestVerificationToken["\']?\s*[:=]\s*["\']([^"\']+)["\']'
-                    ]
-                    
-                    for pattern in token_patterns:
-                        matches = re.findall(pattern, script.string, re.I)
-                        for match in matches:
-                            if len(match) > 10:  
-                                form_data[f'js_token_{len(form_data)}'] = match
-          
-            token_elements = soup.find_all(attrs={'data-token': True})
-            for elem in token_elements:
-                token_value = elem.get('data-token')
-                if token_value:
-                    form_data['data_token'] = token_value
+            data_tokens = extract_data_tokens(doc)
+            if data_tokens:
+                form_data['data_token'] = data_tokens[-1]
             
             logger.info(f"Extracted {len(form_data)} form fields and tokens")
        
@@ -443,62 +681,156 @@ class DelhiHighCourtScraper:
     
     def _parse_case_details(self, html_content: str) -> Dict[str, str]:
         """Parse case details from HTML response"""
-        soup = BeautifulSoup(html_content, 'html.parser')
         case_data = {}
         
         try:
-            tables = soup.find_all('table')
+            doc = parse_html(html_content)
+            case_data = extract_case_fields(doc)
             
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 2:
-                        for i in range(0, len(cells)-1, 2):
-                            key = cells[i].get_text(strip=True).lower()
-                            value = cells[i+1].get_text(strip=True)
-                            
-                            if 'case' in key and 'no' in key:
-                                case_data['case_number'] = value
-                            elif 'title' in key or 'parties' in key:
-                                case_data['case_title'] = value
-                            elif 'petitioner' in key or 'appellant' in key:
-                                case_data['petitioner'] = value
-                            elif 'respondent' in key:
-                                case_data['respondent'] = value
-                            elif 'filing' in key and 'date' in key:
-                                case_data['filing_date'] = value
-                            elif 'next' in key and 'hearing' in key:
-                                case_data['next_hearing_date'] = value
-                            elif 'judge' in key:
-                                case_data['judge_name'] = value
-                            elif 'court' in key:
-                                case_data['court_number'] = value
-                            elif 'status' in key:
-                                case_data['case_status'] = value
-                            elif 'order' in key or 'judgment' in key:
-                                case_data['latest_order'] = value
-            
-            pdf_links = soup.find_all('a', href=re.compile(r'\.pdf', re.I))
+            pdf_links = [
+                {'url': urljoin(self.base_url, href), 'text': text}
+                for href, text in extract_pdf_links(doc)
+            ]
             if pdf_links:
-                case_data['pdf_links'] = []
-                for link in pdf_links:
-                    href = link.get('href')
-                    if href:
-                        full_url = urljoin(self.base_url, href)
-                        case_data['pdf_links'].append({
-                            'url': full_url,
-                            'text': link.get_text(strip=True)
-                        })
-                
-                if case_data['pdf_links']:
-                    case_data['pdf_link'] = case_data['pdf_links'][0]['url']
+                case_data['pdf_links'] = pdf_links
+                case_data['pdf_link'] = pdf_links[0]['url']
         
         except Exception as e:
             logger.error(f"Error parsing case details: {str(e)}")
         
         return case_data
     
+    def _search_payload(self, form_data: Dict[str, str], case_type: str, case_number: str,
+                        filing_year: str, captcha_solution: Optional[str]) -> Dict[str, str]:
+        """The search page's form fields and tokens with the case filled in"""
+        search_data = form_data.copy()
+        search_data.update({
+            'case_type': case_type,
+            'case_number': case_number,
+            'filing_year': filing_year,
+        })
+        
+        if captcha_solution:
+            captcha_fields = ['captcha', 'captcha_code', 'security_code', 'verification_code']
+            for field in captcha_fields:
+                if field in form_data or any(field in key.lower() for key in form_data.keys()):
+                    search_data[field] = captcha_solution
+                    break
+            else:
+                search_data['captcha'] = captcha_solution
+        return search_data
+    
+    def _form_target(self, doc) -> Tuple[str, str]:
+        """(url, method) the search form submits to"""
+        search_url = self.case_search_url
+        form = doc.find('form')
+        if form:
+            action = form.get('action')
+            if action:
+                search_url = urljoin(self.base_url, action)
+            method = form.get('method', 'POST').upper()
+        else:
+            method = 'POST'
+        return search_url, method
+    
+    def _search_headers(self) -> Dict[str, str]:
+        return {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Referer': self.case_search_url,
+            'Origin': self.base_url
+        }
+    
+    def _cached_form_state(self) -> Optional['FormState']:
+        """This session's search form if it was loaded recently enough to submit again"""
+        form_state = self._form_state
+        if form_state is not None and form_state.age() < self.form_state_ttl:
+            self.form_state_hits += 1
+            return form_state
+        self._form_state = None
+        return None
+    
+    def invalidate_form_state(self):
+        self._form_state = None
+    
+    def _load_search_form(self) -> Tuple[Optional['FormState'], str]:
+        """
+        GET and parse the search page, solving its CAPTCHA if there is one
+        
+        The result is cached for this session unless it carried a CAPTCHA,
+        whose solution is only good for one submission.
+        
+        Returns:
+            Tuple[Optional[FormState], str]: (form state, error message if the page failed to load)
+        """
+        self.form_state_misses += 1
+        step_start = time.time()
+        with stage_timer('search_page_get'):
+            response = self._request('GET', self.case_search_url, timeout=30)
+        record_upstream('search_page', response.status_code)
+        
+        with stage_timer('scraper_logging'):
+            self.logger.log_response(
+                self.current_query_id, self.case_search_url, 'GET',
+                dict(self.session.headers), {}, response.status_code,
+                dict(response.headers), response.text,
+                processing_time=int((time.time() - step_start) * 1000)
+            )
+        
+        if response.status_code != 200:
+            error_msg = f"Failed to load search page. Status: {response.status_code}"
+            logger.error(error_msg)
+            return None, error_msg
+        
+        with stage_timer('form_extraction'):
+            doc = parse_html(response.text)
+            form_data = self._extract_form_data(doc)
+            captcha_url = self._get_captcha_image(doc)
+            search_url, method = self._form_target(doc)
+        logger.info(f"Extracted {len(form_data)} form fields")
+        
+        captcha_solution = None
+        if captcha_url:
+            logger.info(f"CAPTCHA detected: {captcha_url}")
+            with stage_timer('captcha'):
+                captcha_solution = self._solve_captcha(captcha_url)
+            if not captcha_solution:
+                logger.warning("Failed to solve CAPTCHA, attempting search anyway")
+                captcha_solution = ""
+        
+        form_state = FormState(form_data, search_url, method, captcha_required=captcha_url is not None,
+                               captcha_solution=captcha_solution)
+        if captcha_url is None and self.form_state_ttl > 0:
+            self._form_state = form_state
+        return form_state, ""
+    
+    def _submit_search(self, form_state: 'FormState', case_type: str, case_number: str,
+                       filing_year: str) -> requests.Response:
+        """POST (or GET) the search form for one case and log the response"""
+        search_data = self._search_payload(form_state.form_data, case_type, case_number, filing_year,
+                                           form_state.captcha_solution)
+        search_headers = self._search_headers()
+        search_start = time.time()
+        
+        with stage_timer('search_post'):
+            if form_state.method == 'POST':
+                search_response = self._request(
+                    'POST', form_state.url, data=search_data, headers=search_headers, timeout=30
+                )
+            else:
+                search_response = self._request(
+                    'GET', form_state.url, params=search_data, headers=search_headers, timeout=30
+                )
+        record_upstream('search_submit', search_response.status_code)
+        
+        with stage_timer('scraper_logging'):
+            self.logger.log_response(
+                self.current_query_id, form_state.url, form_state.method,
+                {**dict(self.session.headers), **search_headers}, search_data,
+                search_response.status_code, dict(search_response.headers),
+                search_response.text, processing_time=int((time.time() - search_start) * 1000)
+            )
+        return search_response
+    
     def search_case(self, case_type: str, case_number: str, filing_year: str, 
                    max_retries: int = 3, ip_address: str = None, user_agent: str = None) -> Tuple[bool, Dict, str]:
         """
@@ -527,141 +859,94 @@ class DelhiHighCourtScraper:
             try:
                 logger.info(f"Searching case: {case_type} {case_number}/{filing_year} (Attempt {attempt + 1}/{max_retries})")
 
-                step_start = time.time()
-                response = self.session.get(self.case_search_url, timeout=30)
-                
-                self.logger.log_response(
-                    self.current_query_id, self.case_search_url, 'GET',
-                    dict(self.session.headers), {}, response.status_code,
-                    dict(response.headers), response.text,
-                    processing_time=int((time.time() - step_start) * 1000)
-                )
-                
-                if response.status_code != 200:
-                    error_msg = f"Failed to load search page. Status: {response.status_code}"
-                    logger.error(error_msg)
-                    if attempt == max_retries - 1:
-                        return False, {}, error_msg
-                    continue
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                form_data = self._extract_form_data(soup)
-                logger.info(f"Extracted {len(form_data)} form fields")
-                
-                captcha_url = self._get_captcha_image(soup)
-                captcha_solution = None
-                captcha_required = captcha_url is not None
-                
-                if captcha_url:
-                    logger.info(f"CAPTCHA detected: {captcha_url}")
-                    captcha_solution = self._solve_captcha(captcha_url)
-                    if not captcha_solution:
-                        logger.warning("Failed to solve CAPTCHA, attempting search anyway")
-                        captcha_solution = ""
-
-                search_data = form_data.copy()
-                search_data.update({
-                    'case_type': case_type,
-                    'case_number': case_number,
-                    'filing_year': filing_year,
-                })
+                form_state = self._cached_form_state()
+                reused = form_state is not None
+                if form_state is None:
+                    form_state, error_msg = self._load_search_form()
+                    if form_state is None:
+                        if attempt == max_retries - 1:
+                            return False, {}, error_msg
+                        record_retry('search_page_status')
+                        continue
                 
-                if captcha_required and captcha_solution:
-                    captcha_fields = ['captcha', 'captcha_code', 'security_code', 'verification_code']
-                    for field in captcha_fields:
-                        if field in form_data or any(field in key.lower() for key in form_data.keys()):
-                            search_data[field] = captcha_solution
-                            break
-                    else:
-                        search_data['captcha'] = captcha_solution
-
                 logger.info("Submitting search request")
-                search_start = time.time()
-
-                search_url = self.case_search_url
-                form = soup.find('form')
-                if form:
-                    action = form.get('action')
-                    if action:
-                        search_url = urljoin(self.base_url, action)
-                    method = form.get('method', 'POST').upper()
-                else:
-                    method = 'POST'
- 
-                search_headers = {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                    'Referer': self.case_search_url,
-                    'Origin': self.base_url
-                }
+                search_response = self._submit_search(form_state, case_type, case_number, filing_year)
                 
-                if method == 'POST':
-                    search_response = self.session.post(
-                        search_url, data=search_data, headers=search_headers, timeout=30
-                    )
-                else:
-                    search_response = self.session.get(
-                        search_url, params=search_data, headers=search_headers, timeout=30
-                    )
+                if reused and search_response.status_code in FORM_REJECTED_STATUSES:
+                    # The session's tokens expired since they were cached: reload the form once and resubmit
+                    logger.info(f"Cached search form rejected (status {search_response.status_code}), reloading it")
+                    self.invalidate_form_state()
+                    form_state, error_msg = self._load_search_form()
+                    if form_state is None:
+                        if attempt == max_retries - 1:
+                            return False, {}, error_msg
+                        record_retry('search_page_status')
+                        continue
+                    search_response = self._submit_search(form_state, case_type, case_number, filing_year)
                 
-                search_time = int((time.time() - search_start) * 1000)
-
-                self.logger.log_response(
-                    self.current_query_id, search_url, method,
-                    {**dict(self.session.headers), **search_headers}, search_data,
-                    search_response.status_code, dict(search_response.headers),
-                    search_response.text, processing_time=search_time
-                )
+                captcha_required = form_state.captcha_required
+                captcha_solution = form_state.captcha_solution
 
                 if search_response.status_code == 200:
-                    case_data = self._parse_case_details(search_response.text)
+                    with stage_timer('parse'):
+                        case_data = self._parse_case_details(search_response.text)
                     
                     if case_data:
                         total_time = int((time.time() - start_time) * 1000)
                         logger.info(f"Successfully found case data in {total_time}ms")
                         
-                        with sqlite3.connect(self.logger.db_path) as conn:
-                            conn.execute('''
-                                UPDATE scraper_queries 
-                                SET success = TRUE, response_time_ms = ?, 
-                                    captcha_required = ?, captcha_solved = ?
-                                WHERE id = ?
-                            ''', (total_time, captcha_required, captcha_solution is not None, self.current_query_id))
-                            conn.commit()
+                        self.logger.update_query_result(
+                            self.current_query_id, True, total_time,
+                            captcha_required=captcha_required,
+                            captcha_solved=captcha_solution is not None
+                        )
                         
                         return True, case_data, ""
                     else:
-                        if any(phrase in search_response.text.lower() for phrase in 
-                               ['not found', 'no data', 'no record', 'invalid case', 'does not exist']):
-                            error_msg = "Case not found in court records"
+                        if any(phrase in search_response.text.lower() for phrase in NOT_FOUND_PHRASES):
+                            error_msg = CASE_NOT_FOUND_ERROR
                             logger.info(error_msg)
                             return False, {}, error_msg
                         else:
                             logger.warning("No case data found, but no explicit error message")
+                            self.invalidate_form_state()
                             if attempt < max_retries - 1:
-                                time.sleep(2 ** attempt)  
+                                backoff_sleep(2 ** attempt, 'no_case_data')
                                 continue
                 else:
                     error_msg = f"Search request failed. Status: {search_response.status_code}"
                     logger.error(error_msg)
+                    self.invalidate_form_state()
                     if attempt < max_retries - 1:
-                        time.sleep(2 ** attempt)
+                        backoff_sleep(2 ** attempt, 'search_status')
                         continue
                     return False, {}, error_msg
                 
+            except UpstreamUnavailableError as e:
+                # Fail fast instead of adding retries to an upstream that is already struggling
+                logger.warning(f"Not searching, court website unavailable: {str(e)}")
+                record_upstream('search', 'rejected')
+                self.logger.update_query_result(
+                    self.current_query_id, False, int((time.time() - start_time) * 1000),
+                    error_message=str(e)
+                )
+                return False, {}, UPSTREAM_UNAVAILABLE_ERROR
+            
             except requests.exceptions.Timeout:
                 error_msg = "Request timeout - court website may be slow"
                 logger.error(error_msg)
+                record_upstream('search', 'timeout')
                 if attempt < max_retries - 1:
-                    time.sleep(5)
+                    backoff_sleep(5, 'timeout')
                     continue
                 return False, {}, error_msg
             
             except requests.exceptions.ConnectionError:
                 error_msg = "Connection error - court website may be down"
                 logger.error(error_msg)
+                record_upstream('search', 'connection_error')
                 if attempt < max_retries - 1:
-                    time.sleep(10)
+                    backoff_sleep(10, 'connection_error')
                     continue
                 return False, {}, error_msg
             
@@ -669,26 +954,62 @@ class DelhiHighCourtScraper:
                 error_msg = f"Unexpected error during search: {str(e)}"
                 logger.error(error_msg, exc_info=True)
                 if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
+                    backoff_sleep(2 ** attempt, 'error')
                     continue
                 return False, {}, error_msg
 
         total_time = int((time.time() - start_time) * 1000)
         
-        with sqlite3.connect(self.logger.db_path) as conn:
-            conn.execute('''
-                UPDATE scraper_queries 
-                SET success = FALSE, response_time_ms = ?, error_message = ?
-                WHERE id = ?
-            ''', (total_time, "Max retries exceeded", self.current_query_id))
-            conn.commit()
+        self.logger.update_query_result(
+            self.current_query_id, False, total_time, error_message="Max retries exceeded"
+        )
         
         return False, {}, "Failed to search case after multiple attempts"
 
+MOCK_LATENCY_DISTRIBUTIONS = {
+    'fixed': lambda seconds: (lambda: seconds),
+    'uniform': lambda low, high: (lambda: random.uniform(low, high)),
+    'normal': lambda mean, stddev: (lambda: max(random.gauss(mean, stddev), 0.0)),
+    'lognormal': lambda median, sigma: (lambda: random.lognormvariate(math.log(median), sigma)),
+}
+
+def parse_mock_latency(spec: str) -> Optional[Callable[[], float]]:
+    """
+    Parse a MOCK_LATENCY spec such as "uniform:1,3", "fixed:0.2", "normal:1.5,0.5"
+    or "lognormal:0.8,0.6" (median seconds, sigma) into a sampler of delays in
+    seconds; "0", "none" or "" mean no delay (None)
+    """
+    spec = (spec or '').strip().lower()
+    if spec in ('', '0', 'none'):
+        return None
+    name, _, params = spec.partition(':')
+    distribution = MOCK_LATENCY_DISTRIBUTIONS.get(name)
+    if distribution is None:
+        raise ValueError(f"Unknown mock latency distribution {name!r}, expected one of "
+                         f"{', '.join(MOCK_LATENCY_DISTRIBUTIONS)}")
+    try:
+        return distribution(*(float(param) for param in params.split(',')))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid mock latency {spec!r}")
+
 class MockScraper:
-    """Mock scraper for testing and demonstration purposes"""
+    """
+    Mock scraper for testing and demonstration purposes
+    
+    Serves the hand-written cases below, then the synthetic dataset at
+    MOCK_DATASET (see synthetic_cases.py) if one is configured, after a delay
+    drawn from MOCK_LATENCY (default "fixed:0", no delay; "uniform:1,3" mimics
+    a real search but holds the calling thread for the whole delay).
+    """
     
-    def __init__(self):
+    def __init__(self, latency: Optional[str] = None, dataset: Optional[str] = None):
+        self.latency = parse_mock_latency(os.environ.get("MOCK_LATENCY", "fixed:0") if latency is None else latency)
+        dataset = os.environ.get("MOCK_DATASET") if dataset is None else dataset
+        if dataset:
+            from synthetic_cases import get_synthetic_case_store
+            self.dataset = get_synthetic_case_store(dataset)
+        else:
+            self.dataset = None
         self.mock_data = {
             "W.P.(C).15234.2024": {
                 "case_number": "15234",
@@ -958,23 +1279,67 @@ class MockScraper:
             }
         }
     
-    def search_case(self, case_type: str, case_number: str, filing_year: str) -> Tuple[bool, Dict, str]:
-        """Mock search that returns predefined data"""
-        
-        time.sleep(random.uniform(1, 3))
-        
-        case_key = f"{case_type}.{case_number}.{filing_year}"
+    def delay(self) -> float:
+        """Seconds the next search should take"""
+        return self.latency() if self.latency is not None else 0.0
+    
+    def lookup(self, case_type: str, case_number: str, filing_year: str) -> Tuple[bool, Dict, str]:
+        """Find the case without any simulated delay"""
+        from cache import normalize_case_key
+        case_key = normalize_case_key(case_type, case_number, filing_year)
         
-        if case_key in self.mock_data:
+        case_data = self.mock_data.get(case_key)
+        if case_data is None and self.dataset is not None:
+            case_data = self.dataset.get(case_type, case_number, filing_year)
+        if case_data is not None:
             logger.info(f"Mock scraper: Found case {case_key}")
-            return True, self.mock_data[case_key], ""
+            return True, case_data, ""
         else:
             logger.info(f"Mock scraper: Case {case_key} not found")
-            return False, {}, "Case not found in court records"
+            return False, {}, CASE_NOT_FOUND_ERROR
+    
+    def search_case(self, case_type: str, case_number: str, filing_year: str) -> Tuple[bool, Dict, str]:
+        """Mock search that returns predefined data"""
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+        return self.lookup(case_type, case_number, filing_year)
+
+class AsyncMockScraper(MockScraper):
+    """MockScraper with the interface of AsyncDelhiHighCourtScraper; delays do not block the event loop"""
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.aclose()
+    
+    async def aclose(self):
+        pass
+    
+    async def search_case(self, case_type: str, case_number: str, filing_year: str) -> Tuple[bool, Dict, str]:
+        delay = self.delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.lookup(case_type, case_number, filing_year)
+    
+    async def search_many(self, cases: Iterable[Tuple[str, str, str]],
+                          concurrency: int = 100) -> List[Tuple[bool, Dict, str]]:
+        """Look up many (case_type, case_number, filing_year) tuples, at most `concurrency` at once"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run(case):
+            async with semaphore:
+                return await self.search_case(*case)
+        
+        return await asyncio.gather(*(run(case) for case in cases))
 
-def get_scraper(use_mock: bool = False):
+def get_scraper(use_mock: bool = False, use_async: bool = False, **kwargs):
     """Factory function to get appropriate scraper"""
     if use_mock:
-        return MockScraper()
+        return AsyncMockScraper() if use_async else MockScraper()
+    elif use_async:
+        from async_scraper import AsyncDelhiHighCourtScraper
+        return AsyncDelhiHighCourtScraper(**kwargs)
     else:
-        return DelhiHighCourtScraper()
\ No newline at end of file
+        return DelhiHighCourtScraper(**kwargs)
\ No newline at end of file
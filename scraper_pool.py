@@ -0,0 +1,185 @@
+"""Pool of warm scraper sessions shared by the request threads of a worker
+
+Building a DelhiHighCourtScraper opens a new HTTP session and makes a
+blocking GET to the court homepage for its cookies. The pool keeps up to
+``size`` scrapers that already did that and hands them out with
+``checkout()``; a background thread tops the pool up and re-warms scrapers
+that sat idle longer than ``max_idle`` seconds (dropping those whose session
+can no longer be initialized), so searches do not pay for the bootstrap.
+
+A scraper is only returned to the pool when the search using it did not
+raise, and is retired after ``max_uses`` searches. When the pool is empty,
+``checkout()`` builds a scraper inline rather than making the request wait.
+With ``size=0`` nothing is pooled and every checkout builds a new scraper.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class _PooledScraper:
+    __slots__ = ('scraper', 'warmed_at', 'uses')
+
+    def __init__(self, scraper: Any):
+        self.scraper = scraper
+        self.warmed_at = time.monotonic()
+        self.uses = 0
+
+class ScraperPool:
+    """Thread-safe checkout/checkin pool of pre-initialized scrapers"""
+
+    def __init__(self, factory: Callable[[], Any], size: int = 4, max_idle: float = 300.0,
+                 max_uses: int = 500, interval: float = 30.0, upstream=None):
+        self.factory = factory
+        self.size = size
+        self.max_idle = max_idle
+        self.max_uses = max_uses
+        self.interval = interval
+        self.upstream = upstream
+        self._idle: List[_PooledScraper] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._started_pid = None
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.rewarmed = 0
+        self.discarded = 0
+
+    def ensure_started(self):
+        """Start the warming thread once per process (safe to call after a gunicorn fork)"""
+        if self.size <= 0 or self._started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            with self._lock:
+                # Sessions inherited from the parent process share its sockets
+                self._idle.clear()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="scraper-pool", daemon=True)
+            self._thread.start()
+            self._started_pid = os.getpid()
+            logger.info(f"Scraper pool started ({self.size} sessions)")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    @contextmanager
+    def checkout(self):
+        """Borrow a warm scraper for the duration of the block"""
+        entry = self._take()
+        try:
+            yield entry.scraper
+        except BaseException:
+            self._discard(entry)
+            raise
+        self._checkin(entry)
+
+    def _take(self) -> _PooledScraper:
+        with self._lock:
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            self.misses += 1
+        self._wake.set()
+        return self._create()
+
+    def _create(self) -> _PooledScraper:
+        entry = _PooledScraper(self.factory())
+        with self._lock:
+            self.created += 1
+        return entry
+
+    def _checkin(self, entry: _PooledScraper):
+        entry.uses += 1
+        with self._lock:
+            if entry.uses < self.max_uses and len(self._idle) < self.size:
+                self._idle.append(entry)
+                return
+        self._discard(entry)
+
+    def _discard(self, entry: _PooledScraper):
+        with self._lock:
+            self.discarded += 1
+        close = getattr(entry.scraper, 'close', None)
+        if close is not None:
+            close()
+
+    def run_forever(self):
+        """Keep the pool full and its sessions fresh until stop() is called"""
+        while not self._stop.is_set():
+            try:
+                self.maintain()
+            except Exception as e:
+                logger.error(f"Scraper pool maintenance failed: {str(e)}", exc_info=True)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def maintain(self) -> int:
+        """Re-warm idle scrapers past max_idle and top the pool up; returns scrapers added"""
+        if self.upstream is not None and self.upstream.is_open():
+            return 0  # warming requests would only be rejected
+        now = time.monotonic()
+        with self._lock:
+            stale = [entry for entry in self._idle if now - entry.warmed_at >= self.max_idle]
+            self._idle = [entry for entry in self._idle if now - entry.warmed_at < self.max_idle]
+        for i, entry in enumerate(stale):
+            if entry.scraper.refresh_session():
+                entry.warmed_at = time.monotonic()
+                with self._lock:
+                    self.rewarmed += 1
+                    self._idle.insert(0, entry)
+            else:
+                logger.warning("Dropping pooled scraper whose session could not be re-initialized")
+                self._discard(entry)
+                # The court site is struggling: keep the rest for the next round instead of adding load
+                with self._lock:
+                    self._idle[:0] = stale[i + 1:]
+                return 0
+
+        added = 0
+        while not self._stop.is_set():
+            with self._lock:
+                if len(self._idle) >= self.size:
+                    break
+            entry = self._create()
+            with self._lock:
+                full = len(self._idle) >= self.size
+                if not full:
+                    self._idle.insert(0, entry)
+            if full:
+                self._discard(entry)
+                break
+            added += 1
+        return added
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'hits': self.hits,
+                'misses': self.misses,
+                'created': self.created,
+                'rewarmed': self.rewarmed,
+                'discarded': self.discarded
+            }
+
+def get_scraper_pool(factory: Callable[[], Any], size: Optional[int] = None, upstream=None) -> ScraperPool:
+    """Factory function configured through the SCRAPER_POOL_* environment variables"""
+    if size is None:
+        size = int(os.environ.get("SCRAPER_POOL_SIZE", "4"))
+    return ScraperPool(factory, size=size,
+                       max_idle=float(os.environ.get("SCRAPER_POOL_MAX_IDLE", "300")),
+                       max_uses=int(os.environ.get("SCRAPER_POOL_MAX_USES", "500")),
+                       interval=float(os.environ.get("SCRAPER_POOL_INTERVAL", "30")),
+                       upstream=upstream)
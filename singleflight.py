@@ -0,0 +1,160 @@
+"""Request coalescing for identical concurrent case searches
+
+Threads in one worker that ask for the same key while a lookup is in flight
+wait for the leader and share its result. When ``lock_dir`` is set, the leader
+also takes an exclusive file lock on one of ``lock_stripes`` files chosen by
+hashing the key, so leaders in other gunicorn workers queue behind it. Each of
+them then re-checks the shared cache instead of scraping again, which only
+finds the result when the cache is shared between workers: get_single_flight
+leaves file locks off unless it is told the cache is shared.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class _Call:
+    """A lookup in flight that followers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Ensure only one lookup per key runs at a time"""
+
+    def __init__(self, lock_dir: Optional[str] = None, lock_timeout: float = 120.0, lock_stripes: int = 256):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.lock_timeout = lock_timeout
+        self.lock_stripes = max(lock_stripes, 1)
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+        if lock_dir and fcntl is None:
+            logger.warning("fcntl unavailable, cross-worker request coalescing disabled")
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once for all concurrent callers with the same key
+
+        Returns:
+            Tuple[Any, bool]: (result, shared) where shared is True for followers
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.followers += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            with self._worker_lock(key):
+                call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        if call.waiters:
+            logger.info(f"Coalesced {call.waiters} concurrent lookups for {key}")
+        return call.result, False
+
+    def _worker_lock(self, key: str):
+        if not self.lock_dir:
+            return _NullLock()
+        # A fixed set of lock files: unrelated keys rarely share a stripe, and the directory never grows
+        stripe = int(hashlib.sha1(key.encode()).hexdigest(), 16) % self.lock_stripes
+        lock_name = f"stripe-{stripe}.lock"
+        return _FileLock(os.path.join(self.lock_dir, lock_name), self.lock_timeout)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'followers': self.followers,
+                'in_flight': len(self._calls),
+                'cross_worker': bool(self.lock_dir)
+            }
+
+class _NullLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class _FileLock:
+    """Exclusive flock on a lock stripe file, given up after timeout seconds"""
+
+    def __init__(self, path: str, timeout: float):
+        self.path = path
+        self.timeout = timeout
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    logger.warning(f"Timed out waiting for {self.path}, proceeding without lock")
+                    os.close(self._fd)
+                    self._fd = None
+                    return self
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        return False
+
+def get_single_flight(shared_cache: bool = False) -> SingleFlight:
+    """
+    Factory function configured through SINGLEFLIGHT_LOCK_DIR
+
+    Cross-worker locking is only enabled with shared_cache: a worker that
+    waited on the lock finds the leader's result in a cache every worker
+    reads, and would otherwise just scrape again after waiting.
+    """
+    lock_dir = os.environ.get("SINGLEFLIGHT_LOCK_DIR") or None
+    if lock_dir and not shared_cache:
+        logger.warning("SINGLEFLIGHT_LOCK_DIR ignored: cross-worker coalescing needs a shared case cache "
+                       "(CASE_CACHE_BACKEND=sqlite)")
+        lock_dir = None
+    return SingleFlight(lock_dir=lock_dir,
+                        lock_timeout=float(os.environ.get("SINGLEFLIGHT_LOCK_TIMEOUT", "120")),
+                        lock_stripes=int(os.environ.get("SINGLEFLIGHT_LOCK_STRIPES", "256")))
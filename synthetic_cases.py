@@ -0,0 +1,166 @@
+"""Deterministic synthetic case data for load testing in mock mode
+
+``build_dataset`` writes ``count`` realistic-looking cases, spread evenly
+over every CASE_TYPES x FILING_YEARS combination, to an indexed SQLite file.
+The same seed always produces the same cases, and case ``i`` is always
+``case_id(i)``, so load tests can pick existing (or missing) cases without
+reading the file. MockScraper serves the file when ``MOCK_DATASET`` points
+at it.
+"""
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+from cache import normalize_case_key
+from mock_data import CASE_TYPES, FILING_YEARS
+
+logger = logging.getLogger(__name__)
+
+CASE_FIELDS = ('case_number', 'case_type', 'case_title', 'petitioner', 'respondent', 'filing_date',
+               'next_hearing_date', 'latest_order', 'judge_name', 'case_status', 'court_number', 'pdf_link')
+
+FIRST_NAMES = ('Rajesh', 'Sunita', 'Amit', 'Priya', 'Vinod', 'Neha', 'Suresh', 'Anjali', 'Rohit', 'Kavita',
+               'Deepak', 'Meera', 'Kunal', 'Pooja', 'Arjun', 'Ritu', 'Manoj', 'Shalini', 'Vikram', 'Farah',
+               'Harpreet', 'Imran', 'Lakshmi', 'Gaurav', 'Nisha', 'Sanjay', 'Ayesha', 'Tarun', 'Divya', 'Karan')
+LAST_NAMES = ('Sharma', 'Singh', 'Gupta', 'Verma', 'Mehta', 'Kumar', 'Bhatia', 'Kapoor', 'Malhotra', 'Khan',
+              'Agarwal', 'Chauhan', 'Joshi', 'Iyer', 'Reddy', 'Saxena', 'Arora', 'Sethi', 'Nair', 'Das')
+COMPANY_WORDS = ('Global', 'Capital', 'Northern', 'Metro', 'Sunrise', 'Indus', 'Apex', 'Digital', 'Heritage',
+                 'Allied', 'Pioneer', 'Crescent')
+COMPANY_KINDS = ('Technologies', 'Builders', 'Traders', 'Infrastructure', 'Software Solutions', 'Logistics',
+                 'Constructions', 'Pharmaceuticals', 'Textiles', 'Finance')
+RESPONDENTS = ('Union of India & Ors.', 'State (NCT of Delhi)', 'State (NCT of Delhi) & Anr.',
+               'Delhi Development Authority', 'Municipal Corporation of Delhi', 'Delhi University',
+               'Delhi Transport Corporation & Ors.', 'Delhi Metro Rail Corporation', 'Central Bureau of Investigation',
+               'Directorate of Education & Ors.', 'Delhi Jal Board', 'Commissioner of Police & Ors.')
+JUDGES = ('Justice Prateek Jalan', 'Justice Suresh Kumar Kait', 'Justice Navin Chawla', 'Justice Amit Sharma',
+          'Justice Sanjeev Narula', 'Justice Rekha Palli', 'Justice Vibhu Bakhru', 'Justice C. Hari Shankar',
+          'Justice Anup Jairam Bhambhani', 'Justice Amit Bansal', 'Justice Jyoti Singh', 'Justice Vikas Mahajan',
+          'Justice Swarana Kanta Sharma', 'Justice Yashwant Varma', 'Justice Anoop Kumar Mendiratta')
+STATUSES = ('Pending', 'Notice Issued', 'Reply Filed', 'Reserved for Orders', 'Reserved for Judgment',
+            'Interim Relief Granted', 'Stay Granted', 'Referred to Mediation', 'Arguments Heard',
+            'Status Report Awaited', 'Documents Pending', 'Disposed')
+ORDERS = (
+    "Notice issued to the respondents, returnable on the next date. Counter affidavit to be filed within {weeks} weeks.",
+    "The Court has heard learned counsel for the parties and reserved orders. Interim directions to continue till then.",
+    "Status report sought from the respondents regarding compliance with the previous order within {weeks} weeks.",
+    "Parties are referred to the Delhi High Court Mediation and Conciliation Centre. Matter to be listed after the report.",
+    "The respondents are directed not to take any coercive steps against the petitioner till the next date of hearing.",
+    "Rejoinder, if any, be filed within {weeks} weeks. List for final arguments.",
+    "Arguments concluded in part. The petitioner seeks time to place additional documents on record.",
+    "The trial court record be requisitioned. Appeal admitted; the sentence is suspended during its pendency.",
+)
+
+def case_id(index: int) -> Tuple[str, str, str]:
+    """(case_type, case_number, filing_year) of the index-th synthetic case"""
+    combos = len(CASE_TYPES) * len(FILING_YEARS)
+    case_type = CASE_TYPES[index % len(CASE_TYPES)]
+    filing_year = FILING_YEARS[(index // len(CASE_TYPES)) % len(FILING_YEARS)]
+    return case_type, str(index // combos + 1), str(filing_year)
+
+def _party(rng: random.Random) -> str:
+    if rng.random() < 0.25:
+        return f"M/s {rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_KINDS)} Pvt. Ltd."
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+def generate_cases(count: int, seed: int = 0) -> Iterator[Dict[str, str]]:
+    """Yield the first count synthetic cases of seed (a larger count only appends cases)"""
+    rng = random.Random(seed)
+    for index in range(count):
+        case_type, case_number, filing_year = case_id(index)
+        petitioner = _party(rng)
+        respondent = rng.choice(RESPONDENTS) if rng.random() < 0.8 else f"{_party(rng)} & Ors."
+        filed = date(int(filing_year), 1, 1) + timedelta(days=rng.randrange(365))
+        slug = re.sub(r'[^A-Z]', '', case_type)
+        yield {
+            'case_number': case_number,
+            'case_type': case_type,
+            'case_title': f"{petitioner} vs {respondent}",
+            'petitioner': petitioner,
+            'respondent': respondent,
+            'filing_date': filed.isoformat(),
+            'next_hearing_date': (filed + timedelta(days=rng.randrange(30, 900))).isoformat(),
+            'latest_order': rng.choice(ORDERS).format(weeks=rng.randrange(2, 9)),
+            'judge_name': rng.choice(JUDGES),
+            'case_status': rng.choice(STATUSES),
+            'court_number': f"Court No. {rng.randrange(1, 41)}",
+            'pdf_link': f"https://delhihighcourt.nic.in/judgments/{slug}_{case_number}_{filing_year}.pdf"
+        }
+
+def build_dataset(path: str, count: int, seed: int = 0, batch_size: int = 10000) -> int:
+    """(Re)write the synthetic_cases table of the SQLite file at path; returns cases written"""
+    conn = sqlite3.connect(path)
+    try:
+        # A throwaway file that can be regenerated: trade durability for load speed
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('DROP TABLE IF EXISTS synthetic_cases')
+        conn.execute(f'''
+            CREATE TABLE synthetic_cases (
+                case_key TEXT NOT NULL,
+                filing_year TEXT NOT NULL,
+                {', '.join(f'{field} TEXT' for field in CASE_FIELDS)}
+            )
+        ''')
+        insert_sql = (f"INSERT INTO synthetic_cases (case_key, filing_year, {', '.join(CASE_FIELDS)}) "
+                      f"VALUES ({', '.join('?' * (len(CASE_FIELDS) + 2))})")
+        batch, written = [], 0
+        for index, case in enumerate(generate_cases(count, seed)):
+            case_type, case_number, filing_year = case_id(index)
+            batch.append((normalize_case_key(case_type, case_number, filing_year), filing_year)
+                         + tuple(case[field] for field in CASE_FIELDS))
+            if len(batch) >= batch_size:
+                conn.executemany(insert_sql, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(insert_sql, batch)
+            written += len(batch)
+        # Building the indexes after the load is much faster than maintaining them row by row
+        conn.execute('CREATE UNIQUE INDEX idx_synthetic_cases_key ON synthetic_cases (case_key)')
+        conn.execute('CREATE INDEX idx_synthetic_cases_hearing ON synthetic_cases (next_hearing_date)')
+        conn.commit()
+    finally:
+        conn.close()
+    logger.info(f"Wrote {written} synthetic cases to {path}")
+    return written
+
+class SyntheticCaseStore:
+    """Read-only lookups in a file written by build_dataset, one connection per thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True,
+                                   check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def get(self, case_type: str, case_number: str, filing_year: str) -> Optional[Dict[str, str]]:
+        row = self._get_connection().execute(
+            f"SELECT {', '.join(CASE_FIELDS)} FROM synthetic_cases WHERE case_key = ?",
+            (normalize_case_key(case_type, case_number, filing_year),)).fetchone()
+        return dict(zip(CASE_FIELDS, row)) if row else None
+
+    def count(self) -> int:
+        return self._get_connection().execute('SELECT COUNT(*) FROM synthetic_cases').fetchone()[0]
+
+_stores: Dict[str, SyntheticCaseStore] = {}
+_stores_lock = threading.Lock()
+
+def get_synthetic_case_store(path: str) -> SyntheticCaseStore:
+    """Process-wide store for path, shared by every MockScraper"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SyntheticCaseStore(path)
+        return store
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from async_scraper import AsyncDelhiHighCourtScraper
+from ratelimit import AsyncRateLimiter
+from scraper import CASE_NOT_FOUND_ERROR, DelhiHighCourtScraper
+
+SEARCH_PAGE = """
+<html><body>
+<form action="/app/case-number" method="post">
+    <input type="hidden" name="__VIEWSTATE" value="/wEPDwUKLTI2MTQ5NDEzNQ==">
+    <input type="hidden" name="csrf_token" value="stub-token">
+    <select name="case_type"><option value="W.P.(C)" selected>W.P.(C)</option></select>
+    <input type="text" name="case_number">
+</form>
+</body></html>
+"""
+
+RESULT_PAGE = """
+<html><body><table>
+<tr><td>Case No.</td><td>{case_number}</td></tr>
+<tr><td>Petitioner</td><td>Rajesh Kumar Sharma</td></tr>
+<tr><td>Respondent</td><td>Union of India &amp; Ors.</td></tr>
+<tr><td>Next Hearing Date</td><td>2024-08-15</td></tr>
+<tr><td>Status</td><td>Pending</td></tr>
+</table><a href="/judgments/WPC_{case_number}_2024.pdf">Order</a></body></html>
+"""
+
+class StubCourtHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the court search page and result page"""
+
+    delay = 0.05
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, status=200):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        self._send(SEARCH_PAGE if self.path.startswith("/app/case-number") else "<html></html>")
+
+    def do_POST(self):
+        time.sleep(self.delay)
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        case_number = form.get("case_number", [""])[0]
+        if form.get("csrf_token") != ["stub-token"]:
+            self._send("<html>Invalid token</html>", 403)
+        elif case_number.startswith("404"):
+            self._send("<html><body>No record found</body></html>")
+        else:
+            self._send(RESULT_PAGE.format(case_number=case_number))
+
+class StubCourtServer(ThreadingHTTPServer):
+    # 50 lookups connect at once; the default backlog of 5 resets some of them on a busy machine
+    request_queue_size = 128
+
+def start_stub_server():
+    server = StubCourtServer(("127.0.0.1", 0), StubCourtHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_async_scraper_against_stub():
+    """Concurrent async lookups against a local stub of the court site"""
+    print("⚡ Testing Async Scraper")
+    print("=" * 50)
+
+    server, base_url = start_stub_server()
+    db_path = os.path.join(tempfile.mkdtemp(), "async_scraper_test.db")
+
+    async def run():
+        async with AsyncDelhiHighCourtScraper(db_path, write_behind_logging=True, base_url=base_url,
+                                              rate_limiter=AsyncRateLimiter(rate=0)) as scraper:
+            cases = [("W.P.(C)", str(15000 + i), "2024") for i in range(50)] + [("W.P.(C)", "404", "2024")]
+            start = time.monotonic()
+            results = await scraper.search_many(cases, concurrency=50)
+            return results, time.monotonic() - start, scraper
+
+    try:
+        results, elapsed, scraper = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    found = results[:-1]
+    assert all(success for success, _, _ in found)
+    assert [data["case_number"] for _, data, _ in found] == [str(15000 + i) for i in range(50)]
+    assert found[0][1]["pdf_link"] == f"{base_url}/judgments/WPC_15000_2024.pdf"
+    assert results[-1] == (False, {}, CASE_NOT_FOUND_ERROR)
+    # 51 sequential lookups would need > 5s (2 round trips of 50ms each)
+    assert elapsed < 3, f"lookups did not overlap ({elapsed:.2f}s)"
+    print(f"✓ 51 lookups in {elapsed:.2f}s")
+
+    assert scraper.logger.flush()
+    print("✓ Logs flushed")
+
+def test_sync_scraper_against_stub():
+    """The blocking scraper runs the same flow against the stub"""
+    print("\n🕸️ Testing Sync Scraper Against Stub")
+    print("=" * 50)
+
+    server, base_url = start_stub_server()
+    db_path = os.path.join(tempfile.mkdtemp(), "sync_scraper_test.db")
+    try:
+        scraper = DelhiHighCourtScraper(db_path, write_behind_logging=False, base_url=base_url)
+        success, case_data, error = scraper.search_case("W.P.(C)", "15234", "2024")
+    finally:
+        server.shutdown()
+
+    assert success, error
+    assert case_data["petitioner"] == "Rajesh Kumar Sharma"
+    assert case_data["case_status"] == "Pending"
+    print("✓ Sync scraper parsed the stub result page")
+
+if __name__ == "__main__":
+    test_async_scraper_against_stub()
+    test_sync_scraper_against_stub()
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import tempfile
+
+from flask import Flask
+
+from blobstore import CREATE_BLOB_TABLE_SQL, decompress_blob, migrate_sqlite_html
+from scraper import SQLiteLogger
+
+PAGE = "<html><body><table><tr><td>Case No.</td><td>W.P.(C) 15234/2024</td></tr></table></body></html>"
+
+def test_logger_deduplicates_html():
+    """Identical pages are stored once, compressed, and read back intact"""
+    print("🗜️ Testing HTML Blob Store")
+    print("=" * 50)
+
+    db_path = os.path.join(tempfile.mkdtemp(), "blob_test.db")
+    logger = SQLiteLogger(db_path)
+    query_id = logger.log_query("W.P.(C)", "15234", "2024")
+    for _ in range(3):
+        logger.log_response(query_id, "https://example.com", "GET", {}, {}, 200, {}, PAGE)
+    logger.log_response(query_id, "https://example.com", "POST", {}, {}, 200, {}, PAGE + "<!-- 2 -->")
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM scraper_responses").fetchone()[0] == 4
+        assert conn.execute("SELECT COUNT(*) FROM scraper_responses WHERE raw_html IS NOT NULL").fetchone()[0] == 0
+        blobs = conn.execute("SELECT codec, size, data FROM html_blobs").fetchall()
+        first_id = conn.execute("SELECT MIN(id) FROM scraper_responses").fetchone()[0]
+    assert len(blobs) == 2
+    assert decompress_blob(blobs[0][0], blobs[0][2]) == PAGE
+    assert blobs[0][1] == len(PAGE)
+    assert logger.get_response_html(first_id) == PAGE
+    print("✓ 4 responses share 2 blobs")
+
+def test_lost_blob_write_is_retried():
+    """A blob whose write never committed is written again by the next response with that page"""
+    print("\n🔁 Testing Lost Blob Writes")
+    print("=" * 50)
+
+    db_path = os.path.join(tempfile.mkdtemp(), "lost_blob_test.db")
+    logger = SQLiteLogger(db_path, write_behind=True)
+    query_id = logger.log_query("W.P.(C)", "15234", "2024")
+    # Without the table the batch fails and the blob insert is dropped while the response row commits
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE html_blobs")
+    logger.log_response(query_id, "https://example.com", "GET", {}, {}, 200, {}, PAGE)
+    assert logger.flush()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(CREATE_BLOB_TABLE_SQL)
+
+    logger.log_response(query_id, "https://example.com", "GET", {}, {}, 200, {}, PAGE)
+    assert logger.flush()
+    with sqlite3.connect(db_path) as conn:
+        dangling = conn.execute("SELECT COUNT(*) FROM scraper_responses r LEFT JOIN html_blobs b "
+                                "ON b.hash = r.html_hash WHERE b.hash IS NULL").fetchone()[0]
+    logger.close()
+    assert dangling == 0
+    print("✓ Page re-stored after its first blob write was dropped")
+
+def test_migrate_inline_html():
+    """Legacy rows with inline raw_html are moved into html_blobs"""
+    print("\n🚚 Testing Inline HTML Migration")
+    print("=" * 50)
+
+    db_path = os.path.join(tempfile.mkdtemp(), "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE scraper_responses (id INTEGER PRIMARY KEY, raw_html TEXT, html_hash TEXT)")
+        conn.executemany("INSERT INTO scraper_responses (raw_html) VALUES (?)", [(PAGE,)] * 10)
+
+    result = migrate_sqlite_html(db_path, batch_size=3)
+    assert result["rows"] == 10 and result["blobs"] == 1
+    assert migrate_sqlite_html(db_path)["rows"] == 0
+
+    logger = SQLiteLogger(db_path)
+    assert logger.get_response_html(7) == PAGE
+    print(f"✓ {result['inline_bytes']} inline bytes -> {result['blob_bytes']} blob bytes")
+
+def test_flask_responses_reference_blobs():
+    """models.log_response stores HTML by hash and old tables gain the new column"""
+    print("\n🧱 Testing Response Blob References")
+    print("=" * 50)
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'court.db')}"
+    try:
+        from models import HtmlBlob, Response, _upgrade_schema, db, init_db, log_response, migrate_inline_html
+        app = Flask(__name__)
+        init_db(app)
+    finally:
+        del os.environ["DATABASE_URL"]
+
+    with app.app_context():
+        # Recreate a database from before raw_html_hash existed
+        db.session.execute(db.text("ALTER TABLE responses DROP COLUMN raw_html_hash"))
+        db.session.execute(db.text("INSERT INTO responses (query_id, raw_html) VALUES (1, :html)"), {"html": PAGE})
+        db.session.commit()
+        _upgrade_schema()
+
+        first = log_response(1, raw_html=PAGE)
+        second = log_response(1, raw_html=PAGE)
+        assert first.raw_html is None and first.raw_html_hash == second.raw_html_hash
+        assert second.html == PAGE
+
+        assert migrate_inline_html() == 1
+        legacy = db.session.get(Response, 1)
+        assert legacy.raw_html is None and legacy.html == PAGE
+        assert db.session.query(HtmlBlob).count() == 1
+    print("✓ Responses share one blob")
+
+if __name__ == "__main__":
+    test_logger_deduplicates_html()
+    test_lost_blob_write_is_retried()
+    test_migrate_inline_html()
+    test_flask_responses_reference_blobs()
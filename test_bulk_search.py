@@ -0,0 +1,78 @@
+import threading
+import time
+
+from bulk import BulkInputError, bulk_search, parse_bulk_input
+from ratelimit import RateLimiter
+from scraper import CASE_NOT_FOUND_ERROR
+
+def test_parse_bulk_input():
+    """CSV and JSON bodies both produce case rows"""
+    print("📄 Testing Bulk Input Parsing")
+    print("=" * 50)
+
+    csv_body = "case_type,case_number,filing_year\nW.P.(C),15234,2024\nCRL.A.,892,2023\n"
+    assert parse_bulk_input(csv_body, "text/csv")[1] == {
+        "case_type": "CRL.A.", "case_number": "892", "filing_year": "2023"}
+
+    json_body = '{"cases": [{"case_type": "RFA", "case_number": 210, "filing_year": 2022}]}'
+    assert parse_bulk_input(json_body, "application/json") == [
+        {"case_type": "RFA", "case_number": "210", "filing_year": "2022"}]
+
+    try:
+        parse_bulk_input('[{"case_type": "RFA"}]', "application/json")
+        assert False, "missing fields accepted"
+    except BulkInputError:
+        pass
+    print("✓ CSV, JSON and invalid rows handled")
+
+def test_bulk_search_concurrency_and_retries():
+    """Lookups stay within the concurrency limit and transient failures are retried"""
+    print("\n📦 Testing Bulk Search")
+    print("=" * 50)
+
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+    calls = {}
+
+    def search(case_type, case_number, filing_year):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            calls[case_number] = calls.get(case_number, 0) + 1
+        time.sleep(0.05)
+        with lock:
+            in_flight.pop()
+        if case_number == "0":
+            return False, {}, CASE_NOT_FOUND_ERROR, False
+        if case_number == "1" and calls["1"] == 1:
+            return False, {}, "Request timeout - court website may be slow", False
+        return True, {"case_number": case_number}, "", False
+
+    cases = [{"case_type": "W.P.(C)", "case_number": str(i), "filing_year": "2024"} for i in range(12)]
+    results = list(bulk_search(cases, search, concurrency=3, retries=2, retry_backoff=0.01))
+
+    assert sorted(r["index"] for r in results) == list(range(12))
+    assert max(peak) <= 3
+    by_number = {r["case_number"]: r for r in results}
+    assert by_number["0"]["error"] == CASE_NOT_FOUND_ERROR and by_number["0"]["attempts"] == 1
+    assert by_number["1"]["success"] and by_number["1"]["attempts"] == 2
+    print(f"✓ 12 cases, peak concurrency {max(peak)}, transient failure retried")
+
+def test_rate_limiter():
+    """The token bucket spaces out acquisitions"""
+    print("\n🚦 Testing Rate Limiter")
+    print("=" * 50)
+
+    limiter = RateLimiter(rate=20, burst=1)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    elapsed = time.monotonic() - start
+    assert elapsed >= 0.18
+    print(f"✓ 5 acquisitions at 20/s took {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    test_parse_bulk_input()
+    test_bulk_search_concurrency_and_retries()
+    test_rate_limiter()
@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+from cache import MemoryCaseCache, SQLiteCaseCache, normalize_case_key
+from scraper import CASE_NOT_FOUND_ERROR
+
+CASE_DATA = {
+    "case_number": "15234",
+    "case_type": "W.P.(C)",
+    "case_title": "Rajesh Kumar Sharma vs Union of India & Ors.",
+    "case_status": "Pending"
+}
+
+def test_normalize_case_key():
+    """Equivalent user input maps to the same cache key"""
+    print("🔑 Testing Case Key Normalization")
+    print("=" * 50)
+
+    assert normalize_case_key(" w.p.(c) ", "015234", "2024 ") == "W.P.(C).15234.2024"
+    assert normalize_case_key("CRL.A.", "892", "2023") == "CRL.A.892.2023"
+    print("✓ Keys normalized")
+
+def check_cache_backend(cache):
+    """Exercise TTL, negative caching and LRU eviction on one backend"""
+    assert cache.get("W.P.(C).15234.2024") is None
+
+    assert cache.store_result("W.P.(C).15234.2024", True, CASE_DATA, "")
+    success, case_data, error = cache.get("W.P.(C).15234.2024")
+    assert success and case_data == CASE_DATA and error == ""
+    print(f"✓ [{cache.backend}] Positive result cached")
+
+    assert cache.store_result("CRL.A.1.2020", False, {}, CASE_NOT_FOUND_ERROR)
+    assert cache.get("CRL.A.1.2020") == (False, {}, CASE_NOT_FOUND_ERROR)
+    assert not cache.store_result("CRL.A.2.2020", False, {}, "Request timeout - court website may be slow")
+    assert cache.get("CRL.A.2.2020") is None
+    print(f"✓ [{cache.backend}] Not-found cached, transient errors skipped")
+
+    time.sleep(1.1)
+    assert cache.get("CRL.A.1.2020") is None
+    assert cache.get("W.P.(C).15234.2024") is not None
+    print(f"✓ [{cache.backend}] Negative entries expire first")
+
+    cache.clear()
+    for i in range(5):
+        cache.set(f"I.A.{i}.2024", True, {"case_number": str(i)})
+    cache.get("I.A.0.2024")
+    cache.set("I.A.5.2024", True, {"case_number": "5"})
+    if hasattr(cache, "evict"):
+        cache.evict()
+    assert cache.get("I.A.0.2024") is not None
+    assert cache.get("I.A.1.2024") is None
+    print(f"✓ [{cache.backend}] Least recently used entry evicted")
+
+    stats = cache.stats()
+    assert stats["hits"] > 0 and stats["misses"] > 0 and stats["size"] == 5
+    print(f"✓ [{cache.backend}] Stats: {stats}")
+
+def test_memory_cache():
+    """Test the in-process LRU backend"""
+    print("\n🧠 Testing Memory Cache")
+    print("=" * 50)
+    check_cache_backend(MemoryCaseCache(ttl=60, negative_ttl=1, max_size=5))
+
+def test_sqlite_cache():
+    """Test the shared SQLite backend"""
+    print("\n🗄️ Testing SQLite Cache")
+    print("=" * 50)
+    db_path = os.path.join(tempfile.mkdtemp(), "test_case_cache.db")
+    check_cache_backend(SQLiteCaseCache(db_path, ttl=60, negative_ttl=1, max_size=5))
+
+    other_worker = SQLiteCaseCache(db_path, ttl=60, negative_ttl=1, max_size=5)
+    assert other_worker.get("I.A.5.2024") is not None
+    print("✓ Entries visible to a second cache instance")
+
+def test_backends_agree_and_reads_do_not_write():
+    """Both backends drop raw_html; SQLite lookups batch their bookkeeping writes"""
+    print("\n📏 Testing Cached Case Shape and Read Cost")
+    print("=" * 50)
+    db_path = os.path.join(tempfile.mkdtemp(), "test_case_cache_shape.db")
+    sqlite_cache = SQLiteCaseCache(db_path, flush_every=100, flush_interval=3600)
+    memory_cache = MemoryCaseCache()
+    scraped = {**CASE_DATA, "raw_html": "<html>" + "x" * 10000 + "</html>"}
+    for cache in (sqlite_cache, memory_cache):
+        cache.store_result("W.P.(C).15234.2024", True, scraped, "")
+    assert sqlite_cache.get("W.P.(C).15234.2024") == memory_cache.get("W.P.(C).15234.2024") == (True, CASE_DATA, "")
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT LENGTH(case_data) FROM case_cache").fetchone()[0] < 1000
+    print("✓ raw_html not cached, same result from both backends")
+
+    writes = sqlite_cache._get_connection().total_changes
+    for _ in range(5):
+        sqlite_cache.get("W.P.(C).15234.2024")
+        sqlite_cache.get("CRL.A.9.2020")
+    assert sqlite_cache._get_connection().total_changes == writes
+    assert sqlite_cache.stats()["hits"] == 6 and sqlite_cache.stats()["misses"] == 5
+    assert sqlite_cache._get_connection().total_changes > writes
+    conn.close()
+    print("✓ Hit/miss counters written in one batch")
+
+if __name__ == "__main__":
+    test_normalize_case_key()
+    test_memory_cache()
+    test_sqlite_cache()
+    test_backends_agree_and_reads_do_not_write()
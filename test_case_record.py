@@ -0,0 +1,50 @@
+import json
+
+from cache import MemoryCaseCache
+from case_record import CaseRecord, case_record, msgpack
+from mock_data import MOCK_CASES
+
+CASE = {
+    "case_number": "15234",
+    "case_type": "W.P.(C)",
+    "case_title": "Rajesh Kumar Sharma vs Union of India & Ors.",
+    "judge_name": "Justice Prateek Jalan",
+    "case_status": "Pending",
+    "pdf_links": [{"url": "https://delhihighcourt.nic.in/judgments/WPC_15234_2024.pdf", "text": "Order"}],
+    "bench": "Division Bench",
+}
+
+def test_case_record_round_trip():
+    """Records convert back to the same dict and share their enum-like strings"""
+    print("🗜️ Testing CaseRecord")
+    print("=" * 50)
+
+    record = CaseRecord.from_dict({**CASE, "raw_html": "<html></html>"})
+    assert record.to_dict() == CASE and record.get("bench") == "Division Bench"
+    assert record.get("filing_date") is None and record.get("filing_date", "") == ""
+    assert json.loads(record.to_json()) == CASE and record.to_json() is record.to_json()
+    assert CaseRecord.from_json(record.to_json()) == record
+    for case_data in MOCK_CASES.values():
+        assert CaseRecord.from_json(json.dumps(case_data)).to_dict() == case_data
+    assert case_record({}) is None
+    print("✓ Round trip through JSON, extra keys kept, raw_html dropped")
+
+    status = "".join(["Pend", "ing"])
+    judge = CaseRecord.from_json(json.dumps(CASE)).judge_name
+    assert CaseRecord.from_dict({"case_status": status}).case_status is record.case_status
+    assert judge is record.judge_name
+    print("✓ Case status and judge interned")
+
+    if msgpack is not None:
+        assert CaseRecord.from_msgpack(record.to_msgpack()) == record
+        print("✓ msgpack round trip")
+
+    cache = MemoryCaseCache()
+    cache.set("W.P.(C).15234.2024", True, CASE)
+    _, cached, _ = cache.get("W.P.(C).15234.2024")
+    cached["case_status"] = "Disposed"
+    assert cache.get("W.P.(C).15234.2024")[1] == CASE
+    print("✓ Memory cache holds records and hands out fresh dicts")
+
+if __name__ == "__main__":
+    test_case_record_round_trip()
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'cases_test.db')}")
+
+import app as app_module  # noqa: E402
+from models import (Case, CaseChange, Response, db, get_case, get_case_history, log_query,  # noqa: E402
+                    log_response, rebuild_cases)
+
+BASE = {"case_type": "LPA", "case_number": "610", "case_title": "Meena Arora vs GNCTD",
+        "petitioner": "Meena Arora", "respondent": "GNCTD", "case_status": "Pending",
+        "latest_order": "Notice issued.", "next_hearing_date": "2024-09-01"}
+
+def scrape(case_data, case_number="610"):
+    query = log_query("LPA", case_number, "2024")
+    return log_response(query.id, scrape_success=True, parsed_json=json.dumps(case_data),
+                        petitioner=case_data["petitioner"], latest_order=case_data["latest_order"])
+
+def test_canonical_row_and_changes():
+    """Repeated scrapes update one cases row and record only the fields that changed"""
+    print("🗃️ Testing Canonical Case Table")
+    print("=" * 50)
+
+    with app_module.app.app_context():
+        first = scrape(BASE)
+        repeat = scrape(BASE, case_number="0610")
+        changed = scrape({**BASE, "latest_order": "Reply filed.", "next_hearing_date": "2024-10-01",
+                          "pdf_links": [{"url": "https://x/1.pdf", "text": "Order"}]})
+
+        case = get_case("lpa", "610", "2024")
+        assert case.version == 2 and case.latest_order == "Reply filed."
+        assert case.last_scraped >= case.last_changed
+        fields = sorted(c.field for c in db.session.query(CaseChange).filter_by(case_key=case.case_key))
+        assert fields == ["latest_order", "next_hearing_date", "pdf_links"]
+        print("✓ One row per case, field-level diffs only")
+
+        assert db.session.get(Response, first.id).parsed_json is not None
+        unchanged = db.session.get(Response, repeat.id)
+        assert unchanged.parsed_json is not None and unchanged.latest_order == "Notice issued."
+        assert unchanged.case_version == 1
+        assert db.session.get(Response, changed.id).case_version == 2
+        print("✓ Unchanged scrapes keep their fields and point at the case version they saw")
+
+        history = get_case_history("LPA", "610", "2024")
+        assert [data["latest_order"] for _, data in history] == ["Notice issued.", "Reply filed."]
+        assert history[0][1] == BASE
+        print("✓ History rebuilt from the canonical row and its changes")
+
+        before = (case.parsed_json, case.version)
+        assert rebuild_cases(batch_size=1) >= 1
+        db.session.expire_all()
+        assert (get_case("LPA", "610", "2024").parsed_json, get_case("LPA", "610", "2024").version) == before
+        print("✓ rebuild_cases replays the response log to the same state")
+
+def test_case_endpoint_and_lookup():
+    """/api/cases reads the canonical row; lookups are served from it within the cache TTL"""
+    print("\n🔑 Testing Canonical Case Lookups")
+    print("=" * 50)
+
+    client = app_module.app.test_client()
+    body = client.get("/api/cases/LPA.610.2024").get_json()
+    assert body["version"] == 2 and body["case_data"]["latest_order"] == "Reply filed."
+    assert {change["field"] for change in body["changes"]} == {"latest_order", "next_hearing_date", "pdf_links"}
+    assert client.get("/api/cases/LPA.611.2024").status_code == 404
+
+    app_module.case_cache.clear()
+    success, case_data, _, cache_hit = app_module.lookup_case("LPA", "610", "2024")
+    assert success and cache_hit and case_data["latest_order"] == "Reply filed."
+
+    with app_module.app.app_context():
+        case = db.session.get(Case, "LPA.610.2024")
+        case.last_scraped = case.last_scraped.replace(year=2000)
+        db.session.commit()
+    app_module.case_cache.clear()
+    assert app_module.canonical_case_data("LPA", "610", "2024") is None
+    print("✓ Fresh canonical rows answer lookups; stale ones are rescraped")
+
+if __name__ == "__main__":
+    test_canonical_row_and_changes()
+    test_case_endpoint_and_lookup()
@@ -0,0 +1,229 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'documents_test.db')}")
+os.environ.setdefault("DOCUMENT_DIR", tempfile.mkdtemp())
+
+import app as app_module  # noqa: E402
+from documents import DocumentError, DocumentMirror  # noqa: E402
+
+PDFS = {
+    "/judgments/a.pdf": b"%PDF-1.4 judgment A " + b"x" * 4000,
+    "/judgments/a-copy.pdf": b"%PDF-1.4 judgment A " + b"x" * 4000,
+    "/judgments/b.pdf": b"%PDF-1.4 judgment B " + b"y" * 4000,
+    "/judgments/c.pdf": b"%PDF-1.4 judgment C " + b"z" * 4000,
+}
+
+# Paths answered with a redirect; {port} is the stub server's own port
+REDIRECTS = {
+    "/judgments/moved.pdf": "/judgments/b.pdf",
+    "/judgments/offsite.pdf": "http://localhost:{port}/judgments/c.pdf",
+    "/judgments/loop.pdf": "/judgments/loop.pdf",
+}
+
+class StubDocumentHandler(BaseHTTPRequestHandler):
+    """Serves PDFs with ETags and answers matching If-None-Match with 304"""
+
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path in REDIRECTS:
+            self.send_response(302)
+            self.send_header("Location", REDIRECTS[self.path].format(port=self.server.server_address[1]))
+            self.end_headers()
+            return
+        body = PDFS.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = f'"{len(body)}-{self.path}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubDocumentHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_mirror_dedup_and_revalidation():
+    """Documents are stored once per content and revalidated with conditional GETs"""
+    print("📁 Testing Document Mirror")
+    print("=" * 50)
+
+    server, base_url = start_stub_server()
+    StubDocumentHandler.requests_seen = []
+    try:
+        mirror = DocumentMirror(tempfile.mkdtemp(), allowed_hosts=["127.0.0.1"], revalidate_after=3600)
+        first = mirror.fetch(f"{base_url}/judgments/a.pdf")
+        assert mirror.fetch(f"{base_url}/judgments/a.pdf") == first
+        assert len(StubDocumentHandler.requests_seen) == 1
+        print("✓ Second fetch served without contacting the court")
+
+        assert mirror.fetch(f"{base_url}/judgments/a-copy.pdf") == first
+        assert mirror.stats()["documents"] == 1 and mirror.stats()["sources"] == 2
+        print("✓ Identical PDFs at two URLs stored once")
+
+        mirror.revalidate_after = 0
+        assert mirror.fetch(f"{base_url}/judgments/a.pdf") == first
+        assert StubDocumentHandler.requests_seen[-1][1] is not None
+        print("✓ Revalidated with If-None-Match")
+
+        try:
+            mirror.fetch("https://example.com/evil.pdf")
+            assert False, "foreign host fetched"
+        except DocumentError:
+            pass
+        try:
+            mirror.fetch(f"{base_url}/judgments/missing.pdf")
+            assert False, "missing document mirrored"
+        except DocumentError:
+            pass
+    finally:
+        server.shutdown()
+
+def test_redirects_checked_against_allowed_hosts():
+    """Redirects are followed on allowed hosts only, and not forever"""
+    print("\n↪️ Testing Document Redirects")
+    print("=" * 50)
+
+    server, base_url = start_stub_server()
+    StubDocumentHandler.requests_seen = []
+    try:
+        mirror = DocumentMirror(tempfile.mkdtemp(), allowed_hosts=["127.0.0.1"], max_redirects=3)
+        digest = mirror.fetch(f"{base_url}/judgments/moved.pdf")
+        with open(mirror.get(digest)["path"], "rb") as f:
+            assert f.read() == PDFS["/judgments/b.pdf"]
+        print("✓ Same-host redirect followed")
+
+        for path in ("/judgments/offsite.pdf", "/judgments/loop.pdf"):
+            try:
+                mirror.fetch(f"{base_url}{path}")
+                assert False, f"{path} mirrored"
+            except DocumentError:
+                pass
+        # localhost resolves to the same stub, but was never contacted
+        assert "/judgments/c.pdf" not in [path for path, _ in StubDocumentHandler.requests_seen]
+        assert [path for path, _ in StubDocumentHandler.requests_seen].count("/judgments/loop.pdf") == 4
+        print("✓ Redirect off the allowed hosts and redirect loop rejected")
+    finally:
+        server.shutdown()
+
+def test_prefetch_and_case_page_links():
+    """Case pages link every PDF through the mirror, which can fetch them ahead of the click"""
+    print("\n🔗 Testing Document Prefetch and Links")
+    print("=" * 50)
+
+    server, base_url = start_stub_server()
+    StubDocumentHandler.requests_seen = []
+    try:
+        mirror = DocumentMirror(tempfile.mkdtemp(), allowed_hosts=["127.0.0.1"])
+        urls = [f"{base_url}/judgments/a.pdf", f"{base_url}/judgments/b.pdf", "https://example.com/x.pdf"]
+        assert mirror.prefetch(urls + urls[:1]) == 2
+        deadline = time.monotonic() + 10
+        while mirror.stats()["sources"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert mirror.stats()["sources"] == 2
+        digest = mirror.fetch(urls[0])
+        assert len(StubDocumentHandler.requests_seen) == 2
+        print("✓ Prefetched documents served without another upstream request")
+
+        with sqlite3.connect(mirror.db_path) as conn:
+            conn.execute("UPDATE documents SET last_access = 0")
+        mirror.get(digest)
+        mirror.get(digest)
+        with sqlite3.connect(mirror.db_path) as conn:
+            last_access = conn.execute("SELECT last_access FROM documents WHERE hash = ?", (digest,)).fetchone()[0]
+        assert time.time() - last_access < 60
+        conn = mirror._get_connection()
+        changes = conn.total_changes
+        mirror.get(digest)
+        assert conn.total_changes == changes
+        print("✓ Repeated reads within access_resolution do not write")
+    finally:
+        server.shutdown()
+
+    case = {"case_type": "W.P.(C)", "case_number": "15234", "status": "Pending",
+            "pdf_links": [{"url": urls[0], "text": "Order dated 01.02.2024"}, {"url": urls[1], "text": ""}],
+            "pdf_link": urls[0]}
+    with app_module.app.test_request_context():
+        page = app_module.render_template("case_details.html", case=case, case_key="W.P.(C).15234.2024",
+                                          search_params={"filing_year": "2024"}, query_id=1)
+        for url in urls[:2]:
+            assert app_module.url_for("mirror_document", url=url).replace("&", "&amp;") in page
+    assert "Order dated 01.02.2024" in page
+    assert app_module.case_document_urls(case) == urls[:2]
+    print("✓ Case page links each PDF through /documents/mirror")
+
+def test_quota_eviction():
+    """The least recently used documents are evicted past the quota"""
+    print("\n🧹 Testing Document Quota")
+    print("=" * 50)
+
+    server, base_url = start_stub_server()
+    try:
+        mirror = DocumentMirror(tempfile.mkdtemp(), quota_bytes=9000, allowed_hosts=["127.0.0.1"],
+                                access_resolution=0)
+        a = mirror.fetch(f"{base_url}/judgments/a.pdf")
+        b = mirror.fetch(f"{base_url}/judgments/b.pdf")
+        assert mirror.get(a)
+        c = mirror.fetch(f"{base_url}/judgments/c.pdf")
+    finally:
+        server.shutdown()
+
+    assert mirror.get(b) is None and not os.path.exists(mirror.path_for(b))
+    assert mirror.get(a) and mirror.get(c)
+    assert mirror.stats()["bytes"] <= 9000
+    print("✓ Least recently used document evicted")
+
+def test_document_routes_and_ranges():
+    """Mirrored documents are served with Range and conditional GET support"""
+    print("\n📨 Testing Document Routes")
+    print("=" * 50)
+
+    server, base_url = start_stub_server()
+    original_mirror = app_module.document_mirror
+    app_module.document_mirror = DocumentMirror(tempfile.mkdtemp(), allowed_hosts=["127.0.0.1"])
+    client = app_module.app.test_client()
+    try:
+        response = client.get("/documents/mirror", query_string={"url": f"{base_url}/judgments/b.pdf"})
+        assert response.status_code == 302
+        location = response.headers["Location"]
+
+        body = client.get(location)
+        assert body.status_code == 200 and body.data == PDFS["/judgments/b.pdf"]
+        assert "immutable" in body.headers["Cache-Control"]
+
+        partial = client.get(location, headers={"Range": "bytes=0-7"})
+        assert partial.status_code == 206 and partial.data == b"%PDF-1.4"
+
+        assert client.get(location, headers={"If-None-Match": body.headers["ETag"]}).status_code == 304
+        assert client.get("/documents/mirror?url=https://example.com/x.pdf").status_code == 400
+        assert client.get("/documents/" + "0" * 64).status_code == 404
+    finally:
+        app_module.document_mirror = original_mirror
+        server.shutdown()
+    print("✓ Full, ranged and conditional requests served")
+
+if __name__ == "__main__":
+    test_mirror_dedup_and_revalidation()
+    test_redirects_checked_against_allowed_hosts()
+    test_prefetch_and_case_page_links()
+    test_quota_eviction()
+    test_document_routes_and_ranges()
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from async_scraper import AsyncDelhiHighCourtScraper
+from scraper import DelhiHighCourtScraper
+from test_async_scraper import RESULT_PAGE, SEARCH_PAGE, StubCourtHandler
+
+class RotatingTokenHandler(StubCourtHandler):
+    """Stub court whose form token can be rotated, rejecting submissions that carry an old one"""
+
+    delay = 0
+    token = "token-1"
+    page_loads = 0
+    posts = 0
+
+    def do_GET(self):
+        if self.path.startswith("/app/case-number"):
+            RotatingTokenHandler.page_loads += 1
+            self._send(SEARCH_PAGE.replace("stub-token", RotatingTokenHandler.token))
+        else:
+            self._send("<html></html>")
+
+    def do_POST(self):
+        RotatingTokenHandler.posts += 1
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        if form.get("csrf_token") != [RotatingTokenHandler.token]:
+            self._send("<html>Page expired</html>", 419)
+        else:
+            self._send(RESULT_PAGE.format(case_number=form.get("case_number", [""])[0]))
+
+def new_scraper(base_url):
+    return DelhiHighCourtScraper(os.path.join(tempfile.mkdtemp(), "form_state_test.db"),
+                                 write_behind_logging=False, base_url=base_url)
+
+def test_form_state_reuse():
+    """A warm session submits straight away and reloads the form once its tokens are rejected"""
+    print("📝 Testing Search Form Reuse")
+    print("=" * 50)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RotatingTokenHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        scraper = new_scraper(f"http://127.0.0.1:{server.server_address[1]}")
+        for case_number in ("15234", "15235", "15236"):
+            success, case_data, error = scraper.search_case("W.P.(C)", case_number, "2024")
+            assert success and case_data["case_number"] == case_number, error
+        assert RotatingTokenHandler.page_loads == 1 and RotatingTokenHandler.posts == 3
+        assert scraper.form_state_hits == 2 and scraper.form_state_misses == 1
+        print("✓ Three searches, one search page load")
+
+        RotatingTokenHandler.token = "token-2"
+        success, case_data, error = scraper.search_case("W.P.(C)", "15237", "2024", max_retries=1)
+        assert success and case_data["case_number"] == "15237", error
+        assert RotatingTokenHandler.page_loads == 2 and RotatingTokenHandler.posts == 5
+        print("✓ Rejected tokens reloaded and resubmitted within one attempt")
+
+        scraper.form_state_ttl = 0
+        scraper.search_case("W.P.(C)", "15238", "2024")
+        assert RotatingTokenHandler.page_loads == 3
+        print("✓ Expired form state not reused")
+    finally:
+        server.shutdown()
+
+def test_async_form_state_reuse():
+    """The async scraper shares the sync setup, so it reuses the form and can refresh its session"""
+    print("\n📝 Testing Async Search Form Reuse")
+    print("=" * 50)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RotatingTokenHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    RotatingTokenHandler.token = "token-1"
+    RotatingTokenHandler.page_loads = RotatingTokenHandler.posts = 0
+
+    async def run():
+        async with AsyncDelhiHighCourtScraper(os.path.join(tempfile.mkdtemp(), "form_state_test.db"),
+                                              write_behind_logging=False,
+                                              base_url=f"http://127.0.0.1:{server.server_address[1]}") as scraper:
+            for case_number in ("15234", "15235", "15236"):
+                success, case_data, error = await scraper.search_case("W.P.(C)", case_number, "2024")
+                assert success and case_data["case_number"] == case_number, error
+            assert RotatingTokenHandler.page_loads == 1 and RotatingTokenHandler.posts == 3
+            assert scraper.form_state_hits == 2 and scraper.form_state_misses == 1
+            print("✓ Three async searches, one search page load")
+
+            RotatingTokenHandler.token = "token-2"
+            success, _, error = await scraper.search_case("W.P.(C)", "15237", "2024", max_retries=1)
+            assert success and RotatingTokenHandler.page_loads == 2, error
+            print("✓ Rejected tokens reloaded and resubmitted")
+
+            assert await scraper.refresh_session()
+            assert scraper._form_state is None
+            print("✓ Session refreshed")
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_form_state_reuse()
+    test_async_form_state_reuse()
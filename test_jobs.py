@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'jobs_test.db')}")
+
+from app import app  # noqa: E402
+from jobs import SearchJobRunner  # noqa: E402
+from models import create_search_job  # noqa: E402
+
+def test_recover_does_not_requeue_pending_jobs():
+    """Repeated sweeps queue each persisted job once, not once per sweep"""
+    print("🧹 Testing Search Job Recovery")
+    print("=" * 50)
+
+    # Threads are never started, so queued ids stay in the local queue
+    runner = SearchJobRunner(app, handler=lambda job: (False, {}, 'unused', None))
+    with app.app_context():
+        job_ids = [create_search_job("W.P.(C)", str(number), "2021").id for number in (83101, 83102)]
+
+    assert runner._enqueue(job_ids[0])
+    assert not runner._enqueue(job_ids[0])
+    print("✓ A job already waiting locally is not queued again")
+
+    runner.recover()
+    queued = runner._queue.qsize()
+    runner.recover()
+    assert runner._queue.qsize() == queued == len(runner._pending)
+    assert job_ids[0] in runner._pending
+    print(f"✓ Second sweep queued nothing new ({queued} jobs pending)")
+
+if __name__ == "__main__":
+    test_recover_does_not_requeue_pending_jobs()
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'metrics_test.db')}")
+
+from prometheus_client import REGISTRY  # noqa: E402
+
+from app import app  # noqa: E402
+from metrics import backoff_sleep  # noqa: E402
+from scraper import DelhiHighCourtScraper  # noqa: E402
+from test_async_scraper import start_stub_server  # noqa: E402
+
+def stage_count(stage):
+    return REGISTRY.get_sample_value("court_stage_seconds_count", {"stage": stage}) or 0
+
+def test_scrape_stage_metrics():
+    """Each stage of a scrape and each upstream status is recorded"""
+    print("📈 Testing Scrape Metrics")
+    print("=" * 50)
+
+    stages = ("session_init", "search_page_get", "form_extraction", "search_post", "parse", "scraper_logging")
+    before = {stage: stage_count(stage) for stage in stages}
+    submits = REGISTRY.get_sample_value("court_upstream_responses_total",
+                                        {"step": "search_submit", "status": "200"}) or 0
+
+    server, base_url = start_stub_server()
+    try:
+        scraper = DelhiHighCourtScraper(os.path.join(tempfile.mkdtemp(), "metrics_scraper.db"),
+                                        write_behind_logging=False, base_url=base_url)
+        success, _, error = scraper.search_case("W.P.(C)", "15234", "2024")
+    finally:
+        server.shutdown()
+    assert success, error
+
+    assert all(stage_count(stage) > before[stage] for stage in stages)
+    assert stage_count("scraper_logging") == before["scraper_logging"] + 2
+    assert REGISTRY.get_sample_value("court_upstream_responses_total",
+                                     {"step": "search_submit", "status": "200"}) == submits + 1
+    print("✓ Stage histograms and upstream status counters updated")
+
+    backoff_sleep(0.01, "timeout")
+    assert REGISTRY.get_sample_value("court_backoff_sleeps_total", {"reason": "timeout"}) >= 1
+    assert REGISTRY.get_sample_value("court_scrape_retries_total", {"reason": "timeout"}) >= 1
+    print("✓ Retries and backoff sleeps counted")
+
+def test_metrics_endpoint():
+    """/metrics serves the Prometheus text format including request timings"""
+    print("\n📟 Testing /metrics")
+    print("=" * 50)
+
+    client = app.test_client()
+    client.get("/api/stats")
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.content_type.startswith("text/plain")
+    body = response.get_data(as_text=True)
+    assert 'court_http_request_seconds_bucket{endpoint="api_stats"' in body
+    assert "# TYPE court_stage_seconds histogram" in body
+    print("✓ Metrics exposed for scraping")
+
+def test_multiprocess_aggregation():
+    """Metrics recorded by separate worker processes are summed at /metrics"""
+    print("\n👥 Testing Multiprocess Metrics")
+    print("=" * 50)
+
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": tempfile.mkdtemp()}
+    record = "from metrics import record_upstream; record_upstream('search_page', 503)"
+    for _ in range(3):
+        subprocess.run([sys.executable, "-c", record], env=env, check=True, cwd=os.path.dirname(__file__) or ".")
+    rendered = subprocess.run([sys.executable, "-c", "import sys; from metrics import render_metrics; "
+                               "sys.stdout.write(render_metrics().decode())"],
+                              env=env, check=True, capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__) or ".").stdout
+    assert 'court_upstream_responses_total{status="503",step="search_page"} 3.0' in rendered
+    print("✓ Counters from 3 processes aggregated")
+
+if __name__ == "__main__":
+    test_scrape_stage_metrics()
+    test_metrics_endpoint()
+    test_multiprocess_aggregation()
@@ -0,0 +1,122 @@
+import io
+import json
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'pdf_test.db')}")
+os.environ.setdefault("PDF_CACHE_DIR", tempfile.mkdtemp())
+
+from app import app  # noqa: E402
+from mock_data import MOCK_CASES  # noqa: E402
+from models import log_query, log_response  # noqa: E402
+from pdf_render import PDFCache, build_dossier, wrap_text  # noqa: E402
+
+def legacy_wrap(text, max_width):
+    lines, current_line = [], []
+    for word in text.split():
+        test_line = ' '.join(current_line + [word])
+        if stringWidth(test_line, "Helvetica", 10) < max_width:
+            current_line.append(word)
+        else:
+            if current_line:
+                lines.append(' '.join(current_line))
+            current_line = [word]
+    if current_line:
+        lines.append(' '.join(current_line))
+    return lines
+
+def test_wrap_matches_original():
+    """The incremental wrap breaks lines exactly where the original did"""
+    print("📝 Testing PDF Line Wrapping")
+    print("=" * 50)
+
+    for case in MOCK_CASES.values():
+        text = case["latest_order"] * 5
+        assert wrap_text(text, "Helvetica", 10, 512) == legacy_wrap(text, 512)
+    assert wrap_text("supercalifragilistic " * 3, "Helvetica", 10, 30) == ["supercalifragilistic"] * 3
+    print("✓ Same line breaks as the original wrap")
+
+def count_pages(path):
+    with open(path, "rb") as f:
+        return f.read().count(b"/Type /Page\n") or None
+
+def test_dossier_history_and_pagination():
+    """Dossiers collect every order and link, and long text runs onto more pages"""
+    print("\n📚 Testing Case Dossiers")
+    print("=" * 50)
+
+    case = MOCK_CASES["W.P.(C).15234.2024"]
+    history = [
+        (datetime(2024, 3, 1), {**case, "latest_order": "Notice issued.", "pdf_link": "https://x/a.pdf"}),
+        (datetime(2024, 4, 1), {**case, "latest_order": "Notice issued.", "pdf_link": "https://x/a.pdf"}),
+        (datetime(2024, 5, 1), {**case, "latest_order": "Reply filed. " * 600,
+                                "pdf_links": [{"url": "https://x/b.pdf", "text": "Order 2"}]}),
+    ]
+    dossier = build_dossier("W.P.(C).15234.2024", history)
+    assert [order["seen"] for order in dossier["orders"]] == ["2024-03-01", "2024-05-01"]
+    assert [link["url"] for link in dossier["pdf_links"]] == ["https://x/a.pdf", "https://x/b.pdf"]
+    assert dossier["details"]["case_status"] == "Pending"
+
+    path = PDFCache(tempfile.mkdtemp()).get_or_render(dossier)
+    assert count_pages(path) > 1
+    print(f"✓ 2 orders, 2 documents over {count_pages(path)} pages")
+
+def test_pdf_cache_and_conditional_get():
+    """PDFs render once per dossier version and support conditional GET"""
+    print("\n📄 Testing PDF Cache")
+    print("=" * 50)
+
+    cache = PDFCache(tempfile.mkdtemp())
+    case_key, case_data = next(iter(MOCK_CASES.items()))
+    dossier = build_dossier(case_key, [(None, case_data)])
+    path = cache.get_or_render(dossier)
+    mtime = os.path.getmtime(path)
+    assert cache.get_or_render(dossier) == path and os.path.getmtime(path) == mtime
+
+    changed = build_dossier(case_key, [(None, {**case_data, "status": "Disposed"})])
+    new_path = cache.get_or_render(changed)
+    assert new_path != path and not os.path.exists(path)
+    print("✓ Re-rendered only when case data changed")
+
+    client = app.test_client()
+    response = client.get(f"/download_pdf/{case_key}")
+    assert response.status_code == 200 and response.data.startswith(b"%PDF")
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+
+    again = client.get(f"/download_pdf/{case_key}", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and not again.data
+    print("✓ 304 Not Modified for a matching ETag")
+
+def test_dossier_zip_export():
+    """Scraped cases are exported as one zip built on the process pool"""
+    print("\n🗂️ Testing Dossier Zip Export")
+    print("=" * 50)
+
+    with app.app_context():
+        for i in range(6):
+            query = log_query("RFA", str(500 + i), "2022")
+            log_response(query.id, scrape_success=True,
+                         parsed_json=json.dumps({"case_type": "RFA", "case_number": str(500 + i),
+                                                 "latest_order": f"Order {i}", "petitioner": "A", "respondent": "B"}))
+
+    body = "case_type,case_number,filing_year\n" + "".join(f"RFA,{500 + i},2022\n" for i in range(6)) + "RFA,999,2022\n"
+    response = app.test_client().post("/api/dossiers/export", data=body, content_type="text/csv")
+    assert response.status_code == 200 and response.mimetype == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.data))
+    names = sorted(archive.namelist())
+    assert names == ["MISSING.txt"] + [f"RFA_{500 + i}_2022.pdf" for i in range(6)]
+    assert archive.read("RFA_503_2022.pdf").startswith(b"%PDF")
+    assert "RFA.999.2022" in archive.read("MISSING.txt").decode()
+    print("✓ 6 dossiers and a MISSING.txt streamed as one zip")
+
+if __name__ == "__main__":
+    test_wrap_matches_original()
+    test_dossier_history_and_pagination()
+    test_pdf_cache_and_conditional_get()
+    test_dossier_zip_export()
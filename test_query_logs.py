@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'query_logs_test.db')}")
+
+from app import app  # noqa: E402
+from models import Query, db, get_query_log_page, iter_query_logs  # noqa: E402
+
+def seed_queries(count=120):
+    with app.app_context():
+        db.session.query(Query).delete()
+        start = datetime(2024, 1, 1)
+        for i in range(count):
+            # Pairs share a timestamp so the cursor must break ties on id
+            db.session.add(Query(case_type="W.P.(C)" if i % 2 else "CRL.A.", case_number=str(1000 + i),
+                                 filing_year="2024" if i % 3 else "2023", ip_address=f"10.0.0.{i % 4}",
+                                 timestamp=start + timedelta(minutes=i // 2)))
+        db.session.commit()
+
+def test_keyset_pagination():
+    """Pages walk the whole log newest first with no gaps or repeats"""
+    print("📜 Testing Query Log Pagination")
+    print("=" * 50)
+
+    seed_queries()
+    with app.app_context():
+        seen, cursor = [], None
+        while True:
+            rows, cursor = get_query_log_page(limit=25, cursor=cursor)
+            seen.extend(row["id"] for row in rows)
+            if cursor is None:
+                break
+        assert len(seen) == len(set(seen)) == 120
+        timestamps = [row["timestamp"] for row in iter_query_logs(batch_size=7)]
+        assert timestamps == sorted(timestamps, reverse=True) and len(timestamps) == 120
+
+        rows, _ = get_query_log_page(limit=500, case_type="CRL.A.", filing_year="2023", ip_address="10.0.0.0")
+        assert rows and all(r["case_type"] == "CRL.A." and r["filing_year"] == "2023"
+                            and r["ip_address"] == "10.0.0.0" for r in rows)
+    print(f"✓ 120 rows over {len(seen) // 25 + 1} pages, filters applied")
+
+def test_log_viewer_and_export():
+    """The viewer paginates and the export streams CSV and NDJSON"""
+    print("\n📤 Testing Query Log Viewer and Export")
+    print("=" * 50)
+
+    seed_queries()
+    client = app.test_client()
+
+    page = client.get("/query_logs?limit=50", headers={"Accept": "application/json"}).get_json()
+    assert len(page["logs"]) == 50 and page["next_cursor"]
+    assert client.get(f"/query_logs?cursor={page['next_cursor']}").status_code == 200
+    assert client.get("/query_logs?cursor=bogus").status_code == 302
+
+    response = client.get("/query_logs/export?format=csv&case_type=W.P.(C)")
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert response.mimetype == "text/csv" and len(rows) == 60
+    assert all(row["case_type"] == "W.P.(C)" for row in rows)
+
+    response = client.get("/query_logs/export?format=ndjson&from=2024-01-01T00:10:00&to=2024-01-01T00:20:00")
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 20
+    assert client.get("/query_logs/export?format=xml").status_code == 400
+    print("✓ Viewer, CSV and NDJSON export work")
+
+if __name__ == "__main__":
+    test_keyset_pagination()
+    test_log_viewer_and_export()
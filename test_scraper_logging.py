@@ -1,6 +1,7 @@
 import os
 import sys
 import sqlite3
+import threading
 import time
 from datetime import datetime
 from scraper import DelhiHighCourtScraper, MockScraper, SQLiteLogger
@@ -48,6 +49,76 @@ def test_sqlite_logging():
     
     return db_path
 
+def test_write_behind_logging():
+    """Test batched write-behind logging with an explicit flush"""
+    print("\n⏱️ Testing Write-Behind Logging")
+    print("=" * 50)
+
+    db_path = "test_write_behind.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    logger = SQLiteLogger(db_path, write_behind=True, batch_size=10)
+    query_id = logger.log_query("CRL.A.", "892", "2023")
+
+    for i in range(25):
+        logger.log_response(
+            query_id, "https://example.com", "GET", {}, {}, 200, {},
+            f"<html><body>Page {i}</body></html>", processing_time=i
+        )
+    logger.update_query_result(query_id, True, 1234)
+
+    assert logger.flush(), "write-behind queue did not drain"
+    print("✓ Queued writes flushed")
+
+    with sqlite3.connect(db_path) as conn:
+        responses = conn.execute("SELECT COUNT(*) FROM scraper_responses WHERE query_id = ?",
+                                 (query_id,)).fetchone()[0]
+        success, response_time = conn.execute(
+            "SELECT success, response_time_ms FROM scraper_queries WHERE id = ?", (query_id,)
+        ).fetchone()
+
+    assert responses == 25
+    assert bool(success) and response_time == 1234
+    print(f"✓ {responses} responses committed in batches")
+
+    logger.close()
+    logger.log_viewstate_tokens(query_id, {"csrf_token": "after-close"})
+    with sqlite3.connect(db_path) as conn:
+        tokens = conn.execute("SELECT COUNT(*) FROM viewstate_tokens").fetchone()[0]
+    assert tokens == 1
+    print("✓ Writes after close() fall back to synchronous mode")
+
+def test_close_does_not_lose_racing_writes():
+    """Writes racing close() are either committed by the writer or written synchronously"""
+    print("\n🏁 Testing Writes Racing close()")
+    print("=" * 50)
+
+    db_path = "test_close_race.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    logger = SQLiteLogger(db_path, write_behind=True, batch_size=5)
+    query_id = logger.log_query("CRL.A.", "893", "2023")
+    writes_per_thread = 200
+
+    def writer(thread_index):
+        for i in range(writes_per_thread):
+            logger.log_viewstate_tokens(query_id, {"csrf_token": f"{thread_index}-{i}"})
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.01)
+    logger.close()
+    for thread in threads:
+        thread.join()
+
+    with sqlite3.connect(db_path) as conn:
+        tokens = conn.execute("SELECT COUNT(*) FROM viewstate_tokens").fetchone()[0]
+    assert tokens + logger.dropped_writes == 4 * writes_per_thread, (tokens, logger.dropped_writes)
+    print(f"✓ {tokens} writes committed across close(), none lost")
+
 def analyze_logged_data(db_path):
     """Analyze the logged data"""
     print("\n📊 Analyzing Logged Data")
@@ -69,8 +140,8 @@ def analyze_logged_data(db_path):
                   f"CAPTCHA: {bool(query[5])}")
 
         cursor = conn.execute("""
-            SELECT request_method, response_status, LENGTH(raw_html) as html_size
-            FROM scraper_responses
+            SELECT r.request_method, r.response_status, b.size as html_size
+            FROM scraper_responses r LEFT JOIN html_blobs b ON b.hash = r.html_hash
         """)
         
         responses = cursor.fetchall()
@@ -170,13 +241,13 @@ cursor = conn.execute('''
 for row in cursor:
     print(f"Method: {row[0]}, Success Rate: {row[3]}%")
 
-# View raw HTML responses for debugging
-cursor = conn.execute('''
-    SELECT raw_html FROM scraper_responses 
+# View raw HTML responses for debugging (HTML is stored compressed in html_blobs)
+response_id = conn.execute('''
+    SELECT id FROM scraper_responses 
     WHERE query_id = ? LIMIT 1
-''', (query_id,))
+''', (query_id,)).fetchone()[0]
 
-html_content = cursor.fetchone()[0]
+html_content = SQLiteLogger("court_scraper.db").get_response_html(response_id)
 with open('debug_response.html', 'w') as f:
     f.write(html_content)
 """
@@ -191,6 +262,8 @@ def main():
     try:
         db_path = test_sqlite_logging()
         analyze_logged_data(db_path)
+        test_write_behind_logging()
+        test_close_does_not_lose_racing_writes()
         real_db = test_real_scraper_with_logging()
         test_mock_scraper_compatibility()
         generate_usage_examples()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'scraper_pool_test.db')}")
+
+from app import app  # noqa: E402
+from scraper import DelhiHighCourtScraper  # noqa: E402
+from scraper_pool import ScraperPool  # noqa: E402
+from test_async_scraper import start_stub_server  # noqa: E402
+
+def test_scraper_pool():
+    """Searches borrow warm scrapers; the pool re-warms idle ones and drops broken ones"""
+    print("♨️ Testing Scraper Pool")
+    print("=" * 50)
+
+    server, base_url = start_stub_server()
+    db_path = os.path.join(tempfile.mkdtemp(), "scraper_pool_test.db")
+    built = []
+
+    def factory():
+        scraper = DelhiHighCourtScraper(db_path, write_behind_logging=False, base_url=base_url)
+        built.append(scraper)
+        return scraper
+
+    pool = ScraperPool(factory, size=2, max_idle=60)
+    try:
+        assert pool.maintain() == 2 and len(built) == 2
+        for case_number in ("15234", "15235", "15236"):
+            with pool.checkout() as scraper:
+                success, case_data, error = scraper.search_case("W.P.(C)", case_number, "2024")
+            assert success and case_data["case_number"] == case_number, error
+        assert len(built) == 2 and pool.stats()["hits"] == 3 and pool.stats()["misses"] == 0
+        print("✓ Three searches served by the two pre-built scrapers")
+
+        try:
+            with pool.checkout() as scraper:
+                raise RuntimeError("search blew up")
+        except RuntimeError:
+            pass
+        assert pool.stats()["idle"] == 1 and pool.stats()["discarded"] == 1
+        assert pool.maintain() == 1 and len(built) == 3
+        print("✓ Scraper that raised was discarded and replaced")
+
+        pool.max_idle = 0
+        pool.maintain()
+        assert pool.stats()["rewarmed"] == 2 and len(built) == 3
+        print("✓ Idle sessions re-warmed in place")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    pool.maintain()
+    stats = pool.stats()
+    assert stats["discarded"] == 2 and stats["idle"] == 1
+    print("✓ Scraper whose session could not be re-initialized dropped")
+
+    empty = ScraperPool(factory, size=0)
+    with empty.checkout():
+        pass
+    assert empty.stats()["misses"] == 1 and empty.stats()["idle"] == 0
+    assert "scraper_pool" in app.test_client().get("/api/stats").get_json()
+    print("✓ Unpooled checkout and /api/stats")
+
+if __name__ == "__main__":
+    test_scraper_pool()
@@ -0,0 +1,120 @@
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'search_text_test.db')}")
+
+from app import app  # noqa: E402
+from models import (Query, Response, backfill_query_case_keys, build_fulltext_query, db, log_query,  # noqa: E402
+                    log_response, rebuild_fulltext, update_case)
+
+CASES = [
+    ("W.P.(C)", "7001", "2024", "Union of India", "Ram Kumar", "Hon'ble Justice Anil Sharma",
+     "Parties directed to maintain status quo till the next date."),
+    ("W.P.(C)", "7002", "2024", "Union of India", "Sita Devi", "Hon'ble Justice Meera Rao",
+     "Status quo to be maintained."),
+    ("CS(OS)", "7003", "2023", "Acme Ltd", "Union of India", "Hon'ble Justice Anil Sharma",
+     "Written statement taken on record."),
+    ("RFA", "7004", "2022", "Gopal Das", "Hari Lal", "Hon'ble Justice Anil Sharma",
+     "Appeal admitted. Status quo granted."),
+]
+
+def seed():
+    for case_type, number, year, petitioner, respondent, judge, order in CASES:
+        query = log_query(case_type, number, year)
+        log_response(query.id, scrape_success=True, case_title=f"{petitioner} vs {respondent}",
+                     petitioner=petitioner, respondent=respondent, judge_name=judge, latest_order=order)
+
+def test_search_text_ranking_and_filters():
+    """Field filters, prefix matching and pagination over the FTS5 index"""
+    print("🔎 Testing Full-Text Search")
+    print("=" * 50)
+
+    with app.app_context():
+        seed()
+    client = app.test_client()
+
+    body = client.get("/api/search-text", query_string={
+        "party": "Union of India", "judge": "Anil Sharma", "order": "status quo"}).get_json()
+    assert [hit["case_number"] for hit in body["results"]] == ["7001"]
+    assert "[status quo]" in body["results"][0]["order_snippet"].lower()
+    print("✓ Party, judge and order filters combine")
+
+    body = client.get("/api/search-text", query_string={"party": "union of ind"}).get_json()
+    assert sorted(hit["case_number"] for hit in body["results"]) == ["7001", "7002", "7003"]
+    assert client.get("/api/search-text", query_string={"party": "union of ind", "prefix": "0"}).get_json()["results"] == []
+    print("✓ Prefix matching on the last word")
+
+    first = client.get("/api/search-text", query_string={"judge": "anil", "per_page": 2}).get_json()
+    second = client.get("/api/search-text", query_string={"judge": "anil", "per_page": 2, "page": 2}).get_json()
+    assert len(first["results"]) == 2 and first["next_page"] == 2
+    assert len(second["results"]) == 1 and second["next_page"] is None
+    assert not {h["case_key"] for h in first["results"]} & {h["case_key"] for h in second["results"]}
+    print("✓ Paginated without repeats")
+
+    assert client.get("/api/search-text").status_code == 400
+    assert client.get("/api/search-text", query_string={"q": 'quo" OR NEAR(*'}).status_code == 200
+    assert build_fulltext_query('a" OR b') == '"a"* AND "OR"* AND "b"*'
+    print("✓ User input cannot inject FTS5 syntax")
+
+def test_index_tracks_updates_and_rebuild():
+    """Triggers keep the index current; rebuild backfills it"""
+    print("\n🔁 Testing Full-Text Index Maintenance")
+    print("=" * 50)
+
+    client = app.test_client()
+    with app.app_context():
+        query = log_query("FAO", "7005", "2021")
+        response = log_response(query.id, scrape_success=True, petitioner="Zephyrine Traders")
+        assert client.get("/api/search-text?petitioner=zephyrine").get_json()["results"]
+
+        response.petitioner = "Quillon Exports"
+        db.session.commit()
+        assert not client.get("/api/search-text?petitioner=zephyrine").get_json()["results"]
+        assert client.get("/api/search-text?petitioner=quillon").get_json()["results"]
+
+        db.session.execute(db.text("DELETE FROM responses_fts"))
+        db.session.commit()
+        assert not client.get("/api/search-text?petitioner=quillon").get_json()["results"]
+        rebuild_fulltext()
+        assert client.get("/api/search-text?petitioner=quillon").get_json()["results"]
+
+        db.session.delete(db.session.get(Response, response.id))
+        db.session.commit()
+        assert not client.get("/api/search-text?petitioner=quillon").get_json()["results"]
+    print("✓ Updates, deletes and rebuild reflected in results")
+
+def test_hits_are_one_per_case_with_current_fields():
+    """Rescrapes of a case collapse into one hit showing the cases row"""
+    print("\n🗂️ Testing Full-Text Hits Per Case")
+    print("=" * 50)
+
+    client = app.test_client()
+    with app.app_context():
+        for case_type, number, status in (("LPA", "7006", "Pending"), ("\tLPA\u00a0", "07006", "Disposed"),
+                                          ("lpa.", " 007006 ", "Disposed")):
+            query = log_query(case_type, number, "2020")
+            log_response(query.id, scrape_success=True, petitioner="Wendeline Haulage", case_status=status,
+                         latest_order="Wendeline matter adjourned.")
+        update_case("LPA", "7006", "2020", {"petitioner": "Wendeline Haulage", "case_status": "Disposed",
+                                            "latest_order": "Wendeline matter adjourned."})
+        db.session.commit()
+
+    body = client.get("/api/search-text", query_string={"q": "wendeline"}).get_json()
+    assert len(body["results"]) == 1 and body["next_page"] is None
+    hit = body["results"][0]
+    assert hit["case_key"] == "LPA.7006.2020" and hit["case_status"] == "Disposed"
+    assert "[wendeline]" in hit["order_snippet"].lower()
+    print("✓ Three scrapes of LPA 7006/2020 -> one hit with the current status")
+
+    with app.app_context():
+        db.session.execute(db.update(Query).where(Query.case_number == "07006").values(case_key=None))
+        db.session.commit()
+        assert backfill_query_case_keys(batch_size=1) == 1
+        assert {key for key, in db.session.execute(
+            db.select(Query.case_key).where(Query.filing_year == "2020"))} == {"LPA.7006.2020"}
+    print("✓ Case keys backfilled for queries logged before the column existed")
+
+if __name__ == "__main__":
+    test_search_text_ranking_and_filters()
+    test_index_tracks_updates_and_rebuild()
+    test_hits_are_one_per_case_with_current_fields()
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+import time
+
+from singleflight import SingleFlight, get_single_flight
+
+def run_concurrently(flight, key, fn, count):
+    """Call flight.do from several threads at once and collect the results"""
+    results = []
+    barrier = threading.Barrier(count)
+
+    def worker():
+        barrier.wait()
+        results.append(flight.do(key, fn))
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_lookups_share_one_call():
+    """Identical concurrent lookups run the scrape once"""
+    print("🔗 Testing Request Coalescing")
+    print("=" * 50)
+
+    calls = []
+
+    def scrape():
+        calls.append(1)
+        time.sleep(0.3)
+        return True, {"case_number": "15234"}, ""
+
+    flight = SingleFlight()
+    results = run_concurrently(flight, "W.P.(C).15234.2024", scrape, 8)
+
+    assert len(calls) == 1
+    assert all(result == (True, {"case_number": "15234"}, "") for result, _ in results)
+    assert sum(shared for _, shared in results) == 7
+    print(f"✓ 8 lookups, 1 scrape, stats: {flight.stats()}")
+
+def test_errors_propagate_to_followers():
+    """A failing leader raises in every waiting caller and frees the key"""
+    print("\n💥 Testing Error Propagation")
+    print("=" * 50)
+
+    def failing_scrape():
+        time.sleep(0.2)
+        raise RuntimeError("upstream down")
+
+    flight = SingleFlight()
+    errors = []
+
+    def worker():
+        try:
+            flight.do("CRL.A.892.2023", failing_scrape)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["upstream down"] * 4
+    assert flight.do("CRL.A.892.2023", lambda: "recovered") == ("recovered", False)
+    print("✓ Error shared and key released")
+
+def test_cross_worker_file_lock():
+    """Two SingleFlight instances (separate workers) serialize on the lock file"""
+    print("\n🔒 Testing Cross-Worker Lock")
+    print("=" * 50)
+
+    lock_dir = tempfile.mkdtemp()
+    active = []
+    overlaps = []
+
+    def scrape():
+        active.append(1)
+        if len(active) > 1:
+            overlaps.append(1)
+        time.sleep(0.2)
+        active.pop()
+        return "done"
+
+    workers = [SingleFlight(lock_dir=lock_dir), SingleFlight(lock_dir=lock_dir)]
+    threads = [threading.Thread(target=w.do, args=("I.A.9876.2024", scrape)) for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not overlaps
+    assert os.listdir(lock_dir)
+    print("✓ Leaders in different workers did not overlap")
+
+    stripe_dir = tempfile.mkdtemp()
+    flight = SingleFlight(lock_dir=stripe_dir, lock_stripes=4)
+    for number in range(50):
+        flight.do(f"W.P.(C).{number}.2024", lambda: "done")
+    assert 1 <= len(os.listdir(stripe_dir)) <= 4
+    print(f"✓ 50 keys locked through {len(os.listdir(stripe_dir))} lock files")
+
+def test_file_locks_need_shared_cache():
+    """Without a shared cache a waiting worker would scrape again, so no file locks are taken"""
+    print("\n🗄️ Testing Cross-Worker Lock Configuration")
+    print("=" * 50)
+
+    os.environ["SINGLEFLIGHT_LOCK_DIR"] = tempfile.mkdtemp()
+    try:
+        assert get_single_flight(shared_cache=False).lock_dir is None
+        assert get_single_flight(shared_cache=True).lock_dir == os.environ["SINGLEFLIGHT_LOCK_DIR"]
+    finally:
+        del os.environ["SINGLEFLIGHT_LOCK_DIR"]
+    print("✓ File locks only with a shared case cache")
+
+if __name__ == "__main__":
+    test_concurrent_lookups_share_one_call()
+    test_errors_propagate_to_followers()
+    test_cross_worker_file_lock()
+    test_file_locks_need_shared_cache()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'stats_test.db')}")
+
+from app import app  # noqa: E402
+from models import (LatencyRollup, Query, Response, StatsRollup, db, get_dashboard_stats,  # noqa: E402
+                    log_query, log_response, rebuild_stats)
+
+def reset_tables():
+    for model in (Response, Query, StatsRollup, LatencyRollup):
+        db.session.query(model).delete()
+    db.session.commit()
+
+def test_incremental_rollups():
+    """log_query/log_response keep hourly, daily and all-time counters current"""
+    print("📊 Testing Statistics Rollups")
+    print("=" * 50)
+
+    with app.app_context():
+        reset_tables()
+        for i in range(20):
+            query = log_query("W.P.(C)" if i < 15 else "CRL.A.", str(i), "2024")
+            log_response(query.id, scrape_success=i % 5 != 0, latency_ms=80 if i < 10 else 2000,
+                         cache_hit=i < 4)
+
+        stats = get_dashboard_stats()
+        assert stats["period"] == "total"
+        assert (stats["searches"], stats["successes"], stats["failures"], stats["cache_hits"]) == (20, 16, 4, 4)
+        assert stats["latency_ms"]["p50"] == 100 and stats["latency_ms"]["p90"] == 2500
+        assert stats["by_case_type"]["CRL.A."]["searches"] == 5
+
+        recent = get_dashboard_stats(since=datetime.utcnow() - timedelta(hours=1))
+        assert recent["period"] == "hour" and recent["searches"] == 20
+        assert get_dashboard_stats(since=datetime(2001, 1, 1), until=datetime(2001, 2, 1))["searches"] == 0
+    print("✓ Counters and latency percentiles match the logged searches")
+
+def test_rebuild_and_endpoint():
+    """rebuild_stats recomputes the rollups; /api/stats serves them"""
+    print("\n🔁 Testing Statistics Rebuild and Endpoint")
+    print("=" * 50)
+
+    with app.app_context():
+        reset_tables()
+        for i in range(6):
+            query = log_query("RFA", str(i), "2023")
+            log_response(query.id, scrape_success=i < 4)
+        db.session.query(StatsRollup).delete()
+        db.session.commit()
+
+        rebuild_stats()
+        stats = get_dashboard_stats()
+        assert (stats["searches"], stats["successes"], stats["failures"]) == (6, 4, 2)
+        assert stats["latency_ms"]["count"] == 6
+
+    client = app.test_client()
+    body = client.get("/api/stats?window=24h").get_json()
+    assert body["total_queries"] == 6 and body["period"] == "hour"
+    assert client.get("/api/stats").get_json()["successful_responses"] == 4
+    assert client.get("/api/stats?window=soon").status_code == 400
+    print("✓ Rebuild matches the logs and /api/stats answers from rollups")
+
+if __name__ == "__main__":
+    test_incremental_rollups()
+    test_rebuild_and_endpoint()
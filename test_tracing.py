@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'tracing_test.db')}")
+
+import tracing  # noqa: E402
+import app as app_module  # noqa: E402
+from app import app  # noqa: E402
+from models import Query, db  # noqa: E402
+from scraper import DelhiHighCourtScraper, SQLiteLogger  # noqa: E402
+from test_async_scraper import start_stub_server  # noqa: E402
+
+def test_nested_spans_and_file_export():
+    """Spans nest under the current span and finished traces are written as OTLP/JSON"""
+    print("🧵 Testing Span Nesting and File Export")
+    print("=" * 50)
+
+    export_path = os.path.join(tempfile.mkdtemp(), "spans.jsonl")
+    exporter = tracing.FileSpanExporter(export_path)
+    export_threads = []
+
+    def record_thread(spans):
+        export_threads.append(threading.current_thread().name)
+
+    tracing.add_exporter(exporter)
+    tracing.add_exporter(record_thread)
+    try:
+        with tracing.span("outside") as outside:
+            assert outside is None and tracing.current_trace_id() is None
+        with tracing.trace("root", case="W.P.(C)") as root:
+            with tracing.span("child") as child:
+                with tracing.span("grandchild") as grandchild:
+                    assert tracing.current_trace_id() == root.trace_id
+            try:
+                with tracing.span("failing"):
+                    raise ValueError("boom")
+            except ValueError:
+                pass
+        assert tracing.flush()
+    finally:
+        tracing._exporters.remove(exporter)
+        tracing._exporters.remove(record_thread)
+    assert export_threads == ["trace-exporter"]
+
+    assert child.parent_id == root.span_id and grandchild.parent_id == child.span_id
+    with open(export_path) as f:
+        documents = [json.loads(line) for line in f]
+    assert len(documents) == 1
+    spans = documents[0]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_name = {span["name"]: span for span in spans}
+    assert set(by_name) == {"root", "child", "grandchild", "failing"}
+    assert "parentSpanId" not in by_name["root"] and by_name["child"]["parentSpanId"] == root.span_id
+    assert by_name["failing"]["status"]["code"] == 2
+    assert {"key": "case", "value": {"stringValue": "W.P.(C)"}} in by_name["root"]["attributes"]
+    print("✓ One OTLP document per trace with parent links and error status")
+
+def test_scraper_rows_carry_trace_id():
+    """SQLiteLogger stores the trace id and scrape stages become spans"""
+    print("\n🔗 Testing Trace IDs in Scraper Logs")
+    print("=" * 50)
+
+    db_path = os.path.join(tempfile.mkdtemp(), "trace_scraper.db")
+    SQLiteLogger(db_path).close()
+    conn = sqlite3.connect(db_path)
+    conn.execute("ALTER TABLE scraper_queries DROP COLUMN trace_id")
+    conn.execute("ALTER TABLE scraper_responses DROP COLUMN trace_id")
+    conn.close()
+    SQLiteLogger(db_path).close()
+    print("✓ Pre-existing scraper database upgraded")
+
+    exported = []
+    tracing.add_exporter(exported.append)
+    server, base_url = start_stub_server()
+    try:
+        scraper = DelhiHighCourtScraper(db_path, write_behind_logging=False, base_url=base_url)
+        with tracing.trace("scrape_test") as root:
+            success, _, error = scraper.search_case("W.P.(C)", "15234", "2024")
+        assert tracing.flush()
+    finally:
+        server.shutdown()
+        tracing._exporters.remove(exported.append)
+    assert success, error
+
+    conn = sqlite3.connect(db_path)
+    trace_ids = {row[0] for row in conn.execute("SELECT trace_id FROM scraper_queries")}
+    response_ids = {row[0] for row in conn.execute("SELECT trace_id FROM scraper_responses")}
+    conn.close()
+    assert trace_ids == {root.trace_id} and response_ids == {root.trace_id}
+    names = {span.name for span in exported[0]}
+    assert {"search_page_get", "search_post", "parse", "sqlite_logger.log_query", "sqlite_logger.write"} <= names
+    print("✓ Query and response rows tagged with the trace id")
+
+def test_debug_trace_page():
+    """A search's spans are stored and rendered at /debug/trace/<query_id>"""
+    print("\n🌊 Testing /debug/trace")
+    print("=" * 50)
+
+    client = app.test_client()
+    original_rate, app_module.TRACE_SAMPLE_RATE = app_module.TRACE_SAMPLE_RATE, 1.0
+    try:
+        response = client.post("/search-case", data={"case_type": "W.P.(C)", "case_number": "91919",
+                                                     "filing_year": "2024"})
+    finally:
+        app_module.TRACE_SAMPLE_RATE = original_rate
+    trace_id = response.headers["X-Trace-Id"]
+    assert tracing.flush()
+    with app.app_context():
+        query_id = db.session.query(Query.id).filter_by(trace_id=trace_id).scalar()
+    assert query_id is not None
+
+    trace = client.get(f"/debug/trace/{query_id}", headers={"Accept": "application/json"}).get_json()
+    assert trace["trace_id"] == trace_id
+    names = [span["name"] for span in trace["spans"]]
+    assert names[0] == "POST /search-case" and trace["spans"][0]["depth"] == 0
+    assert {"models.log_query", "models.log_response", "db.commit", "cache.get"} <= set(names)
+    assert all(0 <= span["left_pct"] <= 100 for span in trace["spans"])
+    print(f"✓ {len(names)} spans stored for query {query_id}")
+
+    page = client.get(f"/debug/trace/{query_id}")
+    assert page.status_code == 200 and b"models.log_response" in page.data
+    assert client.get("/debug/trace/999999").status_code == 404
+    print("✓ Waterfall rendered")
+
+if __name__ == "__main__":
+    test_nested_spans_and_file_export()
+    test_scraper_rows_carry_trace_id()
+    test_debug_trace_page()
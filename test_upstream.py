@@ -0,0 +1,190 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'upstream_test.db')}")
+
+import app as app_module  # noqa: E402
+from models import Case, db, update_case  # noqa: E402
+from scraper import DelhiHighCourtScraper  # noqa: E402
+from upstream import (CLOSED, HALF_OPEN, OPEN, UPSTREAM_UNAVAILABLE_ERROR, UpstreamGuard,  # noqa: E402
+                      UpstreamUnavailableError)
+
+class UnavailableHandler(BaseHTTPRequestHandler):
+    """A court site that answers everything with HTTP 503"""
+
+    requests = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        UnavailableHandler.requests += 1
+        body = b"<html>Service Unavailable</html>"
+        self.send_response(503)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def new_guard(**kwargs):
+    return UpstreamGuard("court.example", os.path.join(tempfile.mkdtemp(), "upstream.db"), **kwargs)
+
+def test_circuit_breaker_states():
+    """Consecutive failures open the circuit; one probe after the cooldown closes it again"""
+    print("🔌 Testing Circuit Breaker")
+    print("=" * 50)
+
+    guard = new_guard(failure_threshold=3, cooldown=0.2)
+    other_worker = UpstreamGuard(guard.name, guard.state_path)
+    for _ in range(3):
+        guard.reserve()
+        guard.record_response(503)
+    assert other_worker.stats()["state"] == OPEN and other_worker.is_open()
+    try:
+        other_worker.reserve()
+        assert False, "request admitted while the circuit is open"
+    except UpstreamUnavailableError as e:
+        assert e.reason == "circuit open" and e.retry_after > 0
+    print("✓ Circuit opened after 3 failures, seen by every worker")
+
+    time.sleep(0.25)
+    guard.reserve()
+    assert guard.stats()["state"] == HALF_OPEN
+    try:
+        other_worker.reserve()
+        assert False, "second request admitted while the probe is in flight"
+    except UpstreamUnavailableError as e:
+        assert e.reason == "probe in flight"
+    guard.record_failure("ReadTimeout")
+    stats = guard.stats()
+    assert stats["state"] == OPEN and stats["retry_after"] > 0.2  # cooldown doubled on the re-trip
+    print("✓ Failed probe re-opened the circuit with a longer cooldown")
+
+    time.sleep(0.45)
+    guard.reserve()
+    guard.record_success()
+    assert guard.stats()["state"] == CLOSED and guard.stats()["consecutive_failures"] == 0
+    print("✓ Successful probe closed the circuit")
+
+def test_adaptive_rate():
+    """Failures halve the request rate and space requests out; successes restore it"""
+    print("\n📉 Testing Adaptive Rate Limit")
+    print("=" * 50)
+
+    guard = new_guard(failure_threshold=100, max_rate=10, min_rate=1, increase=4)
+    assert guard.reserve() == 0 and guard.reserve() == 0  # unthrottled while healthy
+    guard.record_failure("HTTP 500")
+    guard.record_failure("HTTP 500")
+    assert guard.stats()["rate"] == 2.5
+    guard.reserve()
+    assert 0.3 < guard.reserve() <= 0.4
+    print("✓ Requests spaced at the reduced rate")
+
+    guard.record_success()
+    guard.record_success()
+    assert guard.stats()["rate"] is None
+    print("✓ Additive increase back to the full rate")
+
+    guard.reset()
+    guard.record_response(429, retry_after="60")
+    try:
+        guard.reserve()
+        assert False, "request admitted before Retry-After passed"
+    except UpstreamUnavailableError as e:
+        assert e.reason == "throttled" and e.retry_after > 30
+    print("✓ Retry-After holds back requests")
+
+def test_healthy_requests_do_not_write():
+    """Only breaker transitions write the shared state; the rate and counters stay in the process"""
+    print("\n✍️ Testing Upstream State Writes")
+    print("=" * 50)
+
+    guard = new_guard(failure_threshold=100, max_rate=10, min_rate=1)
+    other_worker = UpstreamGuard(guard.name, guard.state_path, max_rate=10)
+    conn = guard._get_connection()
+    changes = conn.total_changes
+    for _ in range(50):
+        guard.reserve()
+        guard.record_response(200)
+    assert conn.total_changes == changes
+    print("✓ 50 healthy requests, no writes to the state file")
+
+    guard.record_failure("HTTP 500")
+    assert guard.stats()["rate"] == 5 and other_worker.stats()["rate"] is None
+    assert other_worker.stats()["consecutive_failures"] == 1
+    assert guard.stats()["successes"] == 50 and guard.stats()["failures"] == 1
+    print("✓ Rate adapts per process; failures and counters are shared")
+
+def test_scraper_fails_fast():
+    """Once the circuit opens the scraper stops sending requests to the court site"""
+    print("\n⛔ Testing Scraper Fail-Fast")
+    print("=" * 50)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UnavailableHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        scraper = DelhiHighCourtScraper(os.path.join(tempfile.mkdtemp(), "upstream_scraper.db"),
+                                        write_behind_logging=False,
+                                        base_url=f"http://127.0.0.1:{server.server_address[1]}")
+        scraper.upstream = new_guard(failure_threshold=2, max_rate=1000)
+        for _ in range(2):
+            scraper.search_case("W.P.(C)", "15234", "2024", max_retries=1)
+        assert scraper.upstream.stats()["state"] == OPEN
+        sent = UnavailableHandler.requests
+        start = time.monotonic()
+        success, _, error = scraper.search_case("W.P.(C)", "15234", "2024", max_retries=3)
+        assert not success and error == UPSTREAM_UNAVAILABLE_ERROR
+        assert UnavailableHandler.requests == sent and time.monotonic() - start < 1
+    finally:
+        server.shutdown()
+    print("✓ Search rejected without contacting the court site")
+
+class UnavailableScraper:
+    def search_case(self, case_type, case_number, filing_year):
+        return False, {}, UPSTREAM_UNAVAILABLE_ERROR
+
+def test_stale_data_while_open():
+    """With the court site unavailable, lookups fall back to the last known case data"""
+    print("\n🗄️ Testing Stale Fallback")
+    print("=" * 50)
+
+    app = app_module.app
+    with app.app_context():
+        update_case("W.P.(C)", "60601", "2024", {"case_title": "Stale vs State", "case_status": "Pending"},
+                    datetime.utcnow() - timedelta(days=30))
+        db.session.execute(db.update(Case).where(Case.case_number == "60601")
+                           .values(last_scraped=datetime.utcnow() - timedelta(days=30)))
+        db.session.commit()
+
+    original_get_scraper = app_module.get_scraper
+    app_module.get_scraper = lambda use_mock=False: UnavailableScraper()
+    try:
+        success, case_data, _, cache_hit = app_module.lookup_case("W.P.(C)", "60601", "2024")
+        assert success and cache_hit and case_data["case_title"] == "Stale vs State"
+        success, _, error, _ = app_module.lookup_case("W.P.(C)", "60602", "2024")
+        assert not success and error == UPSTREAM_UNAVAILABLE_ERROR
+    finally:
+        app_module.get_scraper = original_get_scraper
+    print("✓ Last known data served, unknown cases fail fast")
+
+    guard = app_module.upstream_guard
+    client = app.test_client()
+    try:
+        for _ in range(guard.failure_threshold):
+            guard.record_failure("HTTP 503")
+        assert client.get("/api/stats").get_json()["upstream"]["state"] == OPEN
+        assert b"not responding reliably" in client.get("/").data
+    finally:
+        guard.reset()
+    assert b"not responding reliably" not in client.get("/").data
+    print("✓ Breaker state shown on the dashboard")
+
+if __name__ == "__main__":
+    test_circuit_breaker_states()
+    test_adaptive_rate()
+    test_healthy_requests_do_not_write()
+    test_scraper_fails_fast()
+    test_stale_data_while_open()
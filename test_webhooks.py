@@ -0,0 +1,163 @@
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'webhooks_test.db')}")
+
+import app as app_module  # noqa: E402
+from models import WebhookOutbox, WebhookSubscription, db, log_query, log_response  # noqa: E402
+from webhooks import SIGNATURE_HEADER, WebhookDispatcher, is_deliverable_url, sign_payload  # noqa: E402
+
+class StubReceiver(BaseHTTPRequestHandler):
+    """Records webhook batches; answers with the status in `status_codes` (popped) or 200"""
+
+    batches = []
+    status_codes = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/moved":
+            self.batches.append(("redirected", body))
+            self.send_response(307)
+            self.send_header("Location", "/hook")
+            self.end_headers()
+            return
+        status = self.status_codes.pop(0) if self.status_codes else 200
+        if status == 200:
+            self.batches.append((self.headers[SIGNATURE_HEADER], body))
+        self.send_response(status)
+        self.end_headers()
+
+def start_receiver():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubReceiver)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/hook"
+
+def scrape(case_number, **fields):
+    case_data = {"case_type": "MAT.APP.", "case_number": case_number, "case_status": "Pending",
+                 "next_hearing_date": "2024-09-01", "latest_order": "Notice issued.", "judge_name": "A", **fields}
+    query = log_query("MAT.APP.", case_number, "2024")
+    log_response(query.id, scrape_success=True, parsed_json=json.dumps(case_data))
+
+def test_batched_delivery_with_retries():
+    """Changes are queued per subscriber, retried after failures and delivered in one signed batch"""
+    print("📬 Testing Webhook Notifications")
+    print("=" * 50)
+
+    server, url = start_receiver()
+    StubReceiver.batches, StubReceiver.status_codes = [], []
+    client = app_module.app.test_client()
+    original = app_module.API_TOKEN, app_module.WEBHOOK_ALLOWED_HOSTS
+    app_module.API_TOKEN, app_module.WEBHOOK_ALLOWED_HOSTS = "webhook-test-token", ["127.0.0.1"]
+    client.environ_base["HTTP_AUTHORIZATION"] = "Bearer webhook-test-token"
+    try:
+        created = client.post("/api/webhooks", json={"url": url, "case_key": "MAT.APP.41.2024"}).get_json()
+        everything = client.post("/api/webhooks", json={"url": url, "fields": ["judge_name"]}).get_json()
+        assert client.post("/api/webhooks", json={"url": "ftp://x"}).status_code == 400
+        assert client.get("/api/watchlist").get_json()["cases"][0]["case_key"] == "MAT.APP.41.2024"
+
+        with app_module.app.app_context():
+            scrape("41")
+            scrape("41")
+            scrape("41", next_hearing_date="2024-10-01")
+            scrape("41", next_hearing_date="2024-10-01", latest_order="Reply filed.", judge_name="B")
+            scrape("42")
+            assert db.session.query(WebhookOutbox).filter_by(subscription_id=created["id"]).count() == 2
+            assert db.session.query(WebhookOutbox).filter_by(subscription_id=everything["id"]).count() == 1
+        print("✓ Only relevant field changes queued, per subscriber")
+
+        dispatcher = WebhookDispatcher(app_module.app, batch_size=10, allowed_hosts=["127.0.0.1"])
+        StubReceiver.status_codes = [503, 503]
+        assert dispatcher.run_pending() == 0 and not StubReceiver.batches
+        with app_module.app.app_context():
+            backing_off = db.session.get(WebhookSubscription, created["id"])
+            assert backing_off.consecutive_failures == 1 and backing_off.next_attempt_at is not None
+            db.session.query(WebhookSubscription).update({"next_attempt_at": None})
+            db.session.commit()
+        print("✓ Failed batches back the subscriber off")
+
+        assert dispatcher.run_pending() == 3
+        assert dispatcher.run_pending() == 0
+        batches = {json.loads(body)["subscription_id"]: (signature, body) for signature, body in StubReceiver.batches}
+        signature, body = batches[created["id"]]
+        assert signature == sign_payload(created["secret"], body)
+        events = json.loads(body)["events"]
+        assert [event["version"] for event in events] == [2, 3]
+        assert events[0]["changes"] == {"next_hearing_date": {"old": "2024-09-01", "new": "2024-10-01"}}
+        assert set(events[1]["changes"]) == {"latest_order"}
+        assert set(json.loads(batches[everything["id"]][1])["events"][0]["changes"]) == {"judge_name"}
+        print("✓ Delivered in order, one signed batch per subscriber")
+
+        assert client.delete(f"/api/webhooks/{created['id']}").status_code == 200
+        with app_module.app.app_context():
+            scrape("41", case_status="Disposed")
+            assert db.session.query(WebhookOutbox).filter_by(subscription_id=created["id"]).count() == 2
+    finally:
+        server.shutdown()
+        app_module.API_TOKEN, app_module.WEBHOOK_ALLOWED_HOSTS = original
+    print("✓ Unsubscribed endpoints get nothing new")
+
+def test_subscriptions_cannot_target_internal_hosts():
+    """Webhook endpoints need the API token, and URLs must be public unless allow-listed"""
+    print("\n🛡️ Testing Webhook Target Checks")
+    print("=" * 50)
+
+    client = app_module.app.test_client()
+    original = app_module.API_TOKEN, app_module.WEBHOOK_ALLOWED_HOSTS
+    try:
+        app_module.API_TOKEN, app_module.WEBHOOK_ALLOWED_HOSTS = "", []
+        assert client.post("/api/webhooks", json={"url": "https://example.com/hook"}).status_code == 403
+        app_module.API_TOKEN = "webhook-test-token"
+        assert client.get("/api/webhooks").status_code == 401
+        assert client.delete("/api/webhooks/1", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        print("✓ Unauthenticated and wrongly authenticated requests refused")
+
+        client.environ_base["HTTP_AUTHORIZATION"] = "Bearer webhook-test-token"
+        for url in ("http://127.0.0.1:8080/hook", "http://localhost/hook", "http://169.254.169.254/latest/meta-data/",
+                    "http://10.0.0.5/hook", "http://[::1]/hook", "http://0.0.0.0/hook"):
+            assert client.post("/api/webhooks", json={"url": url}).status_code == 400, url
+        assert is_deliverable_url("https://8.8.8.8/hook")
+        assert not is_deliverable_url("https://8.8.8.8/hook", ["hooks.example.com"])
+        assert is_deliverable_url("http://localhost:9000/hook", ["localhost"])
+        print("✓ Loopback, private and link-local URLs rejected; allow-list overrides")
+    finally:
+        app_module.API_TOKEN, app_module.WEBHOOK_ALLOWED_HOSTS = original
+
+    # A subscription stored while its host was allowed is re-checked, and redirects are not followed
+    server, url = start_receiver()
+    StubReceiver.batches, StubReceiver.status_codes = [], []
+    try:
+        with app_module.app.app_context():
+            subscription = WebhookSubscription(url=url, secret="s", case_key="MAT.APP.43.2024",
+                                               fields="next_hearing_date")
+            moved = WebhookSubscription(url=url.replace("/hook", "/moved"), secret="s",
+                                        case_key="MAT.APP.43.2024", fields="next_hearing_date")
+            db.session.add_all([subscription, moved])
+            db.session.commit()
+            ids = subscription.id, moved.id
+            scrape("43")
+            scrape("43", next_hearing_date="2024-11-01")
+        assert WebhookDispatcher(app_module.app).run_pending() == 0 and not StubReceiver.batches
+        with app_module.app.app_context():
+            db.session.query(WebhookSubscription).update({"next_attempt_at": None})
+            db.session.commit()
+        assert WebhookDispatcher(app_module.app, allowed_hosts=["127.0.0.1"]).run_pending() == 1
+        assert [tag for tag, _ in StubReceiver.batches].count("redirected") == 1
+        assert len(StubReceiver.batches) == 2
+        with app_module.app.app_context():
+            assert db.session.get(WebhookSubscription, ids[1]).consecutive_failures == 2
+            for subscription_id in ids:
+                db.session.get(WebhookSubscription, subscription_id).active = False
+            db.session.commit()
+    finally:
+        server.shutdown()
+    print("✓ Internal URLs skipped at delivery; a redirect counts as a failed delivery")
+
+if __name__ == "__main__":
+    test_batched_delivery_with_retries()
+    test_subscriptions_cannot_target_internal_hosts()
@@ -0,0 +1,261 @@
+"""Lightweight request tracing with nested spans
+
+A trace is started per dashboard request (and per background search job);
+``span()`` blocks opened while it is active nest under the current span
+through a context variable, so they work across threads' own contexts and
+asyncio tasks. Finished traces are queued for a background thread, which
+hands them to the registered exporters, so exporting never adds to a
+request's latency (traces arriving while the queue is full are dropped):
+
+* ``FileSpanExporter`` - appends OTLP/JSON ``resourceSpans`` documents to a
+  local file, one trace per line
+* ``OTLPHttpExporter`` - POSTs the same document to an OpenTelemetry
+  collector's ``/v1/traces`` endpoint (OTLP over HTTP with JSON encoding)
+* any callable taking the list of finished spans (the app stores them in
+  the ``trace_spans`` table for ``/debug/trace/<query_id>``)
+
+Outside a trace ``span()`` costs one context variable lookup.
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'delhi-hc-case-dashboard'
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_exporters: List[Callable[[List['Span']], None]] = []
+
+EXPORT_QUEUE_SIZE = 1000
+_export_queue = None
+_export_pid = None
+_export_lock = threading.Lock()
+dropped_traces = 0
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, trace: '_Trace', name: str, parent_id: Optional[str], attributes: Dict):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+class _Trace:
+    """Spans of one trace finished in this process; exported when its root span ends"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.root = None
+        self.spans = []
+        self.lock = threading.Lock()
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def new_trace_id() -> str:
+    return os.urandom(16).hex()
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+def set_trace_attribute(key: str, value):
+    """Attach an attribute to the root span of the current trace (e.g. the query it logged)"""
+    span = _current_span.get()
+    if span is not None and span.trace.root is not None:
+        span.trace.root.attributes[key] = value
+
+def add_exporter(exporter: Callable[[List[Span]], None]):
+    _exporters.append(exporter)
+
+def _run_exporters(spans: List[Span]):
+    for exporter in list(_exporters):
+        try:
+            exporter(spans)
+        except Exception as e:
+            logger.error(f"Trace exporter {exporter!r} failed: {str(e)}")
+
+def _export_loop(traces: queue.Queue):
+    while True:
+        item = traces.get()
+        if isinstance(item, threading.Event):
+            item.set()
+        else:
+            _run_exporters(item)
+
+def _get_export_queue() -> queue.Queue:
+    """This process's export queue, starting its thread on first use (and again after a fork)"""
+    global _export_queue, _export_pid
+    if _export_pid != os.getpid():
+        with _export_lock:
+            if _export_pid != os.getpid():
+                _export_queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+                threading.Thread(target=_export_loop, args=(_export_queue,), name="trace-exporter",
+                                 daemon=True).start()
+                _export_pid = os.getpid()
+    return _export_queue
+
+def _export(spans: List[Span]):
+    global dropped_traces
+    if not _exporters:
+        return
+    try:
+        _get_export_queue().put_nowait(spans)
+    except queue.Full:
+        with _export_lock:
+            dropped_traces += 1
+        logger.warning(f"Trace export queue full, dropped a trace ({dropped_traces} dropped so far)")
+
+def flush(timeout: float = 10.0) -> bool:
+    """Block until every trace finished so far has been exported"""
+    done = threading.Event()
+    try:
+        _get_export_queue().put(done, timeout=timeout)
+    except queue.Full:
+        return False
+    return done.wait(timeout)
+
+def start_span(name: str, trace_id: Optional[str] = None, **attributes):
+    """
+    Open a span and make it current; returns a token for end_span()
+
+    Without a current span this starts a new trace (with trace_id if given).
+    """
+    parent = _current_span.get()
+    if parent is not None and trace_id is None:
+        span = Span(parent.trace, name, parent.span_id, attributes)
+    else:
+        span = Span(_Trace(trace_id or new_trace_id()), name, None, attributes)
+        span.trace.root = span
+    return span, _current_span.set(span)
+
+def end_span(span: Span, token, error: Optional[BaseException] = None):
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # Ended from another context (e.g. after a streamed response); nothing to restore there
+        pass
+    with span.trace.lock:
+        span.trace.spans.append(span)
+    if span.parent_id is None:
+        _export(span.trace.spans)
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the enclosed block as a child of the current span (no-op outside a trace)"""
+    if _current_span.get() is None:
+        yield None
+        return
+    current, token = start_span(name, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        end_span(current, token, error=e)
+        raise
+    end_span(current, token)
+
+@contextmanager
+def trace(name: str, trace_id: Optional[str] = None, sample_rate: float = 1.0, **attributes):
+    """Run the enclosed block as the root span of a (sampled) trace"""
+    if _current_span.get() is not None or random.random() >= sample_rate:
+        with span(name, **attributes) as current:
+            yield current
+        return
+    root, token = start_span(name, trace_id=trace_id or new_trace_id(), **attributes)
+    try:
+        yield root
+    except BaseException as e:
+        end_span(root, token, error=e)
+        raise
+    end_span(root, token)
+
+def otlp_document(spans: List[Span]) -> Dict:
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+        'scopeSpans': [{'scope': {'name': __name__}, 'spans': [span.to_otlp() for span in spans]}]
+    }]}
+
+class FileSpanExporter:
+    """Append each finished trace to path as one line of OTLP/JSON"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, spans: List[Span]):
+        line = json.dumps(otlp_document(spans)) + '\n'
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line)
+
+class OTLPHttpExporter:
+    """POST each finished trace to an OpenTelemetry collector as OTLP/HTTP JSON"""
+
+    def __init__(self, endpoint: str, timeout: float = 2.0):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def __call__(self, spans: List[Span]):
+        response = self.session.post(self.url, json=otlp_document(spans), timeout=self.timeout)
+        if response.status_code >= 300:
+            logger.warning(f"Trace collector answered HTTP {response.status_code}")
+
+def configure_from_env():
+    """Register the exporters named by TRACE_EXPORT_FILE / TRACE_OTLP_ENDPOINT"""
+    if os.environ.get('TRACE_EXPORT_FILE'):
+        add_exporter(FileSpanExporter(os.environ['TRACE_EXPORT_FILE']))
+    if os.environ.get('TRACE_OTLP_ENDPOINT'):
+        add_exporter(OTLPHttpExporter(os.environ['TRACE_OTLP_ENDPOINT']))
@@ -0,0 +1,318 @@
+"""Circuit breaker and adaptive rate limit for requests to the court website
+
+Every scraper request goes through the UpstreamGuard of the court host. The
+breaker state lives in a small SQLite file, so all threads and gunicorn
+workers share one view of upstream health. A healthy request only reads
+that file; it is written when a request fails, when a probe is sent and
+when the circuit closes (request counters ride along, or are added every
+``stats_interval`` seconds):
+
+* circuit breaker - after ``failure_threshold`` consecutive failures (5xx,
+  429, timeouts, connection errors) the circuit opens and requests fail
+  fast with UpstreamUnavailableError for ``cooldown`` seconds (doubling on
+  every re-trip, up to ``max_cooldown``). Then a single request is let
+  through as a probe: its success closes the circuit, its failure opens it
+  again.
+* AIMD rate limit, kept in memory per process - each failure multiplies the
+  allowed request rate by ``decrease`` (down to ``min_rate``) and each
+  success adds ``increase`` requests/sec back. Below ``max_rate`` the
+  process spaces its requests 1/rate apart; once the rate has recovered to
+  ``max_rate`` they are not spaced at all. A 429's Retry-After is shared and
+  holds back every process's requests until it has passed.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from metrics import record_upstream_rejection, record_upstream_throttle
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_UNAVAILABLE_ERROR = "Court website is temporarily unavailable - please try again later"
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+STATE_COLUMNS = ('state', 'failures', 'trips', 'open_until', 'probe_until', 'rate', 'next_slot',
+                 'last_error', 'changed_at', 'successes_total', 'failures_total', 'rejected_total')
+COUNTER_COLUMNS = ('successes_total', 'failures_total', 'rejected_total')
+
+class UpstreamUnavailableError(Exception):
+    """Raised instead of sending a request while the circuit is open or the wait would be too long"""
+
+    def __init__(self, name: str, reason: str, retry_after: float):
+        super().__init__(f"{name}: {reason}, retry in {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+def is_failure_status(status: int) -> bool:
+    return status >= 500 or status == 429
+
+def parse_retry_after(value) -> Optional[float]:
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None  # HTTP-date values are not worth honouring precisely
+
+class UpstreamGuard:
+    """Shared circuit breaker and per-process AIMD rate limiter for one upstream host"""
+
+    def __init__(self, name: str, state_path: str = "upstream_state.db", failure_threshold: int = 5,
+                 cooldown: float = 30.0, max_cooldown: float = 600.0, probe_timeout: float = 60.0,
+                 max_rate: float = 10.0, min_rate: float = 0.1, increase: float = 0.1,
+                 decrease: float = 0.5, max_wait: float = 30.0, stats_interval: float = 5.0):
+        self.name = name
+        self.state_path = state_path
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_wait = max_wait
+        self.stats_interval = stats_interval
+        self._local = threading.local()
+        # AIMD rate, request spacing and not yet written counters of this process
+        self._lock = threading.Lock()
+        self._rate = max_rate
+        self._next_slot = 0.0
+        self._counters = dict.fromkeys(COUNTER_COLUMNS, 0)
+        self._counters_flushed = time.monotonic()
+        self._shared = None  # breaker columns as last read, to skip writes while they need no change
+        self._init_database()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.state_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_database(self):
+        conn = self._get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS upstream_state (
+                name TEXT PRIMARY KEY,
+                state TEXT NOT NULL DEFAULT 'closed',
+                failures INTEGER NOT NULL DEFAULT 0,
+                trips INTEGER NOT NULL DEFAULT 0,
+                open_until REAL NOT NULL DEFAULT 0,
+                probe_until REAL NOT NULL DEFAULT 0,
+                rate REAL NOT NULL,
+                next_slot REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                changed_at REAL,
+                successes_total INTEGER NOT NULL DEFAULT 0,
+                failures_total INTEGER NOT NULL DEFAULT 0,
+                rejected_total INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute('INSERT OR IGNORE INTO upstream_state (name, rate) VALUES (?, ?)', (self.name, self.max_rate))
+
+    def _read_state(self) -> Dict:
+        """This host's shared state row (a plain read, no write lock)"""
+        row = self._get_connection().execute(
+            f"SELECT {', '.join(STATE_COLUMNS)} FROM upstream_state WHERE name = ?", (self.name,)).fetchone()
+        state = dict(zip(STATE_COLUMNS, row))
+        self._shared = state
+        return state
+
+    def _take_counters(self) -> Dict[str, int]:
+        with self._lock:
+            counters = self._counters
+            self._counters = dict.fromkeys(COUNTER_COLUMNS, 0)
+            self._counters_flushed = time.monotonic()
+        return counters
+
+    def _count(self, column: str):
+        with self._lock:
+            self._counters[column] += 1
+            due = time.monotonic() - self._counters_flushed >= self.stats_interval
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Add this process's request counters to the shared row"""
+        counters = self._take_counters()
+        if any(counters.values()):
+            self._get_connection().execute(
+                f"UPDATE upstream_state SET {', '.join(f'{column} = {column} + ?' for column in COUNTER_COLUMNS)} "
+                "WHERE name = ?", tuple(counters[column] for column in COUNTER_COLUMNS) + (self.name,))
+
+    @contextmanager
+    def _transaction(self):
+        """Read this host's state row and write back the changes, holding the database write lock"""
+        conn = self._get_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(f"SELECT {', '.join(STATE_COLUMNS)} FROM upstream_state WHERE name = ?",
+                               (self.name,)).fetchone()
+            state = dict(zip(STATE_COLUMNS, row))
+            counters = self._take_counters()  # a transition writes anyway, so the counters go with it
+            for column in COUNTER_COLUMNS:
+                state[column] += counters[column]
+            yield state
+            conn.execute(f"UPDATE upstream_state SET {', '.join(f'{column} = ?' for column in STATE_COLUMNS)} "
+                         "WHERE name = ?", tuple(state[column] for column in STATE_COLUMNS) + (self.name,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._shared = state
+
+    def _become_probe(self, now: float) -> Optional[Tuple[str, float]]:
+        """Take the half-open probe slot unless another caller got it first; returns a rejection or None"""
+        with self._transaction() as state:
+            if state['state'] == OPEN and now < state['open_until']:
+                return 'circuit open', state['open_until'] - now
+            if state['state'] == HALF_OPEN and now < state['probe_until']:
+                return 'probe in flight', state['probe_until'] - now
+            if state['state'] == CLOSED:
+                return None
+            if state['state'] == OPEN:
+                logger.info(f"Circuit for {self.name} half-open, sending a probe request")
+            state.update(state=HALF_OPEN, probe_until=now + self.probe_timeout, changed_at=now)
+        return None
+
+    def reserve(self) -> float:
+        """
+        Admit one request, returning how many seconds the caller must wait before sending it
+
+        Raises UpstreamUnavailableError while the circuit is open (or another
+        caller's probe is in flight) and when the wait would exceed max_wait.
+        Only reads the shared state unless this request becomes the probe.
+        """
+        now = time.time()
+        state = self._read_state()
+        rejection = None
+        if state['state'] == OPEN and now < state['open_until']:
+            rejection = ('circuit open', state['open_until'] - now)
+        elif state['state'] == OPEN or (state['state'] == HALF_OPEN and now >= state['probe_until']):
+            # Cooldown over (or the previous probe never reported back): this request is the probe
+            rejection = self._become_probe(now)
+        elif state['state'] == HALF_OPEN:
+            rejection = ('probe in flight', state['probe_until'] - now)
+
+        if rejection is None:
+            with self._lock:
+                # A 429's Retry-After (state next_slot) holds back every process
+                slot = max(now, self._next_slot, state['next_slot'])
+                if slot - now > self.max_wait:
+                    rejection = ('throttled', slot - now)
+                elif self._rate < self.max_rate:
+                    self._next_slot = slot + 1.0 / self._rate
+        if rejection is not None:
+            self._count('rejected_total')
+            record_upstream_rejection(rejection[0])
+            raise UpstreamUnavailableError(self.name, *rejection)
+        return slot - now
+
+    def acquire(self):
+        """Block until a request may be sent (see reserve)"""
+        wait = self.reserve()
+        if wait > 0:
+            record_upstream_throttle(wait)
+            with span('upstream.throttle', seconds=wait):
+                time.sleep(wait)
+
+    def record_success(self):
+        with self._lock:
+            self._rate = min(self.max_rate, self._rate + self.increase)
+        shared = self._shared or self._read_state()
+        if shared['state'] == CLOSED and shared['failures'] == 0:
+            self._count('successes_total')
+            return
+        now = time.time()
+        with self._lock:
+            self._counters['successes_total'] += 1
+        with self._transaction() as state:
+            state['failures'] = 0
+            if state['state'] != CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+                state.update(state=CLOSED, trips=0, changed_at=now)
+
+    def record_failure(self, error: str, retry_after: Optional[float] = None):
+        now = time.time()
+        with self._lock:
+            self._rate = max(self.min_rate, self._rate * self.decrease)
+            self._counters['failures_total'] += 1
+        with self._transaction() as state:
+            state['failures'] += 1
+            state['last_error'] = error
+            if retry_after:
+                state['next_slot'] = max(state['next_slot'], now + retry_after)
+            if state['state'] == HALF_OPEN or (state['state'] == CLOSED
+                                               and state['failures'] >= self.failure_threshold):
+                cooldown = min(self.cooldown * (2 ** state['trips']), self.max_cooldown)
+                state.update(state=OPEN, open_until=now + cooldown, trips=state['trips'] + 1, changed_at=now)
+                logger.warning(f"Circuit for {self.name} opened for {cooldown:.0f}s after "
+                               f"{state['failures']} consecutive failures ({error})")
+
+    def record_response(self, status: int, retry_after=None):
+        if is_failure_status(status):
+            self.record_failure(f"HTTP {status}", parse_retry_after(retry_after))
+        else:
+            self.record_success()
+
+    def is_open(self) -> bool:
+        """True while requests would be rejected because the circuit is open"""
+        stats = self.stats()
+        return stats['state'] == OPEN and stats['retry_after'] > 0
+
+    def reset(self):
+        with self._lock:
+            self._rate = self.max_rate
+            self._next_slot = 0.0
+        with self._transaction() as state:
+            state.update(state=CLOSED, failures=0, trips=0, open_until=0, probe_until=0,
+                         rate=self.max_rate, next_slot=0, changed_at=time.time())
+
+    def stats(self) -> Dict:
+        self.flush_stats()
+        state = self._read_state()
+        now = time.time()
+        return {
+            'host': self.name,
+            'state': state['state'],
+            'consecutive_failures': state['failures'],
+            'retry_after': round(max(state['open_until'] - now, 0), 1) if state['state'] == OPEN else 0,
+            'rate': None if self._rate >= self.max_rate else round(self._rate, 3),
+            'max_rate': self.max_rate,
+            'last_error': state['last_error'],
+            'changed_at': state['changed_at'],
+            'successes': state['successes_total'],
+            'failures': state['failures_total'],
+            'rejected': state['rejected_total']
+        }
+
+_guards: Dict[Tuple[str, str], UpstreamGuard] = {}
+_guards_lock = threading.Lock()
+
+def get_upstream_guard(base_url: str) -> UpstreamGuard:
+    """Process-wide guard for the host of base_url, configured through the environment"""
+    name = urlparse(base_url).netloc or base_url
+    state_path = os.environ.get("UPSTREAM_STATE_DB", "upstream_state.db")
+    key = (os.path.abspath(state_path), name)
+    with _guards_lock:
+        guard = _guards.get(key)
+        if guard is None:
+            guard = UpstreamGuard(
+                name, state_path,
+                failure_threshold=int(os.environ.get("UPSTREAM_FAILURE_THRESHOLD", "5")),
+                cooldown=float(os.environ.get("UPSTREAM_COOLDOWN", "30")),
+                max_cooldown=float(os.environ.get("UPSTREAM_MAX_COOLDOWN", "600")),
+                max_rate=float(os.environ.get("UPSTREAM_MAX_RATE", "10")),
+                min_rate=float(os.environ.get("UPSTREAM_MIN_RATE", "0.1")),
+                max_wait=float(os.environ.get("UPSTREAM_MAX_WAIT", "30"))
+            )
+            _guards[key] = guard
+        return guard
@@ -0,0 +1,184 @@
+"""Scheduled refresh of watched cases
+
+Watched cases are re-scraped on their own schedule instead of waiting for
+someone to search for them. Each case's refresh interval comes from how
+close its ``next_hearing_date`` is and how recently its data last changed;
+a deterministic per-case jitter keeps cases added together from staying in
+lockstep. Scrapes are paced by a token bucket with no burst, so the daily
+budget is spread evenly over the day, and the most overdue case goes first.
+
+Only one process runs the scheduler at a time: it holds an exclusive lock
+on ``lock_path`` and the others keep retrying in case the leader exits.
+"""
+import hashlib
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+from leader import FileLeaderLock
+from models import get_case, get_due_watched_cases, get_next_watch_due, record_watch_refresh
+from ratelimit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+RefreshFn = Callable[[str, str, str], Tuple[bool, dict, str]]
+
+# (days until the hearing at most, refresh interval)
+HEARING_INTERVALS = (
+    (-1, timedelta(hours=6)),   # hearing just happened: the order is due
+    (1, timedelta(hours=2)),    # today or tomorrow
+    (3, timedelta(hours=6)),
+    (7, timedelta(hours=12)),
+    (30, timedelta(days=1)),
+)
+DEFAULT_INTERVAL = timedelta(days=3)
+MIN_INTERVAL = timedelta(hours=1)
+RECENTLY_CHANGED = timedelta(days=3)
+LONG_UNCHANGED = timedelta(days=90)
+JITTER = 0.1
+MAX_FAILURE_BACKOFF = timedelta(hours=12)
+
+def parse_hearing_date(value) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(value or '').strip()[:10])
+    except ValueError:
+        return None
+
+def refresh_interval(case_key: str, next_hearing_date=None, last_changed: Optional[datetime] = None,
+                     now: Optional[datetime] = None) -> timedelta:
+    """How long a freshly scraped case may wait before its next refresh"""
+    now = now or datetime.utcnow()
+    interval = DEFAULT_INTERVAL
+    hearing = parse_hearing_date(next_hearing_date)
+    if hearing is not None:
+        days_until = (hearing - now.date()).days
+        if days_until < -7:
+            interval = DEFAULT_INTERVAL
+        else:
+            for max_days, hearing_interval in HEARING_INTERVALS:
+                if days_until <= max_days:
+                    interval = hearing_interval
+                    break
+
+    if last_changed is not None:
+        if now - last_changed <= RECENTLY_CHANGED:
+            interval /= 2
+        elif now - last_changed >= LONG_UNCHANGED:
+            interval *= 2
+
+    digest = hashlib.sha256(case_key.encode()).digest()
+    spread = (digest[0] / 255.0) * 2 - 1
+    return max(interval * (1 + JITTER * spread), MIN_INTERVAL)
+
+def failure_backoff(consecutive_failures: int) -> timedelta:
+    return min(timedelta(minutes=15) * (2 ** min(consecutive_failures, 10)), MAX_FAILURE_BACKOFF)
+
+class RefreshScheduler:
+    """Background thread that refreshes due watched cases within a daily scrape budget"""
+
+    def __init__(self, app, refresh: RefreshFn, daily_budget: int = 2000,
+                 lock_path: Optional[str] = None, idle_wait: float = 60.0):
+        self.app = app
+        self.refresh = refresh
+        self.daily_budget = daily_budget
+        self.lock_path = lock_path
+        self.idle_wait = idle_wait
+        self._rate_limiter = RateLimiter(rate=daily_budget / 86400.0, burst=1)
+        self._leader_lock = FileLeaderLock(lock_path, name='Watchlist scheduler')
+        self._thread = None
+        self._started_pid = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.refreshed = 0
+        self.failed = 0
+
+    def ensure_started(self):
+        """Start the scheduler thread once per process (safe to call after a gunicorn fork)"""
+        if self._started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            self._leader_lock.reset()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="watchlist-scheduler", daemon=True)
+            self._thread.start()
+            self._started_pid = os.getpid()
+            logger.info(f"Watchlist scheduler started ({self.daily_budget} refreshes/day)")
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_lock.held
+
+    def run_forever(self):
+        """Refresh due cases until stop() is called, waiting for leadership first"""
+        while not self._stop.is_set():
+            if not self._leader_lock.try_acquire():
+                self._stop.wait(self.idle_wait)
+                continue
+            try:
+                wait = self.run_pending()
+            except Exception as e:
+                logger.error(f"Watchlist scheduler iteration failed: {str(e)}", exc_info=True)
+                wait = self.idle_wait
+            if wait > 0:
+                self._stop.wait(wait)
+
+    def run_pending(self, limit: Optional[int] = None, paced: bool = True) -> float:
+        """
+        Refresh due cases until none are left (or limit is reached)
+
+        Returns how many seconds to sleep before the next case becomes due.
+        """
+        done = 0
+        while not self._stop.is_set() and (limit is None or done < limit):
+            with self.app.app_context():
+                due = get_due_watched_cases(limit=1)
+                if not due:
+                    next_due = get_next_watch_due()
+                    if next_due is None:
+                        return self.idle_wait
+                    return min(max((next_due - datetime.utcnow()).total_seconds(), 1.0), self.idle_wait)
+                watched = due[0]
+                target = (watched.case_key, watched.case_type, watched.case_number, watched.filing_year,
+                          watched.consecutive_failures)
+
+            if paced and self._stop.wait(self._rate_limiter._reserve()):
+                break
+            self._refresh_one(*target)
+            done += 1
+        return 0.0
+
+    def _refresh_one(self, case_key, case_type, case_number, filing_year, consecutive_failures):
+        try:
+            success, case_data, error_message = self.refresh(case_type, case_number, filing_year)
+        except Exception as e:
+            logger.error(f"Watchlist refresh of {case_key} crashed: {str(e)}", exc_info=True)
+            success, case_data, error_message = False, {}, str(e)
+
+        with self.app.app_context():
+            now = datetime.utcnow()
+            if success:
+                case = get_case(case_type, case_number, filing_year)
+                interval = refresh_interval(case_key, case_data.get('next_hearing_date'),
+                                            case.last_changed if case else None, now)
+                self.refreshed += 1
+            else:
+                interval = failure_backoff(consecutive_failures)
+                self.failed += 1
+                logger.warning(f"Watchlist refresh of {case_key} failed: {error_message}")
+            record_watch_refresh(case_key, success, now + interval, error_message=error_message)
+
+    def stats(self):
+        return {
+            'daily_budget': self.daily_budget,
+            'running': self._started_pid == os.getpid(),
+            'leader': self.is_leader,
+            'refreshed': self.refreshed,
+            'failed': self.failed
+        }
@@ -0,0 +1,177 @@
+"""Delivery of case change notifications to webhook subscribers
+
+Notifications are written to the ``webhook_outbox`` table in the same
+transaction as the case change that caused them (see
+``models.update_case``), so a crash can delay a notification but not lose
+it. The dispatcher POSTs each subscriber's pending notifications as one
+batch, oldest first::
+
+    {"subscription_id": 3, "events": [{"case_key": ..., "version": ...,
+                                       "changed_at": ..., "changes": {...}}]}
+
+The body is signed with the subscription secret in ``X-Webhook-Signature``
+(``sha256=<hex HMAC>``). A failed batch backs the whole subscriber off
+exponentially, which keeps its notifications in order; notifications that
+keep failing are eventually marked dead.
+
+Subscriber URLs must resolve only to public addresses, unless an
+allow-list of hosts is configured, in which case only those hosts are
+used. The check runs again before every delivery, and redirects are
+not followed, so a subscription cannot make the server POST to loopback,
+private or link-local (cloud metadata) addresses.
+"""
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from leader import FileLeaderLock
+from models import (WebhookSubscription, db, get_deliverable_subscription_ids, get_pending_notifications,
+                    get_webhook_outbox_counts, record_webhook_delivery)
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Webhook-Signature'
+
+def sign_payload(secret: str, body: bytes) -> str:
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+def is_deliverable_url(url: str, allowed_hosts: Iterable[str] = ()) -> bool:
+    """http(s) URL on allowed_hosts, or, without an allow-list, whose host resolves only to public addresses"""
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    if parsed.scheme not in ('http', 'https') or not host:
+        return False
+    allowed = {allowed_host.lower() for allowed_host in allowed_hosts}
+    if allowed:
+        return host in allowed
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or 443, proto=socket.IPPROTO_TCP)}
+    except (OSError, UnicodeError, ValueError):
+        return False
+    # Scoped IPv6 addresses carry a %zone suffix
+    return bool(addresses) and all(ipaddress.ip_address(address.split('%')[0]).is_global for address in addresses)
+
+def retry_delay(consecutive_failures: int, base: float = 10.0, cap: float = 3600.0) -> timedelta:
+    """Exponential backoff with full jitter"""
+    return timedelta(seconds=random.uniform(0, min(cap, base * (2 ** min(consecutive_failures, 16)))) + base / 2)
+
+class WebhookDispatcher:
+    """Background thread that delivers the webhook outbox in per-subscriber batches"""
+
+    def __init__(self, app, batch_size: int = 100, interval: float = 5.0, max_attempts: int = 10,
+                 timeout: float = 10.0, lock_path: Optional[str] = None, allowed_hosts: Iterable[str] = (),
+                 session: Optional[requests.Session] = None):
+        self.app = app
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.allowed_hosts = list(allowed_hosts)
+        self.session = session or requests.Session()
+        self.session.headers['User-Agent'] = 'delhi-hc-case-notifier'
+        self._leader_lock = FileLeaderLock(lock_path, name='Webhook dispatcher')
+        self._thread = None
+        self._started_pid = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.delivered = 0
+        self.failed_batches = 0
+
+    def ensure_started(self):
+        """Start the dispatcher thread once per process (safe to call after a gunicorn fork)"""
+        if self._started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            self._leader_lock.reset()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="webhook-dispatcher", daemon=True)
+            self._thread.start()
+            self._started_pid = os.getpid()
+            logger.info(f"Webhook dispatcher started (every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        """Deliver pending notifications every interval until stop() is called"""
+        while not self._stop.is_set():
+            if self._leader_lock.try_acquire():
+                try:
+                    self.run_pending()
+                except Exception as e:
+                    logger.error(f"Webhook dispatch failed: {str(e)}", exc_info=True)
+            self._stop.wait(self.interval)
+
+    def run_pending(self) -> int:
+        """Send one batch to every subscriber with due notifications; returns notifications delivered"""
+        delivered = 0
+        with self.app.app_context():
+            for subscription_id in get_deliverable_subscription_ids():
+                delivered += self._deliver(subscription_id)
+        return delivered
+
+    def _deliver(self, subscription_id: int) -> int:
+        subscription = db.session.get(WebhookSubscription, subscription_id)
+        batch = get_pending_notifications(subscription_id, limit=self.batch_size)
+        if not batch:
+            return 0
+        body = json.dumps({
+            'subscription_id': subscription_id,
+            'events': [json.loads(row.payload) for row in batch]
+        }).encode()
+        headers = {'Content-Type': 'application/json', SIGNATURE_HEADER: sign_payload(subscription.secret, body)}
+        outbox_ids = [row.id for row in batch]
+
+        error_message = None
+        # Checked again here: the host may resolve to a different address than when it subscribed
+        if not is_deliverable_url(subscription.url, self.allowed_hosts):
+            error_message = 'URL is not allowed or does not resolve to a public address'
+        else:
+            try:
+                # A redirect answer is a failed delivery, never a hop to another host
+                response = self.session.post(subscription.url, data=body, headers=headers, timeout=self.timeout,
+                                             allow_redirects=False)
+                if not 200 <= response.status_code < 300:
+                    error_message = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error_message = str(e)
+
+        if error_message is None:
+            record_webhook_delivery(subscription_id, outbox_ids, True)
+            self.delivered += len(batch)
+            logger.info(f"Delivered {len(batch)} notifications to webhook {subscription_id}")
+            return len(batch)
+
+        retry_at = datetime.utcnow() + retry_delay(subscription.consecutive_failures)
+        record_webhook_delivery(subscription_id, outbox_ids, False, error_message=error_message,
+                                retry_at=retry_at, max_attempts=self.max_attempts)
+        self.failed_batches += 1
+        logger.warning(f"Webhook {subscription_id} delivery failed ({error_message}); retrying at {retry_at}")
+        return 0
+
+    def stats(self):
+        stats = {
+            'running': self._started_pid == os.getpid(),
+            'leader': self._leader_lock.held,
+            'delivered': self.delivered,
+            'failed_batches': self.failed_batches
+        }
+        try:
+            with self.app.app_context():
+                stats['outbox'] = get_webhook_outbox_counts()
+        except Exception as e:
+            logger.error(f"Failed to count webhook outbox: {str(e)}")
+        return stats